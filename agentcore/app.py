@@ -6,6 +6,7 @@ This is the actual runtime code that will be deployed to BedrockAgentCore
 
 import json
 import os
+import sys
 import boto3
 import logging
 from typing import Dict, Any, Optional, List
@@ -13,6 +14,13 @@ from datetime import datetime
 from strands import Agent
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 
+# key_layout and storage_codec are shared with the Lambda functions; the image build copies them next to app.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+from key_layout import resolve_puuid, get_match_key, get_match_index_key, get_mastery_key
+from storage_codec import decode_document
+from local_retrieval import KnowledgeIndex
+from game_data import GameData, GAME_DATA_FILE
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,11 +30,73 @@ app = BedrockAgentCoreApp()
 
 # Initialize AWS clients
 s3_client = boto3.client('s3')
+bedrock_agent_runtime = boto3.client('bedrock-agent-runtime')
 
 # Environment variables
 DATA_BUCKET = os.environ.get('DATA_BUCKET', 'rift-rewind-ai-documents-doyaji')
 KNOWLEDGE_BASE_ID = os.environ.get('KNOWLEDGE_BASE_ID', 'VUHNM8WBMA')
 
+# Local vector index (build_knowledge_index.py) searched before the remote knowledge base
+KNOWLEDGE_INDEX_DIR = os.environ.get('KNOWLEDGE_INDEX_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'knowledge_index'))
+LOCAL_RETRIEVAL_MIN_SCORE = float(os.environ.get('LOCAL_RETRIEVAL_MIN_SCORE', '0.3'))
+RETRIEVAL_TOP_K = int(os.environ.get('RETRIEVAL_TOP_K', '4'))
+
+
+def load_knowledge_index() -> Optional[KnowledgeIndex]:
+    """Open the local knowledge index packaged with the runtime (None if it was not built)"""
+    try:
+        index = KnowledgeIndex.load(KNOWLEDGE_INDEX_DIR)
+        logger.info(f"Loaded local knowledge index: {len(index)} chunks")
+        return index
+    except FileNotFoundError:
+        logger.info(f"No local knowledge index at {KNOWLEDGE_INDEX_DIR}; using the remote knowledge base only")
+        return None
+
+
+knowledge_index = load_knowledge_index()
+
+
+def load_game_data() -> Optional[GameData]:
+    """Load the item/rune/summoner spell lookups packaged with the runtime (None if they were not built)"""
+    try:
+        game_data = GameData.load(os.path.join(KNOWLEDGE_INDEX_DIR, GAME_DATA_FILE))
+        logger.info(f"Loaded game data for patch {game_data.version}: {len(game_data.items)} items")
+        return game_data
+    except FileNotFoundError:
+        logger.info(f"No game data in {KNOWLEDGE_INDEX_DIR}; item and rune IDs stay unresolved")
+        return None
+
+
+game_data = load_game_data()
+
+
+def get_participant_loadout(participant: Dict[str, Any]) -> Dict[str, Any]:
+    """Items, summoner spells and runes of a match participant, shaped like extract_player_stats()"""
+    styles = participant.get('perks', {}).get('styles', [])
+    return {
+        'items': [participant.get(f'item{slot}', 0) for slot in range(7)],
+        'summoner1Id': participant.get('summoner1Id'),
+        'summoner2Id': participant.get('summoner2Id'),
+        'perks': {
+            'primaryStyle': styles[0]['style'] if styles else None,
+            'subStyle': styles[1]['style'] if len(styles) > 1 else None,
+            'primaryPerk': styles[0]['selections'][0]['perk'] if styles and styles[0].get('selections') else None
+        }
+    }
+
+
+def find_participant(match_data: Dict[str, Any], puuid: Optional[str], champion_name: str = '') -> Optional[Dict[str, Any]]:
+    """The summoner's participant entry of a match (by PUUID, else by champion)"""
+    participants = match_data.get('info', {}).get('participants', [])
+    for participant in participants:
+        if puuid and participant.get('puuid') == puuid:
+            return participant
+    for participant in participants:
+        if champion_name and participant.get('championName') == champion_name:
+            return participant
+    return None
+
+
 # Initialize Strands Agent with system prompt
 system_prompt = """
 당신은 리그오브레전드 전문 분석가입니다. 사용자의 매치 데이터와 챔피언 숙련도를 분석하여 개인화된 조언을 제공합니다.
@@ -132,6 +202,8 @@ class LoLAnalysisAgent:
 - 공격력: {attack}, 방어력: {defense}, 마법력: {magic}
 """
         
+        context_prompt += self._format_references(self._retrieve_knowledge(f"{champion_name} {user_input}"))
+        
         context_prompt += """
 지식 베이스의 챔피언 가이드를 참조하여 빌드, 스킬 순서, 플레이 팁을 포함한 상세한 조언을 제공해주세요.
 """
@@ -169,6 +241,8 @@ class LoLAnalysisAgent:
 상세 매치 데이터가 로드되었습니다. 게임 시간, 딜량, 골드 등의 정보를 포함하여 분석해주세요.
 """
         
+        context_prompt += self._format_loadout(metadata, match_data, summoner_name, champion_name)
+        
         context_prompt += """
 
 위 데이터를 바탕으로 게임 모드에 맞는 상세한 성과 분석과 개선점을 제공해주세요.
@@ -200,6 +274,7 @@ class LoLAnalysisAgent:
 
 최근 {len(recent_matches)}게임의 데이터가 로드되었습니다.
 """
+            context_prompt += self._format_frequent_items(recent_matches, summoner_name)
         
         if mastery_data:
             context_prompt += """
@@ -219,10 +294,99 @@ class LoLAnalysisAgent:
 리그오브레전드 일반 질문:
 
 사용자 질문: {user_input}
-
+{self._format_references(self._retrieve_knowledge(user_input))}
 지식 베이스를 활용하여 도움이 되는 답변을 제공해주세요.
 """
 
+    def _retrieve_knowledge(self, query: str) -> List[str]:
+        """Reference passages for a question: the local index first, the remote knowledge base if it has no good match"""
+        if knowledge_index is not None:
+            results = knowledge_index.search(query, RETRIEVAL_TOP_K, min_score=LOCAL_RETRIEVAL_MIN_SCORE)
+            if results:
+                logger.info(f"Local knowledge index matched {len(results)} chunks (best {results[0]['score']:.2f})")
+                return [result['text'] for result in results]
+        
+        if not KNOWLEDGE_BASE_ID:
+            return []
+        
+        try:
+            response = bedrock_agent_runtime.retrieve(
+                knowledgeBaseId=KNOWLEDGE_BASE_ID,
+                retrievalQuery={'text': query},
+                retrievalConfiguration={'vectorSearchConfiguration': {'numberOfResults': RETRIEVAL_TOP_K}}
+            )
+            return [result['content']['text'] for result in response.get('retrievalResults', [])]
+        except Exception as e:
+            logger.warning(f"Could not retrieve from knowledge base: {str(e)}")
+            return []
+
+    def _format_references(self, passages: List[str]) -> str:
+        """Reference passages as a prompt section (empty without passages)"""
+        if not passages:
+            return ""
+        return "\n참고 자료:\n" + "\n---\n".join(passages) + "\n"
+
+    def _format_loadout(self, metadata: Dict[str, Any], match_data: Optional[Dict[str, Any]],
+                        summoner_name: str, champion_name: str) -> str:
+        """The player's items, summoner spells and runes by name (from stats in the metadata or the match)"""
+        if game_data is None:
+            return ""
+        
+        if 'items' in metadata:
+            stats = metadata
+        elif match_data:
+            participant = find_participant(match_data, self._resolve_puuid(summoner_name), champion_name)
+            if not participant:
+                return ""
+            stats = get_participant_loadout(participant)
+        else:
+            return ""
+        
+        loadout = game_data.describe_loadout(stats)
+        build = game_data.evaluate_build(stats.get('items', []))
+        context_prompt = f"""
+빌드 정보 (패치 {game_data.version} 기준):
+- 아이템: {', '.join(loadout['items']) or '없음'} (총 {loadout['itemGold']} 골드)
+- 능력치 골드 가치: {build['statGold']} 골드 (골드 효율 {build['goldEfficiency'] * 100:.0f}%)
+- 소환사 주문: {', '.join(loadout['summonerSpells'])}
+- 룬: {', '.join(loadout['runes'])}
+"""
+        if build['components']:
+            context_prompt += f"- 완성하지 못한 재료 아이템: {', '.join(game_data.item_name(item_id) for item_id in build['components'])}\n"
+        return context_prompt
+
+    def _format_frequent_items(self, matches: List[Dict[str, Any]], summoner_name: str) -> str:
+        """The items the player finished most often across matches, by name"""
+        if game_data is None:
+            return ""
+        
+        puuid = self._resolve_puuid(summoner_name)
+        counts = {}
+        for match_data in matches:
+            participant = find_participant(match_data, puuid)
+            if not participant:
+                continue
+            for item_id in get_participant_loadout(participant)['items']:
+                item = game_data.get_item(item_id)
+                # Completed items only: components and consumables say little about a build
+                if item and not item['into'] and item['cost'] >= 1000:
+                    counts[item_id] = counts.get(item_id, 0) + 1
+        
+        if not counts:
+            return ""
+        frequent = sorted(counts.items(), key=lambda entry: entry[1], reverse=True)[:5]
+        return "자주 구매한 아이템: " + ', '.join(
+            f"{game_data.item_name(item_id)} ({count}회)" for item_id, count in frequent
+        ) + "\n"
+
+    def _resolve_puuid(self, summoner_name: str) -> Optional[str]:
+        """PUUID of a collected summoner (None if unknown or the lookup fails)"""
+        try:
+            return resolve_puuid(s3_client, DATA_BUCKET, summoner_name)
+        except Exception as e:
+            logger.warning(f"Could not resolve {summoner_name}: {str(e)}")
+            return None
+
     def _generate_response(self, prompt: str) -> str:
         """Generate response using Strands Agent"""
         try:
@@ -238,38 +402,42 @@ class LoLAnalysisAgent:
             return f"응답 생성 중 오류가 발생했습니다: {str(e)}"
 
     def _load_match_data(self, summoner_name: str, match_id: str) -> Optional[Dict[str, Any]]:
-        """Load match data from S3"""
+        """Load match data from the global match store"""
+        key = get_match_key(match_id)
         try:
-            safe_summoner = summoner_name.replace(' ', '_').replace('#', '%23')
-            key = f"match-history/{safe_summoner}/full/{match_id}.json"
-            
             response = s3_client.get_object(Bucket=DATA_BUCKET, Key=key)
-            return json.loads(response['Body'].read().decode('utf-8'))
-            
+            return decode_document(response['Body'].read())
         except Exception as e:
-            logger.warning(f"Could not load match data: {str(e)}")
+            logger.warning(f"Could not load match data from {key}: {str(e)}")
             return None
 
     def _load_recent_matches(self, summoner_name: str, count: int) -> List[Dict[str, Any]]:
-        """Load recent matches from S3"""
+        """Load recent matches from S3 via the summoner's match index"""
         try:
-            safe_summoner = summoner_name.replace(' ', '_').replace('#', '%23')
-            prefix = f"match-history/{safe_summoner}/full/"
+            puuid = resolve_puuid(s3_client, DATA_BUCKET, summoner_name)
+            if not puuid:
+                logger.info(f"No collected data for {summoner_name}")
+                return []
             
-            response = s3_client.list_objects_v2(
-                Bucket=DATA_BUCKET,
-                Prefix=prefix,
-                MaxKeys=count
+            index_response = s3_client.get_object(Bucket=DATA_BUCKET, Key=get_match_index_key(puuid))
+            index = json.loads(index_response['Body'].read().decode('utf-8'))
+            # Match IDs grow over time on a platform, so the highest are the most recent
+            match_refs = index.get('matches', {})
+            recent_ids = sorted(
+                match_refs,
+                key=lambda match_id: int(match_id.rsplit('_', 1)[-1]) if match_id.rsplit('_', 1)[-1].isdigit() else 0,
+                reverse=True
             )
             
             matches = []
-            for obj in response.get('Contents', [])[:count]:
+            for match_id in recent_ids[:count]:
+                key = match_refs[match_id]
                 try:
-                    match_response = s3_client.get_object(Bucket=DATA_BUCKET, Key=obj['Key'])
-                    match_data = json.loads(match_response['Body'].read().decode('utf-8'))
+                    match_response = s3_client.get_object(Bucket=DATA_BUCKET, Key=key)
+                    match_data = decode_document(match_response['Body'].read())
                     matches.append(match_data)
                 except Exception as e:
-                    logger.warning(f"Could not load match from {obj['Key']}: {str(e)}")
+                    logger.warning(f"Could not load match from {key}: {str(e)}")
                     continue
             
             return matches
@@ -279,23 +447,14 @@ class LoLAnalysisAgent:
             return []
 
     def _load_mastery_data(self, summoner_name: str) -> Optional[Dict[str, Any]]:
-        """Load mastery data from S3"""
+        """Load the latest mastery document from S3"""
         try:
-            safe_summoner = summoner_name.replace(' ', '_').replace('#', '%23')
-            prefix = f"mastery-data/{safe_summoner}/"
-            
-            response = s3_client.list_objects_v2(
-                Bucket=DATA_BUCKET,
-                Prefix=prefix,
-                MaxKeys=1
-            )
-            
-            if not response.get('Contents'):
+            puuid = resolve_puuid(s3_client, DATA_BUCKET, summoner_name)
+            if not puuid:
                 return None
             
-            latest_key = response['Contents'][0]['Key']
-            mastery_response = s3_client.get_object(Bucket=DATA_BUCKET, Key=latest_key)
-            return json.loads(mastery_response['Body'].read().decode('utf-8'))
+            mastery_response = s3_client.get_object(Bucket=DATA_BUCKET, Key=get_mastery_key(puuid))
+            return decode_document(mastery_response['Body'].read())
             
         except Exception as e:
             logger.warning(f"Could not load mastery data: {str(e)}")
@@ -0,0 +1,161 @@
+"""
+Item, rune and summoner spell lookups from Data Dragon.
+
+Match data only carries numeric IDs (items, summoner1Id/summoner2Id, perk and style IDs).
+build_game_data_index.py reduces one patch's item.json, runesReforged.json and summoner.json
+to a compact JSON document (game_data.json) with names in every language, costs, stats and
+the item build tree with its precomputed metrics (item_graph.py: component closure, recipe
+depth, stat gold value, gold efficiency). The agent loads it at startup and resolves IDs
+in-process, so match digests and prompts name and evaluate what a player built without a
+retrieval call.
+"""
+
+import os
+import json
+
+GAME_DATA_FILE = 'game_data.json'
+
+LANGUAGES = ['en_US', 'ko_KR']
+
+
+def build_game_data(version, data_dir, languages=LANGUAGES, item_metrics=None):
+    """
+    Lookup document for one patch from {data_dir}/{language}/item.json, runesReforged.json
+    and summoner.json. Language-independent fields are taken from the first language;
+    item_metrics ({item_id: metrics} from item_graph.build_item_graph) are merged into the items.
+    """
+    item_metrics = item_metrics or {}
+    items = {}
+    runes = {}
+    rune_styles = {}
+    summoner_spells = {}
+
+    for language in languages:
+        language_dir = os.path.join(data_dir, language)
+
+        with open(os.path.join(language_dir, 'item.json'), 'r', encoding='utf-8') as f:
+            for item_id, item in json.load(f)['data'].items():
+                entry = items.setdefault(item_id, {
+                    'name': {},
+                    'cost': item.get('gold', {}).get('total', 0),
+                    'sell': item.get('gold', {}).get('sell', 0),
+                    'purchasable': item.get('gold', {}).get('purchasable', False),
+                    'stats': {stat: value for stat, value in item.get('stats', {}).items() if value},
+                    'tags': item.get('tags', []),
+                    'from': item.get('from', []),
+                    'into': item.get('into', []),
+                    **item_metrics.get(item_id, {})
+                })
+                entry['name'][language] = item['name']
+
+        with open(os.path.join(language_dir, 'runesReforged.json'), 'r', encoding='utf-8') as f:
+            for style in json.load(f):
+                rune_styles.setdefault(str(style['id']), {'name': {}})['name'][language] = style['name']
+                for slot_index, slot in enumerate(style.get('slots', [])):
+                    for rune in slot.get('runes', []):
+                        entry = runes.setdefault(str(rune['id']), {'name': {}, 'style': style['id'], 'slot': slot_index})
+                        entry['name'][language] = rune['name']
+
+        with open(os.path.join(language_dir, 'summoner.json'), 'r', encoding='utf-8') as f:
+            for spell in json.load(f)['data'].values():
+                entry = summoner_spells.setdefault(spell['key'], {
+                    'name': {},
+                    'cooldown': spell.get('cooldownBurn', ''),
+                    'modes': spell.get('modes', [])
+                })
+                entry['name'][language] = spell['name']
+
+    return {
+        'version': version,
+        'items': items,
+        'runes': runes,
+        'runeStyles': rune_styles,
+        'summonerSpells': summoner_spells
+    }
+
+
+def save_game_data(path, game_data):
+    """Write the lookup document as compact JSON"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(game_data, f, ensure_ascii=False, separators=(',', ':'))
+
+
+class GameData:
+    """ID lookups over a game data document (names fall back to English, then to the ID)"""
+
+    def __init__(self, game_data):
+        self.version = game_data.get('version')
+        self.items = game_data.get('items', {})
+        self.runes = game_data.get('runes', {})
+        self.rune_styles = game_data.get('runeStyles', {})
+        self.summoner_spells = game_data.get('summonerSpells', {})
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _name(entries, entry_id, language):
+        entry = entries.get(str(entry_id))
+        if not entry:
+            return str(entry_id)
+        return entry['name'].get(language) or entry['name'].get('en_US') or str(entry_id)
+
+    def get_item(self, item_id):
+        return self.items.get(str(item_id))
+
+    def item_name(self, item_id, language='ko_KR'):
+        return self._name(self.items, item_id, language)
+
+    def rune_name(self, rune_id, language='ko_KR'):
+        """Name of a keystone/rune or a rune style (path)"""
+        if str(rune_id) in self.rune_styles:
+            return self._name(self.rune_styles, rune_id, language)
+        return self._name(self.runes, rune_id, language)
+
+    def summoner_spell_name(self, spell_id, language='ko_KR'):
+        return self._name(self.summoner_spells, spell_id, language)
+
+    def get_build_path(self, item_id, language='ko_KR'):
+        """Names of the components an item is built from"""
+        item = self.get_item(item_id)
+        return [self.item_name(component, language) for component in item['from']] if item else []
+
+    def evaluate_build(self, item_ids):
+        """
+        Gold efficiency of an inventory: {'cost', 'statGold', 'goldEfficiency', 'completed', 'components'}
+        where completed are finished items and components are parts still waiting to be built into one
+        """
+        items = [(str(item_id), self.get_item(item_id)) for item_id in item_ids if item_id]
+        items = [(item_id, item) for item_id, item in items if item]
+        cost = sum(item.get('totalCost', item['cost']) for _, item in items)
+        stat_gold = sum(item.get('statGold', 0) for _, item in items)
+        return {
+            'cost': cost,
+            'statGold': stat_gold,
+            'goldEfficiency': round(stat_gold / cost, 3) if cost else 0.0,
+            'completed': [item_id for item_id, item in items if item.get('depth', 0) > 0 and not item['into']],
+            'components': [item_id for item_id, item in items if item['into']]
+        }
+
+    def describe_loadout(self, stats, language='ko_KR'):
+        """
+        Readable loadout of a player from extract_player_stats() fields
+        (items, summoner1Id/summoner2Id, perks): {'items', 'itemGold', 'summonerSpells', 'runes'}
+        """
+        item_ids = [item_id for item_id in stats.get('items', []) if item_id]
+        perks = stats.get('perks', {})
+        return {
+            'items': [self.item_name(item_id, language) for item_id in item_ids],
+            'itemGold': sum((self.get_item(item_id) or {}).get('cost', 0) for item_id in item_ids),
+            'summonerSpells': [
+                self.summoner_spell_name(stats[key], language)
+                for key in ('summoner1Id', 'summoner2Id') if stats.get(key)
+            ],
+            'runes': [
+                self.rune_name(perks[key], language)
+                for key in ('primaryPerk', 'primaryStyle', 'subStyle') if perks.get(key)
+            ]
+        }
@@ -0,0 +1,223 @@
+"""
+Local retrieval over the generated knowledge base.
+
+build_knowledge_index.py splits the gameplay_knowledge_base/ markdown into chunks, embeds
+every chunk and saves the unit-length vectors as a NumPy matrix (vectors.npy) next to the
+chunk texts and metadata (chunks.json). The agent memory-maps the matrix and answers
+lookups with a top-k cosine search, so most questions need no round trip to the remote
+Bedrock knowledge base.
+
+Embedders are pluggable (EMBEDDERS). The default 'hashing' embedder is deterministic and
+needs no service: words and character trigrams are feature-hashed into a fixed number of
+dimensions, so an index can be built and queried offline and in tests. 'titan' uses Bedrock
+Titan text embeddings. An index records its embedder and queries are embedded the same way.
+"""
+
+import os
+import re
+import json
+import hashlib
+
+import numpy as np
+
+VECTORS_FILE = 'vectors.npy'
+CHUNKS_FILE = 'chunks.json'
+
+DEFAULT_EMBEDDER = 'hashing'
+HASHING_DIMENSIONS = 1024
+
+# Chunks are cut at markdown headings and packed up to this size
+CHUNK_MAX_CHARS = 1500
+
+# Latin letters, digits and Hangul syllables
+WORD_PATTERN = re.compile(r'[0-9a-z가-힣]+')
+HEADING_PATTERN = re.compile(r'^(#{1,6}) ')
+
+
+def normalize_rows(matrix):
+    """Scale every row to unit length (zero rows stay zero) so dot products are cosines"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+class HashingEmbedder:
+    """Deterministic feature-hashing embedder (words and character trigrams, signed buckets)"""
+
+    name = 'hashing'
+
+    def __init__(self, dimensions=HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    @staticmethod
+    def get_features(text):
+        """Words plus the character trigrams of each word (partial and Korean inflected matches)"""
+        features = []
+        for word in WORD_PATTERN.findall(text.lower()):
+            features.append(word)
+            padded = f"<{word}>"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts):
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self.get_features(text):
+                digest = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+                matrix[row, digest % self.dimensions] += 1.0 if digest >> 63 else -1.0
+        return normalize_rows(matrix)
+
+
+class TitanEmbedder:
+    """Bedrock Titan text embeddings (one request per text)"""
+
+    name = 'titan'
+
+    def __init__(self, dimensions=1024, model_id=None):
+        import boto3
+        self.dimensions = dimensions
+        self.model_id = model_id or os.getenv('TITAN_EMBEDDING_MODEL_ID', 'amazon.titan-embed-text-v2:0')
+        self.client = boto3.client('bedrock-runtime')
+
+    def embed(self, texts):
+        vectors = []
+        for text in texts:
+            response = self.client.invoke_model(
+                modelId=self.model_id,
+                body=json.dumps({'inputText': text, 'dimensions': self.dimensions, 'normalize': True})
+            )
+            vectors.append(json.loads(response['body'].read())['embedding'])
+        return normalize_rows(np.array(vectors, dtype=np.float32).reshape(len(texts), self.dimensions))
+
+
+EMBEDDERS = {
+    HashingEmbedder.name: HashingEmbedder,
+    TitanEmbedder.name: TitanEmbedder
+}
+
+
+def get_embedder(name=DEFAULT_EMBEDDER, **options):
+    """Create a registered embedder by name"""
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder '{name}' (available: {', '.join(EMBEDDERS)})")
+    return EMBEDDERS[name](**options)
+
+
+def chunk_markdown(text, max_chars=CHUNK_MAX_CHARS):
+    """
+    Split a markdown document at its headings. Subsections are packed into their
+    section's chunk while it stays under max_chars; longer sections are split between
+    lines. Every chunk after the first starts with the document title for context.
+    """
+    sections = []
+    title = None
+    for line in text.splitlines(keepends=True):
+        heading = HEADING_PATTERN.match(line)
+        if heading and title is None and len(heading.group(1)) == 1:
+            title = line.strip()
+        if heading or not sections:
+            sections.append([len(heading.group(1)) if heading else 0, line])
+        else:
+            sections[-1][1] += line
+
+    chunks = []
+    current = ''
+    for level, section in sections:
+        # Top-level sections (# and ##) always start a new chunk
+        if current and (level <= 2 or len(current) + len(section) > max_chars):
+            chunks.append(current)
+            current = ''
+        while len(section) > max_chars:
+            split_at = section.rfind('\n', 0, max_chars) + 1 or max_chars
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(section[:split_at])
+            section = section[split_at:]
+        current += section
+    if current.strip():
+        chunks.append(current)
+
+    return [
+        chunk.strip() if not title or chunk.startswith(title) else f"{title}\n{chunk.strip()}"
+        for chunk in chunks if chunk.strip()
+    ]
+
+
+def build_index(documents, embedder, batch_size=64):
+    """
+    Chunk and embed documents ([(source, markdown, metadata)]).
+    Returns (vectors, chunks) with one {'text', 'source', 'metadata'} per vector row.
+    """
+    chunks = [
+        {'text': text, 'source': source, 'metadata': metadata}
+        for source, markdown, metadata in documents
+        for text in chunk_markdown(markdown)
+    ]
+    vectors = np.zeros((len(chunks), embedder.dimensions), dtype=np.float32)
+    for start in range(0, len(chunks), batch_size):
+        batch = [chunk['text'] for chunk in chunks[start:start + batch_size]]
+        vectors[start:start + len(batch)] = embedder.embed(batch)
+    return vectors, chunks
+
+
+def save_index(index_dir, vectors, chunks, embedder, **info):
+    """Write an index directory (vectors.npy + chunks.json with the embedder settings)"""
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, VECTORS_FILE), vectors)
+    with open(os.path.join(index_dir, CHUNKS_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            'embedder': embedder.name,
+            'dimensions': embedder.dimensions,
+            **info,
+            'chunks': chunks
+        }, f, ensure_ascii=False)
+
+
+def matches_filters(metadata, filters):
+    """Whether chunk metadata satisfies every filter (equality, or membership for list attributes)"""
+    for key, expected in filters.items():
+        value = metadata.get(key)
+        if value != expected and not (isinstance(value, list) and expected in value):
+            return False
+    return True
+
+
+class KnowledgeIndex:
+    """Chunk vectors (memory-mapped) and their texts, searched by cosine similarity"""
+
+    def __init__(self, vectors, chunks, embedder):
+        self.vectors = vectors
+        self.chunks = chunks
+        self.embedder = embedder
+
+    @classmethod
+    def load(cls, index_dir, embedder=None):
+        """Open an index directory; the embedder defaults to the one the index was built with"""
+        with open(os.path.join(index_dir, CHUNKS_FILE), 'r', encoding='utf-8') as f:
+            header = json.load(f)
+        vectors = np.load(os.path.join(index_dir, VECTORS_FILE), mmap_mode='r')
+        embedder = embedder or get_embedder(header['embedder'], dimensions=header['dimensions'])
+        return cls(vectors, header['chunks'], embedder)
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def search(self, query, top_k=5, filters=None, min_score=0.0):
+        """Top-k chunks for a query: [{'score', 'text', 'source', 'metadata'}], best first"""
+        if not len(self.chunks):
+            return []
+
+        scores = self.vectors @ self.embedder.embed([query])[0]
+        if filters:
+            mask = np.array([matches_filters(chunk['metadata'], filters) for chunk in self.chunks])
+            scores = np.where(mask, scores, -np.inf)
+
+        top_k = min(top_k, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {'score': float(scores[i]), **self.chunks[i]}
+            for i in top
+            if scores[i] >= min_score
+        ]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+HTML-to-markdown benchmark
+Compares the table-driven tag translators (html_to_markdown.py) with the str.replace/re.sub
+chains the converters used before, on every description in championFull.json and item.json
+"""
+
+import re
+import sys
+import json
+import time
+
+from convert_champion_to_markdown import DESCRIPTION_TAGS as CHAMPION_TAGS, get_available_versions
+from convert_items_to_markdown import DESCRIPTION_TAGS as ITEM_TAGS
+from html_to_markdown import translate
+
+ROUNDS = 20
+
+
+def legacy_clean_champion_text(text):
+    """The previous clean_html_tags of convert_champion_to_markdown.py"""
+    import re
+    if not text:
+        return text
+    text = text.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
+    text = text.replace('<b>', '**').replace('</b>', '**')
+    text = text.replace('<i>', '*').replace('</i>', '*')
+    text = re.sub(r'<font[^>]*>', '', text)
+    text = text.replace('</font>', '')
+    text = re.sub(r'<[^>]+>', '', text)
+    return text
+
+
+def legacy_clean_item_text(desc, language):
+    """The previous item description cleanup of convert_items_to_markdown.py"""
+    desc = desc.replace('<br>', '\n').replace('<br/>', '\n')
+    desc = desc.replace('<stats>', '').replace('</stats>', '')
+    desc = desc.replace('<unique>', '').replace('</unique>', '')
+    if language == 'ko_KR':
+        desc = desc.replace('<passive>', '패시브: ').replace('</passive>', '')
+        desc = desc.replace('<active>', '액티브: ').replace('</active>', '')
+    else:
+        desc = desc.replace('<passive>', 'Passive: ').replace('</passive>', '')
+        desc = desc.replace('<active>', 'Active: ').replace('</active>', '')
+    desc = re.sub(r'<[^>]+>', '', desc)
+    return desc
+
+
+def load_champion_texts(path):
+    """Passive, spell and tip text of every champion in championFull.json"""
+    with open(path, 'r', encoding='utf-8') as f:
+        champions = json.load(f)['data'].values()
+    texts = []
+    for champion in champions:
+        texts.append(champion['passive']['description'])
+        texts.extend(spell['description'] for spell in champion['spells'])
+    return texts
+
+
+def load_item_texts(path):
+    """Description of every item in item.json"""
+    with open(path, 'r', encoding='utf-8') as f:
+        items = json.load(f)['data'].values()
+    return [item['description'] for item in items if item.get('description')]
+
+
+def measure(clean, texts):
+    """Milliseconds per pass over all texts, and the outputs of the last pass"""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        outputs = [clean(text) for text in texts]
+    return (time.perf_counter() - start) * 1000 / ROUNDS, outputs
+
+
+def main():
+    """Main function to benchmark description cleanup"""
+    version = sys.argv[1] if len(sys.argv) > 1 else None
+    language = sys.argv[2] if len(sys.argv) > 2 else 'en_US'
+    if not version:
+        available_versions = get_available_versions()
+        if not available_versions:
+            print("Error: No patch version directories found")
+            sys.exit(1)
+        version = available_versions[0]
+
+    print("HTML-to-Markdown Benchmark")
+    print("=" * 40)
+    print(f"Version: {version} ({language}), {ROUNDS} rounds")
+
+    cases = [
+        ('championFull.json', load_champion_texts(f"{version}/data/{language}/championFull.json"),
+         legacy_clean_champion_text, lambda text: translate(CHAMPION_TAGS, text, language)),
+        ('item.json', load_item_texts(f"{version}/data/{language}/item.json"),
+         lambda text: legacy_clean_item_text(text, language), lambda text: translate(ITEM_TAGS, text, language))
+    ]
+
+    print(f"\n{'Source':<18} {'Texts':>6} {'Chain ms':>10} {'Table ms':>10} {'Speedup':>8} {'Differ':>7}")
+    for name, texts, legacy_clean, clean in cases:
+        legacy_ms, legacy_outputs = measure(legacy_clean, texts)
+        table_ms, outputs = measure(clean, texts)
+        differ = sum(1 for old, new in zip(legacy_outputs, outputs) if old != new)
+        print(f"{name:<18} {len(texts):>6} {legacy_ms:>10.2f} {table_ms:>10.2f} {legacy_ms / table_ms:>7.1f}x {differ:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Storage codec benchmark
+Compares stored size and decode time of match-v5 documents in the legacy format
+(indented JSON), compact JSON and gzip-compressed compact JSON (the default codec)
+"""
+
+import os
+import sys
+import json
+import time
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lambda'))
+
+from storage_codec import encode_document, decode_document
+
+BUCKET_NAME = 'rift-rewind-match-data-doyaji'
+DECODE_ROUNDS = 20
+
+
+def load_local_matches(directory, limit):
+    """Read match-v5 JSON files (legacy or codec format) from a local directory"""
+    matches = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.json'):
+            with open(os.path.join(directory, name), 'rb') as f:
+                matches.append(decode_document(f.read()))
+            if len(matches) >= limit:
+                break
+    return matches
+
+
+def load_s3_matches(prefix, limit):
+    """Read stored match documents from the match data bucket"""
+    s3_client = boto3.client('s3')
+    response = s3_client.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix, MaxKeys=limit)
+    matches = []
+    for obj in response.get('Contents', []):
+        body = s3_client.get_object(Bucket=BUCKET_NAME, Key=obj['Key'])['Body'].read()
+        matches.append(decode_document(body))
+    return matches
+
+
+def measure(bodies):
+    """Total size and average decode time (ms per document) of encoded bodies"""
+    total_size = sum(len(body) for body in bodies)
+    start = time.perf_counter()
+    for _ in range(DECODE_ROUNDS):
+        for body in bodies:
+            decode_document(body)
+    elapsed = time.perf_counter() - start
+    return total_size, elapsed * 1000 / (DECODE_ROUNDS * len(bodies))
+
+
+def main():
+    """Main function to benchmark storage formats"""
+    source = sys.argv[1] if len(sys.argv) > 1 else 's3:matches/'
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    if source.startswith('s3:'):
+        matches = load_s3_matches(source[len('s3:'):], limit)
+    else:
+        matches = load_local_matches(source, limit)
+
+    if not matches:
+        print(f"Error: no match documents found in {source}")
+        sys.exit(1)
+
+    formats = {
+        'legacy (indent=2)': [json.dumps(match, indent=2).encode('utf-8') for match in matches],
+        'compact json': [encode_document(match, codec='json')[0] for match in matches],
+        'gzip compact json': [encode_document(match, codec='gzip')[0] for match in matches]
+    }
+
+    print("Storage Codec Benchmark")
+    print("=" * 64)
+    print(f"Documents: {len(matches)} from {source}")
+    print(f"{'format':<20}{'total KB':>12}{'avg KB':>10}{'size':>8}{'decode ms':>12}")
+
+    baseline_size = sum(len(body) for body in formats['legacy (indent=2)'])
+    for name, bodies in formats.items():
+        total_size, decode_ms = measure(bodies)
+        print(f"{name:<20}{total_size / 1024:>12.1f}{total_size / 1024 / len(bodies):>10.1f}"
+              f"{total_size / baseline_size:>8.0%}{decode_ms:>12.3f}")
+
+    print("\nsize: relative to the legacy format; decode ms: per document, excluding S3 transfer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Game Data Index Build Script
+Reduces one patch's item.json, runesReforged.json and summoner.json (en_US and ko_KR) to the
+compact ID lookup document the agent loads at startup (see agentcore/game_data.py), with the
+item build-tree metrics of item_graph.py precomputed per item
+"""
+
+import os
+import sys
+import json
+import time
+
+# The lookups ship with the agent runtime
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'agentcore'))
+
+from game_data import GAME_DATA_FILE, build_game_data, save_game_data
+from convert_champion_to_markdown import get_available_versions
+from item_graph import build_item_graph
+
+# Packaged next to the local knowledge index
+INDEX_DIR = os.getenv('KNOWLEDGE_INDEX_DIR', 'knowledge_index')
+
+
+def main():
+    """Main function to build the game data index"""
+    version = sys.argv[1] if len(sys.argv) > 1 else None
+
+    print("Game Data Index Build")
+    print("=" * 40)
+
+    if not version:
+        available_versions = get_available_versions()
+        if not available_versions:
+            print("Error: No patch version directories found")
+            sys.exit(1)
+        version = available_versions[0]
+
+    data_dir = f"{version}/data"
+    if not os.path.isdir(data_dir):
+        print(f"Error: Data directory {data_dir} not found")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    with open(f"{data_dir}/en_US/item.json", 'r', encoding='utf-8') as f:
+        item_metrics = build_item_graph(json.load(f)['data'])
+    game_data = build_game_data(version, data_dir, item_metrics=item_metrics)
+    path = os.path.join(INDEX_DIR, GAME_DATA_FILE)
+    save_game_data(path, game_data)
+
+    print(f"Version: {version}")
+    print(f"✓ {len(game_data['items'])} items, {len(game_data['runes'])} runes, "
+          f"{len(game_data['summonerSpells'])} summoner spells in {time.perf_counter() - started:.2f}s")
+    print(f"✓ Saved {path} ({os.path.getsize(path) / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
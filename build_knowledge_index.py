@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Local Knowledge Index Build Script
+Chunks and embeds one patch of the generated gameplay_knowledge_base/ markdown into the
+local vector index the agent searches before the remote Bedrock knowledge base
+(see agentcore/local_retrieval.py). Run update_knowledge_base.py first
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+
+# The retrieval engine ships with the agent runtime
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'agentcore'))
+
+from local_retrieval import DEFAULT_EMBEDDER, EMBEDDERS, get_embedder, build_index, save_index
+
+KNOWLEDGE_BASE_DIR = 'gameplay_knowledge_base'
+INDEX_DIR = os.getenv('KNOWLEDGE_INDEX_DIR', 'knowledge_index')
+
+
+def get_built_versions():
+    """Patch versions with generated knowledge base documents, latest first"""
+    if not os.path.isdir(KNOWLEDGE_BASE_DIR):
+        return []
+    versions = [
+        name for name in os.listdir(KNOWLEDGE_BASE_DIR)
+        if os.path.isdir(os.path.join(KNOWLEDGE_BASE_DIR, name))
+        and len(name.split('.')) == 3 and all(part.isdigit() for part in name.split('.'))
+    ]
+    return sorted(versions, key=lambda version: [int(part) for part in version.split('.')], reverse=True)
+
+
+def load_documents(version):
+    """[(source, markdown, metadata)] for every document of a patch; metadata from sidecars when present"""
+    documents = []
+    version_dir = Path(KNOWLEDGE_BASE_DIR) / version
+    for path in sorted(version_dir.rglob('*.md')):
+        source = path.relative_to(KNOWLEDGE_BASE_DIR).as_posix()
+        sidecar = Path(f"{path}.metadata.json")
+        if sidecar.exists():
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)['metadataAttributes']
+        else:
+            # Korean documents are the *_ko files and folders
+            korean = any(part.endswith('_ko') for part in path.relative_to(version_dir).with_suffix('').parts)
+            metadata = {'patch': version, 'language': 'ko_KR' if korean else 'en_US'}
+        documents.append((source, path.read_text(encoding='utf-8'), metadata))
+    return documents
+
+
+def main():
+    """Main function to build the local knowledge index"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    embedder_name = next(
+        (arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--embedder=')),
+        os.getenv('KNOWLEDGE_INDEX_EMBEDDER', DEFAULT_EMBEDDER)
+    )
+
+    print("Local Knowledge Index Build")
+    print("=" * 40)
+
+    if embedder_name not in EMBEDDERS:
+        print(f"Error: embedder must be one of: {', '.join(EMBEDDERS)}")
+        sys.exit(1)
+
+    versions = get_built_versions()
+    if not versions:
+        print(f"Error: No generated knowledge base under {KNOWLEDGE_BASE_DIR}/ (run update_knowledge_base.py)")
+        sys.exit(1)
+
+    version = args[0] if args else versions[0]
+    if version not in versions:
+        print(f"Error: Version {version} has no generated knowledge base")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    documents = load_documents(version)
+    embedder = get_embedder(embedder_name)
+    vectors, chunks = build_index(documents, embedder)
+    save_index(INDEX_DIR, vectors, chunks, embedder, version=version)
+
+    print(f"Version: {version}, embedder: {embedder.name} ({embedder.dimensions} dimensions)")
+    print(f"✓ Indexed {len(documents)} documents as {len(chunks)} chunks in {time.perf_counter() - started:.2f}s")
+    print(f"✓ Saved {INDEX_DIR}/ ({vectors.nbytes / 1024 / 1024:.1f} MB of vectors)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Sprite Atlas Build Script
+Packs each image family of a patch (champion, item, spell and passive icons by default) into
+sprite sheets with a JSON coordinate map, so pages that show dozens of icons load a few
+sheets instead of one PNG per icon. Run before upload_champion_data_to_s3.py, which
+publishes {version}/img/atlas/ with the other images; the champion API adds the sprite
+coordinates next to each image URL
+
+Sheet file names carry a content hash, so they can be cached as immutable like every other
+version-prefixed image while atlas.json always points at the current sheets
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+from io import BytesIO
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from convert_champion_to_markdown import get_available_versions
+
+ATLAS_DIR = 'img/atlas'
+ATLAS_FILE = 'atlas.json'
+
+DEFAULT_FAMILIES = ['champion', 'item', 'spell', 'passive']
+
+# Icons per sheet row and rows per sheet; larger families continue on further sheets
+SHEET_COLUMNS = 16
+SHEET_ROWS = 16
+
+WEBP_QUALITY = 90
+
+ICON_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def get_atlas_options(args):
+    """Options from --families=a,b, --size=N (tile edge in pixels) and --webp"""
+    options = {'families': DEFAULT_FAMILIES, 'size': None, 'webp': '--webp' in args}
+    for arg in args:
+        name, _, value = arg[2:].partition('=')
+        if name == 'families' and value:
+            options['families'] = [family.strip() for family in value.split(',') if family.strip()]
+        elif name == 'size' and value:
+            options['size'] = int(value)
+    return options
+
+
+def load_icons(img_dir, size=None):
+    """[(file name, RGBA image)] of a family directory, resized to size x size when given"""
+    icons = []
+    for file_name in sorted(os.listdir(img_dir)):
+        if not file_name.lower().endswith(ICON_EXTENSIONS):
+            continue
+        with Image.open(os.path.join(img_dir, file_name)) as image:
+            image = image.convert('RGBA')
+            if size and image.size != (size, size):
+                image = image.resize((size, size), Image.LANCZOS)
+            icons.append((file_name, image))
+    return icons
+
+
+def encode_sheet(sheet, image_format):
+    """Encoded sheet bytes (PNG or WebP)"""
+    buffer = BytesIO()
+    if image_format == 'webp':
+        sheet.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=6)
+    else:
+        sheet.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def write_sheet(output_dir, name, data, extension):
+    """Write a sheet under a content-hashed name and return that name"""
+    file_name = f"{name}.{hashlib.sha256(data).hexdigest()[:10]}.{extension}"
+    with open(os.path.join(output_dir, file_name), 'wb') as f:
+        f.write(data)
+    return file_name
+
+
+def pack_family(family, icons, output_dir, webp=False):
+    """
+    Pack icons on a grid of tiles (the largest icon's size), SHEET_COLUMNS x SHEET_ROWS per sheet.
+    Returns the family's coordinate map:
+    {'tile': [w, h], 'sheets': [{'png', 'webp'?, 'width', 'height'}], 'icons': {file: [sheet, x, y, w, h]}}
+    """
+    tile_width = max(image.width for _, image in icons)
+    tile_height = max(image.height for _, image in icons)
+    per_sheet = SHEET_COLUMNS * SHEET_ROWS
+
+    sheets = []
+    coordinates = {}
+    for sheet_index, start in enumerate(range(0, len(icons), per_sheet)):
+        batch = icons[start:start + per_sheet]
+        columns = min(SHEET_COLUMNS, len(batch))
+        rows = (len(batch) + SHEET_COLUMNS - 1) // SHEET_COLUMNS
+        sheet = Image.new('RGBA', (columns * tile_width, rows * tile_height), (0, 0, 0, 0))
+
+        for position, (file_name, image) in enumerate(batch):
+            x = (position % SHEET_COLUMNS) * tile_width
+            y = (position // SHEET_COLUMNS) * tile_height
+            sheet.paste(image, (x, y))
+            coordinates[file_name] = [sheet_index, x, y, image.width, image.height]
+
+        name = f"{family}-{sheet_index}"
+        entry = {
+            'png': write_sheet(output_dir, name, encode_sheet(sheet, 'png'), 'png'),
+            'width': sheet.width,
+            'height': sheet.height
+        }
+        if webp:
+            entry['webp'] = write_sheet(output_dir, name, encode_sheet(sheet, 'webp'), 'webp')
+        sheets.append(entry)
+
+    return {'tile': [tile_width, tile_height], 'sheets': sheets, 'icons': coordinates}
+
+
+def get_directory_size(path, names):
+    """Total size of the named files in a directory"""
+    return sum(os.path.getsize(os.path.join(path, name)) for name in names)
+
+
+def main():
+    """Main function to build sprite atlases"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = get_atlas_options([arg for arg in sys.argv[1:] if arg.startswith('--')])
+
+    print("Sprite Atlas Build")
+    print("=" * 40)
+
+    if Image is None:
+        print("Error: Pillow is required to build sprite atlases (pip install Pillow)")
+        sys.exit(1)
+
+    version = args[0] if args else None
+    if not version:
+        available_versions = get_available_versions()
+        if not available_versions:
+            print("Error: No patch version directories found")
+            sys.exit(1)
+        version = available_versions[0]
+
+    output_dir = f"{version}/{ATLAS_DIR}"
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Sheets of a previous build are replaced (their hashed names would otherwise pile up)
+    for file_name in os.listdir(output_dir):
+        os.remove(os.path.join(output_dir, file_name))
+
+    tiles = f", {options['size']}px tiles" if options['size'] else ''
+    print(f"Version: {version}, families: {', '.join(options['families'])}{tiles}{', with WebP' if options['webp'] else ''}")
+
+    atlas = {'version': version, 'families': {}}
+    started = time.perf_counter()
+
+    for family in options['families']:
+        img_dir = f"{version}/img/{family}"
+        if not os.path.isdir(img_dir):
+            print(f"⚠ {img_dir} not found, skipping")
+            continue
+
+        icons = load_icons(img_dir, options['size'])
+        if not icons:
+            print(f"⚠ No images in {img_dir}, skipping")
+            continue
+
+        family_atlas = pack_family(family, icons, output_dir, options['webp'])
+        atlas['families'][family] = family_atlas
+
+        icon_bytes = get_directory_size(img_dir, [file_name for file_name, _ in icons])
+        sheet_bytes = get_directory_size(output_dir, [sheet['png'] for sheet in family_atlas['sheets']])
+        print(f"✓ {family}: {len(icons)} icons -> {len(family_atlas['sheets'])} sheet(s), "
+              f"{icon_bytes / 1024:.0f} KB -> {sheet_bytes / 1024:.0f} KB PNG")
+
+    with open(os.path.join(output_dir, ATLAS_FILE), 'w', encoding='utf-8') as f:
+        json.dump(atlas, f, separators=(',', ':'))
+
+    print(f"✓ Saved {output_dir}/{ATLAS_FILE} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,17 @@ import os
 import sys
 from pathlib import Path
 
+from html_to_markdown import LINE_BREAKS, build_translators, translate
+
+# Bump when the generated markdown changes; update_knowledge_base.py rebuilds outputs of older versions
+CONVERTER_VERSION = 1
+
+# Bold and italics become markdown; font colors and other tags are dropped
+DESCRIPTION_TAGS = build_translators({**LINE_BREAKS, '<b>': '**', '</b>': '**', '<i>': '*', '</i>': '*'})
+
 def clean_html_tags(text):
     """Clean HTML tags and convert to markdown formatting"""
-    import re
-    if not text:
-        return text
-    
-    # Convert common HTML tags to markdown
-    text = text.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
-    text = text.replace('<b>', '**').replace('</b>', '**')
-    text = text.replace('<i>', '*').replace('</i>', '*')
-    
-    # Remove font color tags but keep the content
-    text = re.sub(r'<font[^>]*>', '', text)
-    text = text.replace('</font>', '')
-    
-    # Remove other HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
-    
-    return text
+    return translate(DESCRIPTION_TAGS, text)
 
 def convert_champion_to_markdown(champion_data, language='en_US'):
     """
@@ -156,6 +148,24 @@ def convert_champion_to_markdown(champion_data, language='en_US'):
     return ''.join(md)
 
 
+def build_champion_documents(champion_data, language='en_US', version=None):
+    """The champion's standalone document: [(file name, markdown, metadata attributes)]"""
+    champion_name = list(champion_data['data'].keys())[0]
+    champion = champion_data['data'][champion_name]
+    metadata = {
+        'patch': version,
+        'language': language,
+        'type': 'champion',
+        'id': champion['id'],
+        'name': champion['name'],
+        'championClass': champion['tags'],
+        'resourceType': champion['partype'],
+        'difficulty': champion['info']['difficulty'],
+        'attackRange': champion['stats']['attackrange']
+    }
+    return [(champion_name, convert_champion_to_markdown(champion_data, language), metadata)]
+
+
 def process_champion_file(input_path, output_dir, language='en_US'):
     """Process a single champion JSON file"""
     with open(input_path, 'r', encoding='utf-8') as f:
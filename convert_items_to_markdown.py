@@ -2,6 +2,168 @@ import json
 import os
 import sys
 
+from html_to_markdown import LINE_BREAKS, build_translators, translate
+from item_graph import build_item_graph
+
+# Bump when the generated markdown changes; update_knowledge_base.py rebuilds outputs of older versions
+CONVERTER_VERSION = 3
+
+# Passive/active labels are localized; stat, unique and other tags are dropped
+DESCRIPTION_TAGS = build_translators(LINE_BREAKS, {
+    'en_US': {'<passive>': 'Passive: ', '<active>': 'Active: '},
+    'ko_KR': {'<passive>': '패시브: ', '<active>': '액티브: '}
+})
+
+def is_listed_item(item):
+    """Whether an item belongs in the knowledge base (purchasable and not hidden)"""
+    return item.get('gold', {}).get('purchasable', False) and not item.get('hideFromAll', False)
+
+def convert_item_to_markdown(item_id, item, language='en_US', heading='##', metrics=None):
+    """
+    Convert a single item to a markdown section (heading '#' for a standalone document).
+    metrics is the item's entry of item_graph.build_item_graph() for the derived numbers
+    """
+    md = []
+    
+    md.append(f"{heading} {item['name']}\n")
+    
+    if language == 'ko_KR':
+        md.append(f"**아이템 ID:** {item_id}\n")
+    else:
+        md.append(f"**Item ID:** {item_id}\n")
+    
+    # Cost information
+    gold = item.get('gold', {})
+    if gold.get('total', 0) > 0:
+        if language == 'ko_KR':
+            md.append(f"**가격:** {gold['total']} 골드")
+            if gold.get('base', 0) != gold.get('total', 0):
+                md.append(f" (기본: {gold['base']} 골드)")
+            md.append(f"\n**판매가:** {gold.get('sell', 0)} 골드\n")
+        else:
+            md.append(f"**Cost:** {gold['total']} gold")
+            if gold.get('base', 0) != gold.get('total', 0):
+                md.append(f" (Base: {gold['base']} gold)")
+            md.append(f"\n**Sell Value:** {gold.get('sell', 0)} gold\n")
+    
+    # Description and plaintext
+    if item.get('plaintext'):
+        if language == 'ko_KR':
+            md.append(f"**요약:** {item['plaintext']}\n")
+        else:
+            md.append(f"**Summary:** {item['plaintext']}\n")
+    
+    # Stats
+    stats = item.get('stats', {})
+    if stats:
+        if language == 'ko_KR':
+            md.append("**능력치:**\n")
+            stat_names = {
+                'FlatHPPoolMod': '체력',
+                'FlatMPPoolMod': '마나', 
+                'FlatArmorMod': '방어력',
+                'FlatSpellBlockMod': '마법 저항력',
+                'FlatPhysicalDamageMod': '공격력',
+                'FlatMagicDamageMod': '주문력',
+                'PercentAttackSpeedMod': '공격 속도',
+                'FlatMovementSpeedMod': '이동 속도',
+                'FlatCritChanceMod': '치명타 확률',
+                'PercentLifeStealMod': '생명력 흡수',
+                'FlatHPRegenMod': '체력 재생',
+                'PercentMovementSpeedMod': '이동 속도'
+            }
+        else:
+            md.append("**Stats:**\n")
+            stat_names = {
+                'FlatHPPoolMod': 'Health',
+                'FlatMPPoolMod': 'Mana', 
+                'FlatArmorMod': 'Armor',
+                'FlatSpellBlockMod': 'Magic Resist',
+                'FlatPhysicalDamageMod': 'Attack Damage',
+                'FlatMagicDamageMod': 'Ability Power',
+                'PercentAttackSpeedMod': 'Attack Speed',
+                'FlatMovementSpeedMod': 'Movement Speed',
+                'FlatCritChanceMod': 'Critical Strike Chance',
+                'PercentLifeStealMod': 'Life Steal',
+                'FlatHPRegenMod': 'Health Regeneration',
+                'PercentMovementSpeedMod': 'Movement Speed'
+            }
+        
+        for stat_key, value in stats.items():
+            if value != 0 and stat_key in stat_names:
+                stat_name = stat_names[stat_key]
+                if 'Percent' in stat_key:
+                    md.append(f"- +{value*100:.0f}% {stat_name}\n")
+                else:
+                    md.append(f"- +{value} {stat_name}\n")
+    
+    # Item tags (categories)
+    if item.get('tags'):
+        if language == 'ko_KR':
+            md.append(f"**카테고리:** {', '.join(item['tags'])}\n")
+        else:
+            md.append(f"**Categories:** {', '.join(item['tags'])}\n")
+    
+    # Build path
+    if item.get('from'):
+        if language == 'ko_KR':
+            md.append(f"**조합 재료:** {', '.join(item['from'])}\n")
+        else:
+            md.append(f"**Builds From:** {', '.join(item['from'])}\n")
+    if item.get('into'):
+        if language == 'ko_KR':
+            md.append(f"**상위 아이템:** {', '.join(item['into'])}\n")
+        else:
+            md.append(f"**Builds Into:** {', '.join(item['into'])}\n")
+    
+    # Derived from the build tree: the full recipe when it is deeper than one level, and stat gold value
+    if metrics:
+        if len(metrics['components']) > len(set(item.get('from', []))):
+            if language == 'ko_KR':
+                md.append(f"**전체 재료:** {', '.join(metrics['components'])}\n")
+            else:
+                md.append(f"**All Components:** {', '.join(metrics['components'])}\n")
+        if metrics['statGold'] > 0:
+            if language == 'ko_KR':
+                md.append(f"**능력치 골드 가치:** {metrics['statGold']} 골드 (골드 효율 {metrics['goldEfficiency'] * 100:.0f}%)\n")
+            else:
+                md.append(f"**Stat Gold Value:** {metrics['statGold']} gold ({metrics['goldEfficiency'] * 100:.0f}% gold efficient)\n")
+    
+    # Description (passive/active effects)
+    if item.get('description'):
+        desc = translate(DESCRIPTION_TAGS, item['description'], language)
+        
+        if language == 'ko_KR':
+            md.append(f"**효과:** {desc}\n")
+        else:
+            md.append(f"**Effects:** {desc}\n")
+    
+    return ''.join(md)
+
+def build_item_documents(item_data, language='en_US', version=None):
+    """One standalone document per listed item: [(file name, markdown, metadata attributes)]"""
+    documents = []
+    graph = build_item_graph(item_data['data'])
+    for item_id, item in item_data['data'].items():
+        if not is_listed_item(item):
+            continue
+        metadata = {
+            'patch': version,
+            'language': language,
+            'type': 'item',
+            'id': item_id,
+            'name': item['name'],
+            'tags': item.get('tags', []),
+            'goldCost': item.get('gold', {}).get('total', 0),
+            'buildsFrom': item.get('from', []),
+            'buildsInto': item.get('into', []),
+            'recipeDepth': graph[item_id]['depth'],
+            'statGold': graph[item_id]['statGold'],
+            'goldEfficiency': graph[item_id]['goldEfficiency']
+        }
+        documents.append((item_id, convert_item_to_markdown(item_id, item, language, heading='#', metrics=graph[item_id]), metadata))
+    return documents
+
 def convert_items_to_markdown(item_data, language='en_US'):
     """
     Convert League of Legends item JSON data to markdown format
@@ -15,126 +177,16 @@ def convert_items_to_markdown(item_data, language='en_US'):
     else:
         md.append("# League of Legends Items\n\n")
     
+    # Build tree metrics for every item, computed once
+    graph = build_item_graph(item_data['data'])
+    
     # Process each item
     for item_id, item in item_data['data'].items():
         # Skip items that are not purchasable or hidden
-        if not item.get('gold', {}).get('purchasable', False) or item.get('hideFromAll', False):
+        if not is_listed_item(item):
             continue
             
-        md.append(f"## {item['name']}\n")
-        
-        if language == 'ko_KR':
-            md.append(f"**아이템 ID:** {item_id}\n")
-        else:
-            md.append(f"**Item ID:** {item_id}\n")
-        
-        # Cost information
-        gold = item.get('gold', {})
-        if gold.get('total', 0) > 0:
-            if language == 'ko_KR':
-                md.append(f"**가격:** {gold['total']} 골드")
-                if gold.get('base', 0) != gold.get('total', 0):
-                    md.append(f" (기본: {gold['base']} 골드)")
-                md.append(f"\n**판매가:** {gold.get('sell', 0)} 골드\n")
-            else:
-                md.append(f"**Cost:** {gold['total']} gold")
-                if gold.get('base', 0) != gold.get('total', 0):
-                    md.append(f" (Base: {gold['base']} gold)")
-                md.append(f"\n**Sell Value:** {gold.get('sell', 0)} gold\n")
-        
-        # Description and plaintext
-        if item.get('plaintext'):
-            if language == 'ko_KR':
-                md.append(f"**요약:** {item['plaintext']}\n")
-            else:
-                md.append(f"**Summary:** {item['plaintext']}\n")
-        
-        # Stats
-        stats = item.get('stats', {})
-        if stats:
-            if language == 'ko_KR':
-                md.append("**능력치:**\n")
-                stat_names = {
-                    'FlatHPPoolMod': '체력',
-                    'FlatMPPoolMod': '마나', 
-                    'FlatArmorMod': '방어력',
-                    'FlatSpellBlockMod': '마법 저항력',
-                    'FlatPhysicalDamageMod': '공격력',
-                    'FlatMagicDamageMod': '주문력',
-                    'PercentAttackSpeedMod': '공격 속도',
-                    'FlatMovementSpeedMod': '이동 속도',
-                    'FlatCritChanceMod': '치명타 확률',
-                    'PercentLifeStealMod': '생명력 흡수',
-                    'FlatHPRegenMod': '체력 재생',
-                    'PercentMovementSpeedMod': '이동 속도'
-                }
-            else:
-                md.append("**Stats:**\n")
-                stat_names = {
-                    'FlatHPPoolMod': 'Health',
-                    'FlatMPPoolMod': 'Mana', 
-                    'FlatArmorMod': 'Armor',
-                    'FlatSpellBlockMod': 'Magic Resist',
-                    'FlatPhysicalDamageMod': 'Attack Damage',
-                    'FlatMagicDamageMod': 'Ability Power',
-                    'PercentAttackSpeedMod': 'Attack Speed',
-                    'FlatMovementSpeedMod': 'Movement Speed',
-                    'FlatCritChanceMod': 'Critical Strike Chance',
-                    'PercentLifeStealMod': 'Life Steal',
-                    'FlatHPRegenMod': 'Health Regeneration',
-                    'PercentMovementSpeedMod': 'Movement Speed'
-                }
-            
-            for stat_key, value in stats.items():
-                if value != 0 and stat_key in stat_names:
-                    stat_name = stat_names[stat_key]
-                    if 'Percent' in stat_key:
-                        md.append(f"- +{value*100:.0f}% {stat_name}\n")
-                    else:
-                        md.append(f"- +{value} {stat_name}\n")
-        
-        # Item tags (categories)
-        if item.get('tags'):
-            if language == 'ko_KR':
-                md.append(f"**카테고리:** {', '.join(item['tags'])}\n")
-            else:
-                md.append(f"**Categories:** {', '.join(item['tags'])}\n")
-        
-        # Build path
-        if item.get('from'):
-            if language == 'ko_KR':
-                md.append(f"**조합 재료:** {', '.join(item['from'])}\n")
-            else:
-                md.append(f"**Builds From:** {', '.join(item['from'])}\n")
-        if item.get('into'):
-            if language == 'ko_KR':
-                md.append(f"**상위 아이템:** {', '.join(item['into'])}\n")
-            else:
-                md.append(f"**Builds Into:** {', '.join(item['into'])}\n")
-        
-        # Description (passive/active effects)
-        if item.get('description'):
-            # Clean up HTML tags for better readability
-            desc = item['description'].replace('<br>', '\n').replace('<br/>', '\n')
-            desc = desc.replace('<stats>', '').replace('</stats>', '')
-            desc = desc.replace('<unique>', '').replace('</unique>', '')
-            
-            if language == 'ko_KR':
-                desc = desc.replace('<passive>', '패시브: ').replace('</passive>', '')
-                desc = desc.replace('<active>', '액티브: ').replace('</active>', '')
-            else:
-                desc = desc.replace('<passive>', 'Passive: ').replace('</passive>', '')
-                desc = desc.replace('<active>', 'Active: ').replace('</active>', '')
-            
-            # Remove other HTML tags
-            import re
-            desc = re.sub(r'<[^>]+>', '', desc)
-            
-            if language == 'ko_KR':
-                md.append(f"**효과:** {desc}\n")
-            else:
-                md.append(f"**Effects:** {desc}\n")
-        
+        md.append(convert_item_to_markdown(item_id, item, language, metrics=graph[item_id]))
         md.append("\n---\n\n")
     
     return ''.join(md)
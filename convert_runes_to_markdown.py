@@ -2,6 +2,81 @@ import json
 import os
 import sys
 
+from html_to_markdown import LINE_BREAKS, build_translators, translate
+
+# Bump when the generated markdown changes; update_knowledge_base.py rebuilds outputs of older versions
+CONVERTER_VERSION = 2
+
+# Summaries are plain text; details keep line breaks, list items, italics and a localized rules header
+SUMMARY_TAGS = build_translators({})
+DETAIL_TAGS = build_translators({**LINE_BREAKS, '<li>': '- ', '<i>': '*', '</i>': '*'}, {
+    'en_US': {'<rules>': '\n**Rules:**\n'},
+    'ko_KR': {'<rules>': '\n**규칙:**\n'}
+})
+
+# Slot headings by slot index (the keystone slot first)
+SLOT_TITLES = {
+    'en_US': ['Keystone Runes', 'Tier 1 Runes', 'Tier 2 Runes', 'Tier 3 Runes'],
+    'ko_KR': ['핵심 룬', '1단계 룬', '2단계 룬', '3단계 룬']
+}
+
+def convert_rune_to_markdown(rune, language='en_US', heading='####', context=None):
+    """Convert a single rune to a markdown section (heading '#' and tree/slot context for a standalone document)"""
+    md = []
+    
+    md.append(f"{heading} {rune['name']}\n")
+    if context:
+        md.append(context)
+    
+    if language == 'ko_KR':
+        md.append(f"**룬 ID:** {rune['id']}\n")
+        md.append(f"**키:** {rune['key']}\n")
+    else:
+        md.append(f"**Rune ID:** {rune['id']}\n")
+        md.append(f"**Key:** {rune['key']}\n")
+    
+    # Short description
+    if rune.get('shortDesc'):
+        short_desc = translate(SUMMARY_TAGS, rune['shortDesc'], language)
+        if language == 'ko_KR':
+            md.append(f"**요약:** {short_desc}\n")
+        else:
+            md.append(f"**Summary:** {short_desc}\n")
+    
+    # Long description (detailed effects)
+    if rune.get('longDesc'):
+        long_desc = translate(DETAIL_TAGS, rune['longDesc'], language)
+        
+        if language == 'ko_KR':
+            md.append(f"**세부사항:** {long_desc}\n")
+        else:
+            md.append(f"**Details:** {long_desc}\n")
+    
+    return ''.join(md)
+
+def build_rune_documents(runes_data, language='en_US', version=None):
+    """One standalone document per rune, with its tree and slot: [(file name, markdown, metadata attributes)]"""
+    slot_titles = SLOT_TITLES.get(language, SLOT_TITLES['en_US'])
+    tree_label, slot_label = ('트리', '슬롯') if language == 'ko_KR' else ('Tree', 'Slot')
+    documents = []
+    for tree in runes_data:
+        for slot_idx, slot in enumerate(tree['slots']):
+            slot_title = slot_titles[slot_idx] if slot_idx < len(slot_titles) else str(slot_idx)
+            context = f"**{tree_label}:** {tree['name']}\n**{slot_label}:** {slot_title}\n"
+            for rune in slot['runes']:
+                metadata = {
+                    'patch': version,
+                    'language': language,
+                    'type': 'rune',
+                    'id': rune['id'],
+                    'name': rune['name'],
+                    'tree': tree['key'],
+                    'slot': slot_idx,
+                    'keystone': slot_idx == 0
+                }
+                documents.append((str(rune['id']), convert_rune_to_markdown(rune, language, '#', context), metadata))
+    return documents
+
 def convert_runes_to_markdown(runes_data, language='en_US'):
     """
     Convert League of Legends runes JSON data to markdown format
@@ -28,67 +103,13 @@ def convert_runes_to_markdown(runes_data, language='en_US'):
         
         # Process each slot (tier) in the tree
         for slot_idx, slot in enumerate(tree['slots']):
-            if language == 'ko_KR':
-                if slot_idx == 0:
-                    md.append("### 핵심 룬\n")
-                elif slot_idx == 1:
-                    md.append("### 1단계 룬\n")
-                elif slot_idx == 2:
-                    md.append("### 2단계 룬\n")
-                elif slot_idx == 3:
-                    md.append("### 3단계 룬\n")
-            else:
-                if slot_idx == 0:
-                    md.append("### Keystone Runes\n")
-                elif slot_idx == 1:
-                    md.append("### Tier 1 Runes\n")
-                elif slot_idx == 2:
-                    md.append("### Tier 2 Runes\n")
-                elif slot_idx == 3:
-                    md.append("### Tier 3 Runes\n")
+            slot_titles = SLOT_TITLES.get(language, SLOT_TITLES['en_US'])
+            if slot_idx < len(slot_titles):
+                md.append(f"### {slot_titles[slot_idx]}\n")
             
             # Process each rune in the slot
             for rune in slot['runes']:
-                md.append(f"#### {rune['name']}\n")
-                
-                if language == 'ko_KR':
-                    md.append(f"**룬 ID:** {rune['id']}\n")
-                    md.append(f"**키:** {rune['key']}\n")
-                else:
-                    md.append(f"**Rune ID:** {rune['id']}\n")
-                    md.append(f"**Key:** {rune['key']}\n")
-                
-                # Short description
-                if rune.get('shortDesc'):
-                    # Clean up HTML tags
-                    short_desc = rune['shortDesc']
-                    import re
-                    short_desc = re.sub(r'<[^>]+>', '', short_desc)
-                    if language == 'ko_KR':
-                        md.append(f"**요약:** {short_desc}\n")
-                    else:
-                        md.append(f"**Summary:** {short_desc}\n")
-                
-                # Long description (detailed effects)
-                if rune.get('longDesc'):
-                    long_desc = rune['longDesc']
-                    # Clean up HTML tags and formatting
-                    long_desc = long_desc.replace('<br>', '\n').replace('<br/>', '\n')
-                    long_desc = long_desc.replace('<li>', '- ').replace('</li>', '')
-                    
-                    if language == 'ko_KR':
-                        long_desc = long_desc.replace('<rules>', '\n**규칙:**\n').replace('</rules>', '')
-                    else:
-                        long_desc = long_desc.replace('<rules>', '\n**Rules:**\n').replace('</rules>', '')
-                    
-                    long_desc = long_desc.replace('<i>', '*').replace('</i>', '*')
-                    long_desc = re.sub(r'<[^>]+>', '', long_desc)
-                    
-                    if language == 'ko_KR':
-                        md.append(f"**세부사항:** {long_desc}\n")
-                    else:
-                        md.append(f"**Details:** {long_desc}\n")
-                
+                md.append(convert_rune_to_markdown(rune, language))
                 md.append("\n")
             
             md.append("\n")
@@ -2,6 +2,108 @@ import json
 import os
 import sys
 
+from html_to_markdown import LINE_BREAKS, build_translators, translate
+
+# Bump when the generated markdown changes; update_knowledge_base.py rebuilds outputs of older versions
+CONVERTER_VERSION = 1
+
+# Template variables ({{ f1 }}) have no value outside the game client
+TOOLTIP_TAGS = build_translators(LINE_BREAKS, template='[VALUE]')
+
+def convert_summoner_spell_to_markdown(spell, language='en_US', heading='##'):
+    """Convert a single summoner spell to a markdown section (heading '#' for a standalone document)"""
+    md = []
+    
+    md.append(f"{heading} {spell['name']}\n")
+    
+    # Labels based on language
+    if language == 'ko_KR':
+        md.append(f"**주문 ID:** {spell['id']}\n")
+        md.append(f"**키:** {spell['key']}\n")
+    else:
+        md.append(f"**Spell ID:** {spell['id']}\n")
+        md.append(f"**Key:** {spell['key']}\n")
+    
+    # Cooldown
+    if spell.get('cooldown'):
+        cooldown = spell['cooldown'][0] if isinstance(spell['cooldown'], list) else spell['cooldown']
+        if language == 'ko_KR':
+            md.append(f"**재사용 대기시간:** {cooldown}초\n")
+        else:
+            md.append(f"**Cooldown:** {cooldown} seconds\n")
+    
+    # Summoner level requirement
+    if spell.get('summonerLevel'):
+        if language == 'ko_KR':
+            md.append(f"**필요 레벨:** {spell['summonerLevel']}\n")
+        else:
+            md.append(f"**Required Level:** {spell['summonerLevel']}\n")
+    
+    # Range
+    if spell.get('range'):
+        range_val = spell['range'][0] if isinstance(spell['range'], list) else spell['range']
+        if range_val > 0:
+            if language == 'ko_KR':
+                md.append(f"**사거리:** {range_val}\n")
+            else:
+                md.append(f"**Range:** {range_val}\n")
+    
+    # Description
+    if spell.get('description'):
+        if language == 'ko_KR':
+            md.append(f"**설명:** {spell['description']}\n")
+        else:
+            md.append(f"**Description:** {spell['description']}\n")
+    
+    # Game modes where available
+    if spell.get('modes'):
+        # Filter out less common modes for cleaner display
+        common_modes = {
+            'CLASSIC': '소환사의 협곡' if language == 'ko_KR' else 'Summoner\'s Rift',
+            'ARAM': 'ARAM',
+            'URF': 'URF',
+            'ONEFORALL': '모두 똑같이' if language == 'ko_KR' else 'One for All',
+            'TUTORIAL': '튜토리얼' if language == 'ko_KR' else 'Tutorial'
+        }
+        available_modes = []
+        for mode in spell['modes']:
+            if mode in common_modes:
+                available_modes.append(common_modes[mode])
+        
+        if available_modes:
+            if language == 'ko_KR':
+                md.append(f"**사용 가능 모드:** {', '.join(available_modes)}\n")
+            else:
+                md.append(f"**Available in:** {', '.join(available_modes)}\n")
+    
+    # Detailed tooltip (gameplay effects)
+    if spell.get('tooltip'):
+        tooltip = translate(TOOLTIP_TAGS, spell['tooltip'], language)
+        if language == 'ko_KR':
+            md.append(f"**효과:** {tooltip}\n")
+        else:
+            md.append(f"**Effects:** {tooltip}\n")
+    
+    return ''.join(md)
+
+def build_summoner_spell_documents(summoner_data, language='en_US', version=None):
+    """One standalone document per summoner spell: [(file name, markdown, metadata attributes)]"""
+    documents = []
+    for spell in summoner_data['data'].values():
+        cooldown = spell.get('cooldown', [0])
+        metadata = {
+            'patch': version,
+            'language': language,
+            'type': 'summoner_spell',
+            'id': spell['id'],
+            'name': spell['name'],
+            'modes': spell.get('modes', []),
+            'summonerLevel': spell.get('summonerLevel', 0),
+            'cooldown': cooldown[0] if isinstance(cooldown, list) else cooldown
+        }
+        documents.append((spell['id'], convert_summoner_spell_to_markdown(spell, language, heading='#'), metadata))
+    return documents
+
 def convert_summoner_spells_to_markdown(summoner_data, language='en_US'):
     """
     Convert League of Legends summoner spells JSON data to markdown format
@@ -17,81 +119,7 @@ def convert_summoner_spells_to_markdown(summoner_data, language='en_US'):
     
     # Process each summoner spell
     for spell_key, spell in summoner_data['data'].items():
-        md.append(f"## {spell['name']}\n")
-        
-        # Labels based on language
-        if language == 'ko_KR':
-            md.append(f"**주문 ID:** {spell['id']}\n")
-            md.append(f"**키:** {spell['key']}\n")
-        else:
-            md.append(f"**Spell ID:** {spell['id']}\n")
-            md.append(f"**Key:** {spell['key']}\n")
-        
-        # Cooldown
-        if spell.get('cooldown'):
-            cooldown = spell['cooldown'][0] if isinstance(spell['cooldown'], list) else spell['cooldown']
-            if language == 'ko_KR':
-                md.append(f"**재사용 대기시간:** {cooldown}초\n")
-            else:
-                md.append(f"**Cooldown:** {cooldown} seconds\n")
-        
-        # Summoner level requirement
-        if spell.get('summonerLevel'):
-            if language == 'ko_KR':
-                md.append(f"**필요 레벨:** {spell['summonerLevel']}\n")
-            else:
-                md.append(f"**Required Level:** {spell['summonerLevel']}\n")
-        
-        # Range
-        if spell.get('range'):
-            range_val = spell['range'][0] if isinstance(spell['range'], list) else spell['range']
-            if range_val > 0:
-                if language == 'ko_KR':
-                    md.append(f"**사거리:** {range_val}\n")
-                else:
-                    md.append(f"**Range:** {range_val}\n")
-        
-        # Description
-        if spell.get('description'):
-            if language == 'ko_KR':
-                md.append(f"**설명:** {spell['description']}\n")
-            else:
-                md.append(f"**Description:** {spell['description']}\n")
-        
-        # Game modes where available
-        if spell.get('modes'):
-            # Filter out less common modes for cleaner display
-            common_modes = {
-                'CLASSIC': '소환사의 협곡' if language == 'ko_KR' else 'Summoner\'s Rift',
-                'ARAM': 'ARAM',
-                'URF': 'URF',
-                'ONEFORALL': '모두 똑같이' if language == 'ko_KR' else 'One for All',
-                'TUTORIAL': '튜토리얼' if language == 'ko_KR' else 'Tutorial'
-            }
-            available_modes = []
-            for mode in spell['modes']:
-                if mode in common_modes:
-                    available_modes.append(common_modes[mode])
-            
-            if available_modes:
-                if language == 'ko_KR':
-                    md.append(f"**사용 가능 모드:** {', '.join(available_modes)}\n")
-                else:
-                    md.append(f"**Available in:** {', '.join(available_modes)}\n")
-        
-        # Detailed tooltip (gameplay effects)
-        if spell.get('tooltip'):
-            tooltip = spell['tooltip']
-            # Clean up HTML and template variables
-            import re
-            tooltip = tooltip.replace('<br />', '\n').replace('<br/>', '\n').replace('<br>', '\n')
-            tooltip = re.sub(r'\{\{[^}]+\}\}', '[VALUE]', tooltip)  # Replace template variables
-            tooltip = re.sub(r'<[^>]+>', '', tooltip)  # Remove HTML tags
-            if language == 'ko_KR':
-                md.append(f"**효과:** {tooltip}\n")
-            else:
-                md.append(f"**Effects:** {tooltip}\n")
-        
+        md.append(convert_summoner_spell_to_markdown(spell, language))
         md.append("\n---\n\n")
     
     return ''.join(md)
@@ -0,0 +1,58 @@
+"""
+Declarative HTML-to-markdown translation for Data Dragon text.
+
+Descriptions and tooltips mix HTML (<br>, <b>), Riot tags (<passive>, <magicDamage>,
+<rules>) and {{ template }} placeholders. Each converter declares in a table what a tag
+becomes instead of chaining its own str.replace and re.sub calls; unlisted tags are dropped.
+A TagTranslator applies the table with C-level passes only: str.replace for the tags that
+become text, then one precompiled re.sub for {{ }} placeholders and one that removes every
+other tag. A Python call per tag (split/join or an re.sub callback) is slower on the short,
+tag-dense item descriptions.
+"""
+
+import re
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+TEMPLATE_PATTERN = re.compile(r'\{\{[^}]+\}\}')
+
+LINE_BREAKS = {'<br>': '\n', '<br/>': '\n', '<br />': '\n'}
+
+
+class TagTranslator:
+    """Rewrites tags through a dispatch table ({tag: replacement}; unlisted tags are removed)"""
+
+    def __init__(self, tags, template=None):
+        self.tags = tags
+        # Replacement for {{ }} placeholders; None keeps them as they are
+        self.template = template
+        # Tags that become text, replaced before the remaining tags are removed
+        self.replacements = [(tag, replacement) for tag, replacement in tags.items() if replacement]
+        self.template_replacement = template.replace('\\', '\\\\') if template is not None else None
+
+    def translate(self, text):
+        """Translate one string (empty or missing text is returned unchanged)"""
+        if not text:
+            return text
+
+        for tag, replacement in self.replacements:
+            text = text.replace(tag, replacement)
+        if self.template_replacement is not None:
+            text = TEMPLATE_PATTERN.sub(self.template_replacement, text)
+        return TAG_PATTERN.sub('', text)
+
+
+def build_translators(tags, localized_tags=None, template=None):
+    """
+    Per-language translators: the shared tags plus each language's own, e.g.
+    build_translators(LINE_BREAKS, {'en_US': {'<passive>': 'Passive: '}, 'ko_KR': {'<passive>': '패시브: '}})
+    """
+    localized_tags = localized_tags or {'en_US': {}}
+    return {
+        language: TagTranslator({**tags, **extra_tags}, template)
+        for language, extra_tags in localized_tags.items()
+    }
+
+
+def translate(translators, text, language='en_US'):
+    """Translate with the language's translator (English for languages without their own tags)"""
+    return translators.get(language, translators['en_US']).translate(text)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Batch summoner ingestion for bulk backfills
+Collects match history and mastery for a list of Riot IDs using the same collectors as the
+Lambda functions, running each Riot routing cluster in parallel, fetching shared matches
+once and checkpointing progress so an interrupted run can be resumed
+"""
+
+import os
+import sys
+import json
+import importlib
+import threading
+import concurrent.futures
+from collections import OrderedDict
+from datetime import datetime
+
+import boto3
+import urllib3
+
+# The collectors live with the Lambda functions
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lambda'))
+
+from riot_api import VALID_REGIONS, get_api_key, get_routing_value, resolve_account, account_error_response
+from collection_freshness import MASTERY_MODES, DEFAULT_MASTERY_MODE, record_collection
+from summoner_profile import refresh_profile
+from key_layout import normalize_riot_id
+
+match_collector = importlib.import_module('fetch-match-history')
+mastery_collector = importlib.import_module('fetch-champion-mastery')
+
+BUCKET_NAME = match_collector.BUCKET_NAME
+
+# The Riot match list endpoint returns at most 100 match IDs per request
+MAX_MATCH_COUNT = 100
+
+# Matches kept in memory per routing cluster for reuse by other players in the same games
+MATCH_CACHE_SIZE = int(os.getenv('INGEST_MATCH_CACHE_SIZE', '2000'))
+
+
+class MatchCache(OrderedDict):
+    """Bounded {matchId: match data} map; the oldest matches are dropped first"""
+
+    def __init__(self, max_size):
+        super().__init__()
+        self.max_size = max_size
+        self.hits = 0
+
+    def get(self, match_id, default=None):
+        match_data = super().get(match_id, default)
+        if match_data is not default:
+            self.hits += 1
+        return match_data
+
+    def __setitem__(self, match_id, match_data):
+        super().__setitem__(match_id, match_data)
+        while len(self) > self.max_size:
+            self.popitem(last=False)
+
+
+class Checkpoint:
+    """Per-player results persisted after every player, so a rerun skips completed work"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = {'completed': {}, 'failed': {}}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    def is_completed(self, key):
+        return key in self.state['completed']
+
+    def record(self, key, result):
+        with self.lock:
+            section = 'completed' if result['success'] else 'failed'
+            self.state['failed'].pop(key, None)
+            self.state[section][key] = result
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+
+
+def read_player_list(input_file):
+    """Read "GameName#TAG,region" lines (blank lines ignored, duplicates dropped)"""
+    players = []
+    seen = set()
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            riot_id, _, region = line.rpartition(',')
+            riot_id = riot_id.strip()
+            region = region.strip().lower()
+            if '#' not in riot_id or region not in VALID_REGIONS:
+                print(f"Warning: skipping line {line_number}: {line}")
+                continue
+
+            key = get_player_key(riot_id, region)
+            if key not in seen:
+                seen.add(key)
+                players.append((riot_id, region))
+    return players
+
+
+def get_player_key(riot_id, region):
+    """Checkpoint key of a player"""
+    return f"{region}/{normalize_riot_id(riot_id)}"
+
+
+def ingest_player(http, headers, s3, riot_id, region, match_count, mastery_mode, match_cache):
+    """Collect match history and mastery for one player and refresh the stored profile"""
+    account_response = resolve_account(http, headers, riot_id, region, s3)
+    if account_response['status'] != 200:
+        return {'success': False, 'error': account_error_response(account_response['status'])['error']}
+    account_data = account_response['data']
+
+    match_result = match_collector.collect_match_history(
+        http, headers, s3, account_data, region, match_count, match_cache=match_cache
+    )
+    mastery_result = mastery_collector.collect_mastery(http, headers, s3, account_data, region, mastery_mode)
+
+    collected_types = [
+        data_type for data_type, result in (('matchHistory', match_result), ('mastery', mastery_result))
+        if result.get('statusCode') == 200
+    ]
+    if not collected_types:
+        return {'success': False, 'error': match_result.get('error') or mastery_result.get('error')}
+
+    summoner_name = f"{account_data['gameName']}#{account_data['tagLine']}"
+    record_collection(s3, BUCKET_NAME, account_data['puuid'], collected_types, match_count, mastery_mode)
+    refresh_profile(s3, BUCKET_NAME, summoner_name, region, account_data['puuid'])
+
+    return {
+        'success': True,
+        'summoner': summoner_name,
+        'collected': collected_types,
+        'matchesProcessed': match_result.get('matchesProcessed', 0),
+        'matchIds': [match['matchId'] for match in match_result.get('matches', [])],
+        'completedAt': datetime.now().isoformat()
+    }
+
+
+def ingest_routing_group(routing_value, players, headers, match_count, mastery_mode, checkpoint):
+    """Work through the players of one routing cluster in order; returns (succeeded, failed, reused matches)"""
+    http = urllib3.PoolManager()
+    s3 = boto3.client('s3')
+    match_cache = MatchCache(MATCH_CACHE_SIZE)
+    succeeded = failed = 0
+
+    for i, (riot_id, region) in enumerate(players, 1):
+        key = get_player_key(riot_id, region)
+        print(f"[{routing_value}] {i}/{len(players)} {riot_id} ({region})")
+        try:
+            result = ingest_player(http, headers, s3, riot_id, region, match_count, mastery_mode, match_cache)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+
+        checkpoint.record(key, result)
+        if result['success']:
+            succeeded += 1
+            print(f"✓ {riot_id}: {result['matchesProcessed']} matches, collected {', '.join(result['collected'])}")
+        else:
+            failed += 1
+            print(f"✗ {riot_id}: {result['error']}")
+
+    return succeeded, failed, match_cache.hits
+
+
+def main():
+    """Main function to ingest a list of summoners"""
+    if len(sys.argv) < 2:
+        print("Usage: python ingest_summoners.py <players.csv> [match_count] [mastery_mode]")
+        print("  players.csv: one \"GameName#TAG,region\" per line, e.g. Hide on bush#KR1,kr")
+        print(f"  match_count: 1-{MAX_MATCH_COUNT} (default 20)")
+        print(f"  mastery_mode: {' or '.join(MASTERY_MODES)} (default {DEFAULT_MASTERY_MODE}, like the Lambda collectors; "
+              f"MASTERY_COLLECTION_MODE)")
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    match_count = sys.argv[2] if len(sys.argv) > 2 else '20'
+    mastery_mode = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_MASTERY_MODE
+
+    if not match_count.isdigit() or not 1 <= int(match_count) <= MAX_MATCH_COUNT:
+        print(f"Error: match_count must be a number from 1 to {MAX_MATCH_COUNT}, got {match_count!r}")
+        sys.exit(1)
+    match_count = int(match_count)
+    if mastery_mode not in MASTERY_MODES:
+        print(f"Error: mastery_mode must be one of: {', '.join(MASTERY_MODES)}, got {mastery_mode!r}")
+        sys.exit(1)
+    checkpoint_file = f"{input_file}.checkpoint.json"
+
+    print("LoL Summoner Batch Ingestion")
+    print("=" * 40)
+
+    players = read_player_list(input_file)
+    checkpoint = Checkpoint(checkpoint_file)
+    pending = [(riot_id, region) for riot_id, region in players if not checkpoint.is_completed(get_player_key(riot_id, region))]
+
+    print(f"Players: {len(players)} ({len(players) - len(pending)} already completed, {len(pending)} to ingest)")
+    print(f"Matches per player: {match_count}, mastery mode: {mastery_mode}")
+    print(f"Checkpoint: {checkpoint_file}")
+
+    if not pending:
+        print("Nothing to do")
+        return
+
+    # Each routing cluster has its own rate budget, so clusters run side by side
+    groups = OrderedDict()
+    for riot_id, region in pending:
+        groups.setdefault(get_routing_value(region), []).append((riot_id, region))
+
+    headers = {'X-Riot-Token': os.getenv('RIOT_API_KEY') or get_api_key()}
+
+    total_succeeded = total_failed = total_reused = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(groups)) as executor:
+        futures = {
+            executor.submit(ingest_routing_group, routing_value, group, headers, match_count, mastery_mode, checkpoint): routing_value
+            for routing_value, group in groups.items()
+        }
+        for future in concurrent.futures.as_completed(futures):
+            succeeded, failed, reused = future.result()
+            print(f"Routing {futures[future]} finished: {succeeded} succeeded, {failed} failed, {reused} shared matches reused")
+            total_succeeded += succeeded
+            total_failed += failed
+            total_reused += reused
+
+    print("\n" + "=" * 40)
+    print(f"Ingested: {total_succeeded}/{len(pending)} players")
+    print(f"Shared matches fetched once and reused: {total_reused}")
+    if total_failed:
+        print(f"⚠ {total_failed} players failed; rerun the same command to retry them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Item build-tree graph and gold efficiency for Data Dragon item.json.
+
+Items form a recipe DAG through their 'from' lists. build_item_graph() walks it once in
+topological order (components before the items built from them) and precomputes, per item,
+the full component closure, the recipe depth, the gold cost rebuilt from the recipe, the
+gold value of its stats and its gold efficiency (stat value / cost).
+
+Stat values use reference prices derived from the patch's own basic items: a Long Sword's
+cost divided by its attack damage is the price of one point of attack damage, and so on
+(STAT_REFERENCE_ITEMS). References whose item carries several stats have the already priced
+ones subtracted first. Stats without a reference item are left out of the value.
+"""
+
+# Stat -> basic item that prices it, in pricing order (single-stat items first)
+STAT_REFERENCE_ITEMS = {
+    'FlatPhysicalDamageMod': '1036',   # Long Sword
+    'FlatMagicDamageMod': '1052',      # Amplifying Tome
+    'FlatArmorMod': '1029',            # Cloth Armor
+    'FlatSpellBlockMod': '1033',       # Null-Magic Mantle
+    'FlatHPPoolMod': '1028',           # Ruby Crystal
+    'FlatMPPoolMod': '1027',           # Sapphire Crystal
+    'PercentAttackSpeedMod': '1042',   # Dagger
+    'FlatCritChanceMod': '1018',       # Cloak of Agility
+    'FlatMovementSpeedMod': '1001',    # Boots
+    'FlatHPRegenMod': '1006',          # Rejuvenation Bead
+    'PercentLifeStealMod': '1053'      # Vampiric Scepter (priced after attack damage)
+}
+
+
+def get_stat_prices(items):
+    """Gold per stat point from the reference items present in this patch"""
+    prices = {}
+    for stat, reference_id in STAT_REFERENCE_ITEMS.items():
+        reference = items.get(reference_id)
+        if not reference:
+            continue
+        stats = reference.get('stats', {})
+        if not stats.get(stat):
+            continue
+        other_value = sum(value * prices.get(other, 0) for other, value in stats.items() if other != stat)
+        price = (reference.get('gold', {}).get('total', 0) - other_value) / stats[stat]
+        if price > 0:
+            prices[stat] = price
+    return prices
+
+
+def get_stat_gold(stats, prices):
+    """Gold value of a stat block at the reference prices"""
+    return sum(value * prices.get(stat, 0) for stat, value in stats.items())
+
+
+def get_topological_order(items):
+    """Item IDs with every component before the items built from it; raises ValueError on a cycle"""
+    order = []
+    state = {}  # item ID -> 'visiting' | 'done'
+
+    for root in items:
+        if root in state:
+            continue
+        stack = [(root, iter(items[root].get('from', [])))]
+        state[root] = 'visiting'
+        while stack:
+            item_id, components = stack[-1]
+            component = next((c for c in components if c in items and state.get(c) != 'done'), None)
+            if component is None:
+                stack.pop()
+                state[item_id] = 'done'
+                order.append(item_id)
+            elif state.get(component) == 'visiting':
+                raise ValueError(f"Item recipe cycle through {component}")
+            else:
+                state[component] = 'visiting'
+                stack.append((component, iter(items[component].get('from', []))))
+    return order
+
+
+def build_item_graph(items):
+    """
+    Per-item graph metrics for item.json's 'data':
+    {item_id: {'components', 'depth', 'totalCost', 'statGold', 'goldEfficiency'}}
+    Components are the full closure (every item in the recipe tree, each listed once,
+    deepest first); totalCost is the recipe gold plus the cost of every component.
+    """
+    prices = get_stat_prices(items)
+    graph = {}
+
+    for item_id in get_topological_order(items):
+        item = items[item_id]
+        recipe = [component for component in item.get('from', []) if component in items]
+
+        components = []
+        for component in recipe:
+            for nested in graph[component]['components'] + [component]:
+                if nested not in components:
+                    components.append(nested)
+
+        gold = item.get('gold', {})
+        if recipe:
+            total_cost = gold.get('base', 0) + sum(graph[component]['totalCost'] for component in recipe)
+        else:
+            total_cost = gold.get('total', 0)
+        stat_gold = get_stat_gold(item.get('stats', {}), prices)
+
+        graph[item_id] = {
+            'components': components,
+            'depth': 1 + max((graph[component]['depth'] for component in recipe), default=-1),
+            'totalCost': total_cost,
+            'statGold': round(stat_gold),
+            'goldEfficiency': round(stat_gold / total_cost, 3) if total_cost else 0.0
+        }
+
+    return graph
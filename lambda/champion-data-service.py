@@ -3,12 +3,16 @@ Champion Data Service Lambda Function
 Provides champion data from S3 with caching and image URL generation
 """
 
+import copy
 import json
 import os
+import time
 import boto3
 import logging
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any
 from botocore.exceptions import ClientError
+from data_versions import list_published_versions
 
 # Configure logging
 logger = logging.getLogger()
@@ -20,8 +24,27 @@ s3_client = boto3.client('s3')
 # Environment variables
 DATA_BUCKET = os.getenv('DATA_BUCKET')
 ENVIRONMENT = os.getenv('ENVIRONMENT', 'prod')
-DEFAULT_VERSION = '15.21.1'
+DATA_PREFIX = os.getenv('DATA_PREFIX', '')
+DEFAULT_VERSION = os.getenv('DEFAULT_VERSION', 'latest')
+FALLBACK_VERSION = '15.21.1'
+LATEST_ALIAS = 'latest'
 DEFAULT_LANGUAGE = 'en_US'
+MAX_BATCH_SIZE = 50
+
+# Catalog registry settings
+MAX_CACHED_CATALOGS = int(os.getenv('MAX_CACHED_CATALOGS', '4'))
+VERSION_LIST_TTL_SECONDS = int(os.getenv('VERSION_LIST_TTL_SECONDS', '300'))
+SPRITE_ATLAS_MISS_TTL_SECONDS = int(os.getenv('SPRITE_ATLAS_MISS_TTL_SECONDS', '300'))
+PRELOAD_VERSION_COUNT = int(os.getenv('PRELOAD_VERSION_COUNT', '1'))
+PRELOAD_VERSIONS = [v.strip() for v in os.getenv('PRELOAD_VERSIONS', '').split(',') if v.strip()]
+PRELOAD_LANGUAGES = [l.strip() for l in os.getenv('PRELOAD_LANGUAGES', DEFAULT_LANGUAGE).split(',') if l.strip()]
+
+# Global catalog registry (Lambda container reuse), LRU-ordered by (version, language)
+# Each entry holds the champion.json 'catalog' and championFull.json 'details' once loaded
+_catalog_registry = OrderedDict()
+_version_manifest_cache = {}
+_sprite_atlas_cache = {}
+_version_list_cache = {'versions': None, 'loaded_at': 0.0}
 
 def lambda_handler(event, context):
     """Main Lambda handler"""
@@ -37,6 +60,10 @@ def lambda_handler(event, context):
         # Route the request
         if path == '/api/champions':
             return handle_get_all_champions(query_parameters)
+        elif path == '/api/champions/versions':
+            return handle_get_versions()
+        elif path == '/api/champions/batch':
+            return handle_get_champions_batch(event, query_parameters)
         elif path.startswith('/api/champions/'):
             champion_id = path_parameters.get('championId')
             return handle_get_champion_by_id(champion_id, query_parameters)
@@ -50,15 +77,17 @@ def lambda_handler(event, context):
 def handle_get_all_champions(query_params: Dict[str, str]) -> Dict[str, Any]:
     """Handle GET /api/champions - return list of all champions"""
     try:
-        version = query_params.get('version', DEFAULT_VERSION)
+        version = resolve_version(query_params.get('version'))
         language = query_params.get('language', DEFAULT_LANGUAGE)
         
-        # Get champion data from S3
-        champion_data = get_champion_data_from_s3(version, language)
-        if not champion_data:
+        # Get champion catalog (cached per container)
+        catalog = get_champion_catalog(version, language)
+        if not catalog:
             return create_response(404, {'error': 'Champion data not found'})
+        champion_data = catalog['raw']
         
         # Transform data for API response
+        atlas = get_sprite_atlas(version)
         champions_list = []
         for champion_id, champion_info in champion_data.get('data', {}).items():
             champion_summary = {
@@ -70,7 +99,8 @@ def handle_get_all_champions(query_params: Dict[str, str]) -> Dict[str, Any]:
                 'info': champion_info.get('info', {}),
                 'image': {
                     'full': champion_info['image']['full'],
-                    'url': generate_champion_image_url(version, champion_info['image']['full'])
+                    'url': generate_champion_image_url(version, champion_info['image']['full']),
+                    'sprite': get_sprite(atlas, version, 'champion', champion_info['image']['full'])
                 },
                 'stats': {
                     'hp': champion_info['stats']['hp'],
@@ -99,42 +129,41 @@ def handle_get_all_champions(query_params: Dict[str, str]) -> Dict[str, Any]:
         logger.error(f"Error getting all champions: {str(e)}")
         return create_response(500, {'error': 'Failed to retrieve champions'})
 
+def handle_get_versions() -> Dict[str, Any]:
+    """Handle GET /api/champions/versions - return published patch versions and the latest alias"""
+    try:
+        versions = list_catalog_versions()
+        
+        response_data = {
+            'latest': versions[0] if versions else FALLBACK_VERSION,
+            'versions': versions,
+            'cached': [f"{version}/{language}" for version, language in _catalog_registry.keys()]
+        }
+        
+        return create_response(200, response_data)
+        
+    except Exception as e:
+        logger.error(f"Error listing versions: {str(e)}")
+        return create_response(500, {'error': 'Failed to retrieve versions'})
+
 def handle_get_champion_by_id(champion_id: str, query_params: Dict[str, str]) -> Dict[str, Any]:
     """Handle GET /api/champions/{championId} - return detailed champion info"""
     try:
         if not champion_id:
             return create_response(400, {'error': 'Champion ID is required'})
         
-        version = query_params.get('version', DEFAULT_VERSION)
+        version = resolve_version(query_params.get('version'))
         language = query_params.get('language', DEFAULT_LANGUAGE)
         
-        # Get champion data from S3
-        champion_data = get_champion_data_from_s3(version, language)
-        if not champion_data:
+        # Find the specific champion (served from the in-memory detail index)
+        details = get_champion_details(version, language, [champion_id])
+        if details is None:
             return create_response(404, {'error': 'Champion data not found'})
         
-        # Find the specific champion
-        champion_info = None
-        for champ_id, champ_data in champion_data.get('data', {}).items():
-            if champ_data['id'].lower() == champion_id.lower() or champ_data['key'] == champion_id:
-                champion_info = champ_data
-                break
-        
+        champion_info = details[champion_id]
         if not champion_info:
             return create_response(404, {'error': f'Champion {champion_id} not found'})
         
-        # Add image URLs to champion data
-        champion_info['image']['url'] = generate_champion_image_url(version, champion_info['image']['full'])
-        
-        # Add image URLs to spells
-        for spell in champion_info.get('spells', []):
-            if 'image' in spell:
-                spell['image']['url'] = generate_spell_image_url(version, spell['image']['full'])
-        
-        # Add image URL to passive
-        if 'passive' in champion_info and 'image' in champion_info['passive']:
-            champion_info['passive']['image']['url'] = generate_passive_image_url(version, champion_info['passive']['image']['full'])
-        
         response_data = {
             'version': version,
             'language': language,
@@ -147,11 +176,358 @@ def handle_get_champion_by_id(champion_id: str, query_params: Dict[str, str]) ->
         logger.error(f"Error getting champion {champion_id}: {str(e)}")
         return create_response(500, {'error': f'Failed to retrieve champion {champion_id}'})
 
-def get_champion_data_from_s3(version: str, language: str) -> Optional[Dict[str, Any]]:
-    """Retrieve champion data from S3"""
+def handle_get_champions_batch(event: Dict[str, Any], query_params: Dict[str, str]) -> Dict[str, Any]:
+    """Handle POST /api/champions/batch (or GET with ?ids=) - return many champions keyed by requested id"""
     try:
-        s3_key = f"{version}/data/{language}/champion.json"
+        champion_ids = parse_batch_ids(event, query_params)
+        if not champion_ids:
+            return create_response(400, {'error': 'At least one champion ID is required'})
+        
+        if len(champion_ids) > MAX_BATCH_SIZE:
+            return create_response(400, {'error': f'A maximum of {MAX_BATCH_SIZE} champion IDs can be requested at once'})
+        
+        version = resolve_version(query_params.get('version'))
+        language = query_params.get('language', DEFAULT_LANGUAGE)
+        
+        # Single catalog load serves the whole batch
+        details = get_champion_details(version, language, champion_ids)
+        if details is None:
+            return create_response(404, {'error': 'Champion data not found'})
+        
+        champions = {}
+        not_found = []
+        for champion_id in champion_ids:
+            if details[champion_id]:
+                champions[champion_id] = details[champion_id]
+            else:
+                not_found.append(champion_id)
+        
+        response_data = {
+            'version': version,
+            'language': language,
+            'champions': champions,
+            'count': len(champions),
+            'notFound': not_found
+        }
+        
+        return create_response(200, response_data)
+        
+    except ValueError as e:
+        return create_response(400, {'error': str(e)})
+    except Exception as e:
+        logger.error(f"Error getting champion batch: {str(e)}")
+        return create_response(500, {'error': 'Failed to retrieve champions'})
+
+def parse_batch_ids(event: Dict[str, Any], query_params: Dict[str, str]) -> List[str]:
+    """Collect champion ids from a JSON body ({"ids": [...]}) and/or an ids= query parameter"""
+    raw_ids = []
+    
+    body = event.get('body')
+    if isinstance(body, str) and body.strip():
+        try:
+            body = json.loads(body)
+        except json.JSONDecodeError:
+            raise ValueError('Request body must be valid JSON')
+    if isinstance(body, dict):
+        body_ids = body.get('ids', [])
+        if not isinstance(body_ids, list):
+            raise ValueError('ids must be a list of champion IDs or keys')
+        raw_ids.extend(body_ids)
+    
+    if query_params.get('ids'):
+        raw_ids.extend(query_params['ids'].split(','))
+    
+    # Normalise and de-duplicate while keeping request order
+    champion_ids = []
+    for raw_id in raw_ids:
+        champion_id = str(raw_id).strip()
+        if champion_id and champion_id not in champion_ids:
+            champion_ids.append(champion_id)
+    
+    return champion_ids
+
+def resolve_version(requested_version: Optional[str]) -> str:
+    """Resolve a requested version (or the 'latest' alias) to a concrete patch version"""
+    version = (requested_version or DEFAULT_VERSION).strip()
+    if version.lower() != LATEST_ALIAS:
+        return version
+    
+    versions = list_catalog_versions()
+    return versions[0] if versions else FALLBACK_VERSION
+
+def list_catalog_versions() -> List[str]:
+    """
+    List published patch versions, newest first.
+    A version counts as published once its manifest.json exists (the uploader writes it last);
+    manifests are checked newest first until the first published one (see data_versions).
+    The listing is cached for VERSION_LIST_TTL_SECONDS; manifests are cached for the container lifetime.
+    """
+    now = time.time()
+    cached_versions = _version_list_cache['versions']
+    if cached_versions is not None and now - _version_list_cache['loaded_at'] < VERSION_LIST_TTL_SECONDS:
+        return cached_versions
+    
+    try:
+        versions = list_published_versions(
+            s3_client, DATA_BUCKET, DATA_PREFIX,
+            is_published=lambda version: get_version_manifest(version) is not None
+        )
+    except ClientError as e:
+        logger.error(f"Failed to list catalog versions: {e}")
+        return cached_versions or []
+    
+    _version_list_cache['versions'] = versions
+    _version_list_cache['loaded_at'] = now
+    
+    return versions
+
+def get_version_manifest(version: str) -> Optional[Dict[str, Any]]:
+    """Return the manifest.json written by create_version_manifest for a version"""
+    if version in _version_manifest_cache:
+        return _version_manifest_cache[version]
+    
+    s3_key = f"{DATA_PREFIX}{version}/manifest.json"
+    try:
+        response = s3_client.get_object(Bucket=DATA_BUCKET, Key=s3_key)
+        manifest = json.loads(response['Body'].read().decode('utf-8'))
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'NoSuchKey':
+            logger.error(f"S3 error retrieving {s3_key}: {e}")
+        # Not cached: the manifest may still be on its way during an upload
+        return None
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON decode error for {s3_key}: {e}")
+        return None
+    
+    _version_manifest_cache[version] = manifest
+    return manifest
+
+def find_registry_entry(version: str, language: str) -> Optional[Dict[str, Any]]:
+    """Return the registry entry for a version/language (None if not loaded), marking it most recently used"""
+    cache_key = (version, language)
+    entry = _catalog_registry.get(cache_key)
+    if entry is not None:
+        _catalog_registry.move_to_end(cache_key)
+    return entry
+
+def store_registry_entry(version: str, language: str, **fields: Any) -> Dict[str, Any]:
+    """
+    Store loaded data in a version/language entry, creating it if needed.
+    Only called after a successful S3 load, so unknown versions never evict loaded catalogs.
+    """
+    cache_key = (version, language)
+    entry = _catalog_registry.setdefault(cache_key, {})
+    entry.update(fields)
+    _catalog_registry.move_to_end(cache_key)
+    
+    # Evict least recently used catalogs
+    while len(_catalog_registry) > MAX_CACHED_CATALOGS:
+        evicted_key, _ = _catalog_registry.popitem(last=False)
+        logger.info(f"Evicted champion catalog {evicted_key[0]} ({evicted_key[1]})")
+    
+    return entry
+
+def preload_catalogs() -> None:
+    """Warm the registry at container init with the newest and pinned versions"""
+    if not DATA_BUCKET:
+        return
+    
+    versions = list_catalog_versions()[:PRELOAD_VERSION_COUNT]
+    for version in PRELOAD_VERSIONS:
+        version = resolve_version(version)
+        if version not in versions:
+            versions.append(version)
+    
+    # Never preload more than the registry can hold
+    for version in versions[:MAX_CACHED_CATALOGS // max(len(PRELOAD_LANGUAGES), 1)]:
+        for language in PRELOAD_LANGUAGES:
+            get_champion_catalog(version, language)
+            get_champion_detail_index(version, language)
+    
+    logger.info(f"Preloaded champion catalogs: {list(_catalog_registry.keys())}")
+
+def get_champion_catalog(version: str, language: str) -> Optional[Dict[str, Any]]:
+    """Return the cached champion catalog for a version/language, loading it from S3 on first use"""
+    entry = find_registry_entry(version, language)
+    if entry and entry.get('catalog'):
+        return entry['catalog']
+    
+    champion_data = get_champion_data_from_s3(version, language)
+    if not champion_data:
+        return None
+    
+    catalog = build_champion_index(champion_data)
+    store_registry_entry(version, language, catalog=catalog)
+    logger.info(f"Cached {len(catalog['by_id'])} champions for {version} ({language})")
+    
+    return catalog
+
+def build_champion_index(champion_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Index champion data by lower-cased id (e.g. 'ahri') and numeric key (e.g. '103')"""
+    by_id = {}
+    by_key = {}
+    for champ_data in champion_data.get('data', {}).values():
+        by_id[champ_data['id'].lower()] = champ_data
+        by_key[str(champ_data['key'])] = champ_data
+    
+    return {
+        'raw': champion_data,
+        'by_id': by_id,
+        'by_key': by_key
+    }
+
+def resolve_champion(catalog: Dict[str, Any], champion_id: str) -> Optional[Dict[str, Any]]:
+    """Resolve a champion by id ('Ahri') or match-data championId key ('103')"""
+    champion_id = str(champion_id).strip()
+    return catalog['by_key'].get(champion_id) or catalog['by_id'].get(champion_id.lower())
+
+def get_champion_detail_index(version: str, language: str) -> Optional[Dict[str, Any]]:
+    """Return the cached championFull.json detail index, loading it from S3 on first use"""
+    entry = find_registry_entry(version, language)
+    if entry and 'details' in entry:
+        return entry['details']
+    
+    full_data = get_champion_data_from_s3(version, language, 'championFull.json')
+    if not full_data:
+        # Remember the miss only for a version whose champion.json loaded, so requests
+        # fall straight through to it; unknown versions are never cached
+        if entry is not None:
+            entry['details'] = None
+        return None
+    
+    index = build_champion_detail_index(full_data)
+    store_registry_entry(version, language, details=index)
+    logger.info(f"Cached {len(index['details'])} champion details for {version} ({language})")
+    
+    return index
+
+def build_champion_detail_index(full_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a compact detail index from championFull.json.
+    Each champion (spells, passive, tips, ...) is kept as compact UTF-8 JSON keyed by
+    lower-cased id, so the parsed multi-megabyte document can be released after load
+    and every request decodes only the champions it returns.
+    """
+    details = {}
+    key_to_id = {}
+    for champ_data in full_data.get('data', {}).values():
+        champion_id = champ_data['id'].lower()
+        details[champion_id] = json.dumps(champ_data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        key_to_id[str(champ_data['key'])] = champion_id
+    
+    return {
+        'details': details,
+        'key_to_id': key_to_id
+    }
+
+def get_champion_details(version: str, language: str, champion_ids: List[str]) -> Optional[Dict[str, Optional[Dict[str, Any]]]]:
+    """
+    Resolve champion details for the requested ids, keyed by the id as requested.
+    Uses the championFull.json index when available and falls back to champion.json.
+    Returns None when no champion data exists for the version/language.
+    """
+    detail_index = get_champion_detail_index(version, language)
+    catalog = None
+    if not detail_index:
+        catalog = get_champion_catalog(version, language)
+        if not catalog:
+            return None
+    
+    details = {}
+    for champion_id in champion_ids:
+        champion_info = None
+        if detail_index:
+            lookup_id = str(champion_id).strip()
+            lookup_id = detail_index['key_to_id'].get(lookup_id, lookup_id.lower())
+            payload = detail_index['details'].get(lookup_id)
+            if payload:
+                champion_info = json.loads(payload)
+        else:
+            champion_info = resolve_champion(catalog, champion_id)
+            if champion_info:
+                # Copy so the cached catalog is never mutated
+                champion_info = copy.deepcopy(champion_info)
         
+        details[champion_id] = build_champion_detail(champion_info, version) if champion_info else None
+    
+    return details
+
+def build_champion_detail(champion_info: Dict[str, Any], version: str) -> Dict[str, Any]:
+    """Add image URLs and sprite atlas coordinates to a champion detail entry"""
+    atlas = get_sprite_atlas(version)
+    
+    # Add image URLs to champion data
+    champion_info['image']['url'] = generate_champion_image_url(version, champion_info['image']['full'])
+    champion_info['image']['sprite'] = get_sprite(atlas, version, 'champion', champion_info['image']['full'])
+    
+    # Add image URLs to spells
+    for spell in champion_info.get('spells', []):
+        if 'image' in spell:
+            spell['image']['url'] = generate_spell_image_url(version, spell['image']['full'])
+            spell['image']['sprite'] = get_sprite(atlas, version, 'spell', spell['image']['full'])
+    
+    # Add image URL to passive
+    if 'passive' in champion_info and 'image' in champion_info['passive']:
+        passive_image = champion_info['passive']['image']
+        passive_image['url'] = generate_passive_image_url(version, passive_image['full'])
+        passive_image['sprite'] = get_sprite(atlas, version, 'passive', passive_image['full'])
+    
+    return champion_info
+
+def get_sprite_atlas(version: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the sprite atlas coordinate map (build_sprite_atlases.py) for a version.
+    Atlases are cached for the container lifetime; a missing atlas is remembered for
+    SPRITE_ATLAS_MISS_TTL_SECONDS only, so atlases published for an existing version show up.
+    """
+    cached = _sprite_atlas_cache.get(version)
+    if cached is not None and (cached['atlas'] is not None or time.time() - cached['loaded_at'] < SPRITE_ATLAS_MISS_TTL_SECONDS):
+        return cached['atlas']
+    
+    s3_key = f"{DATA_PREFIX}{version}/img/atlas/atlas.json"
+    atlas = None
+    try:
+        response = s3_client.get_object(Bucket=DATA_BUCKET, Key=s3_key)
+        atlas = json.loads(response['Body'].read().decode('utf-8'))
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'NoSuchKey':
+            logger.error(f"S3 error retrieving {s3_key}: {e}")
+            # Transient errors are retried on the next request
+            return None
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON decode error for {s3_key}: {e}")
+    
+    _sprite_atlas_cache[version] = {'atlas': atlas, 'loaded_at': time.time()}
+    return atlas
+
+def get_sprite(atlas: Optional[Dict[str, Any]], version: str, family: str, image_filename: str) -> Optional[Dict[str, Any]]:
+    """
+    Sprite sheet URL and position of an icon: {'url', 'webpUrl'?, 'x', 'y', 'w', 'h', 'width', 'height'}
+    (width/height are the sheet's size, for CSS background-size). None without an atlas entry.
+    """
+    family_atlas = (atlas or {}).get('families', {}).get(family)
+    if not family_atlas or image_filename not in family_atlas['icons']:
+        return None
+    
+    sheet_index, x, y, w, h = family_atlas['icons'][image_filename]
+    sheet = family_atlas['sheets'][sheet_index]
+    sprite = {
+        'url': generate_atlas_url(version, sheet['png']),
+        'x': x,
+        'y': y,
+        'w': w,
+        'h': h,
+        'width': sheet['width'],
+        'height': sheet['height']
+    }
+    if 'webp' in sheet:
+        sprite['webpUrl'] = generate_atlas_url(version, sheet['webp'])
+    return sprite
+
+def get_champion_data_from_s3(version: str, language: str, filename: str = 'champion.json') -> Optional[Dict[str, Any]]:
+    """Retrieve champion data (champion.json or championFull.json) from S3"""
+    s3_key = f"{DATA_PREFIX}{version}/data/{language}/{filename}"
+    try:
         logger.info(f"Fetching champion data from s3://{DATA_BUCKET}/{s3_key}")
         
         response = s3_client.get_object(Bucket=DATA_BUCKET, Key=s3_key)
@@ -172,15 +548,19 @@ def get_champion_data_from_s3(version: str, language: str) -> Optional[Dict[str,
 
 def generate_champion_image_url(version: str, image_filename: str) -> str:
     """Generate URL for champion image"""
-    return f"https://{DATA_BUCKET}.s3.amazonaws.com/{version}/img/champion/{image_filename}"
+    return f"https://{DATA_BUCKET}.s3.amazonaws.com/{DATA_PREFIX}{version}/img/champion/{image_filename}"
 
 def generate_spell_image_url(version: str, image_filename: str) -> str:
     """Generate URL for spell image"""
-    return f"https://{DATA_BUCKET}.s3.amazonaws.com/{version}/img/spell/{image_filename}"
+    return f"https://{DATA_BUCKET}.s3.amazonaws.com/{DATA_PREFIX}{version}/img/spell/{image_filename}"
 
 def generate_passive_image_url(version: str, image_filename: str) -> str:
     """Generate URL for passive image"""
-    return f"https://{DATA_BUCKET}.s3.amazonaws.com/{version}/img/passive/{image_filename}"
+    return f"https://{DATA_BUCKET}.s3.amazonaws.com/{DATA_PREFIX}{version}/img/passive/{image_filename}"
+
+def generate_atlas_url(version: str, sheet_filename: str) -> str:
+    """Generate URL for a sprite sheet"""
+    return f"https://{DATA_BUCKET}.s3.amazonaws.com/{DATA_PREFIX}{version}/img/atlas/{sheet_filename}"
 
 def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
     """Create standardized API response"""
@@ -190,11 +570,17 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*',
             'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'GET,OPTIONS'
+            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
         },
         'body': json.dumps(body, ensure_ascii=False)
     }
 
+# Warm the catalog registry during container init
+try:
+    preload_catalogs()
+except Exception as e:
+    logger.error(f"Catalog preload failed: {str(e)}")
+
 # For local testing
 if __name__ == "__main__":
     # Test event for local development
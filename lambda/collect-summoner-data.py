@@ -1,17 +1,48 @@
 import json
+import os
+import importlib
 import boto3
 import urllib3
 from urllib.parse import quote
 from datetime import datetime
 import concurrent.futures
 import time
+from riot_api import VALID_REGIONS, get_api_key, resolve_account, account_error_response
+from summoner_profile import refresh_profile
+from key_layout import get_profile_key, get_match_stats_prefix, get_mastery_key, resolve_puuid
+import collection_lease
+from collection_freshness import DATA_TYPES, load_freshness, get_stale_types, has_stored_data, record_collection
+from collection_jobs import JobTracker, new_job, load_job, claim_inflight, release_inflight
+
+# Collector modules (hyphenated file names, so imported by name)
+match_collector = importlib.import_module('fetch-match-history')
+mastery_collector = importlib.import_module('fetch-champion-mastery')
+
+# 'inprocess' runs both collectors here; 'invoke' calls the collector Lambdas
+ORCHESTRATION_MODE = os.getenv('ORCHESTRATION_MODE', 'inprocess')
+
+# Upper bound on matchCount for background (async) collection jobs
+ASYNC_MAX_MATCH_COUNT = int(os.getenv('ASYNC_MAX_MATCH_COUNT', '100'))
+
+# Default for "staleWhileRevalidate": serve stale stored data and refresh it in the background
+STALE_WHILE_REVALIDATE = os.getenv('STALE_WHILE_REVALIDATE', 'false').lower() == 'true'
+
+# Bucket holding collected match/mastery data and precomputed profiles
+MATCH_DATA_BUCKET = 'rift-rewind-match-data-doyaji'
 
 def lambda_handler(event, context):
     """
     Orchestrates summoner data collection by calling both match-history and mastery collection.
-    Expected event: {"riotId": "GameName#TAG", "region": "kr", "matchCount": 5}
+    Expected event: {"riotId": "GameName#TAG", "region": "kr", "matchCount": 5, "masteryMode": "full", "async": false,
+                     "forceRefresh": false, "staleWhileRevalidate": false}
+    With "async": true the search returns 202 and a job ID; progress is served by GET /summoner/jobs/{jobId}.
+    Data types collected within their staleness threshold are served from storage instead of collected again.
     """
     
+    # Background worker invocation for an async job
+    if event.get('action') == 'runJob':
+        return run_collection_job(event['jobId'])
+    
     try:
         # Parse the event body if it's a string (API Gateway format)
         if isinstance(event.get('body'), str):
@@ -23,6 +54,9 @@ def lambda_handler(event, context):
         riot_id = body.get('riotId', '').strip()
         region = body.get('region', 'kr')
         match_count = body.get('matchCount', 5)
+        run_async = body.get('async', False) is True
+        force_refresh = body.get('forceRefresh', False) is True
+        stale_while_revalidate = body.get('staleWhileRevalidate', STALE_WHILE_REVALIDATE) is True
         
         # Validate input
         if not riot_id:
@@ -39,57 +73,345 @@ def lambda_handler(event, context):
             })
         
         # Validate region
-        valid_regions = ['na1', 'br1', 'la1', 'la2', 'euw1', 'eun1', 'tr1', 'ru', 'kr', 'jp1', 'oc1', 'ph2', 'sg2', 'th2', 'tw2', 'vn2']
-        if region not in valid_regions:
+        if region not in VALID_REGIONS:
             return create_response(400, {
                 'error': 'Invalid region',
-                'message': f'Region must be one of: {", ".join(valid_regions)}'
+                'message': f'Region must be one of: {", ".join(VALID_REGIONS)}'
             })
         
-        # Validate match count
-        if not isinstance(match_count, int) or match_count < 1 or match_count > 20:
+        # Validate match count (background jobs are not bound by the API Gateway timeout)
+        max_match_count = ASYNC_MAX_MATCH_COUNT if run_async else 20
+        if not isinstance(match_count, int) or match_count < 1 or match_count > max_match_count:
             return create_response(400, {
                 'error': 'Invalid match count',
-                'message': 'Match count must be between 1 and 20'
+                'message': f'Match count must be between 1 and {max_match_count}'
             })
         
         print(f"Starting data collection for {riot_id} in region {region}")
         
-        # Initialize Lambda client for invoking other functions
-        lambda_client = boto3.client('lambda')
+        mastery_mode = body.get('masteryMode')
         
-        # Prepare payloads for both functions
-        match_payload = {
-            'riotId': riot_id,
-            'region': region,
-            'count': match_count
-        }
+        # Only collect what is stale; fresh data is served from storage
+        s3 = boto3.client('s3')
+        puuid = resolve_puuid(s3, MATCH_DATA_BUCKET, riot_id)
+        freshness = load_freshness(s3, MATCH_DATA_BUCKET, puuid) if puuid else {}
+        stale_types = list(DATA_TYPES) if force_refresh else get_stale_types(freshness, match_count=match_count, mastery_mode=mastery_mode)
+        
+        if not stale_types:
+            print(f"Stored data for {riot_id} is fresh, skipping collection")
+            return create_response(200, build_stored_response(riot_id, region, puuid, freshness))
+        
+        # Serve the stored (stale) data now and refresh it in the background
+        if stale_while_revalidate and not force_refresh and has_stored_data(freshness, stale_types):
+            response_body = build_stored_response(riot_id, region, puuid, freshness, stale_types)
+            try:
+                job_id, _ = submit_collection_job(s3, riot_id, region, match_count, mastery_mode, context, stale_types)
+                response_body['revalidation'] = {'jobId': job_id, 'statusUrl': f"/summoner/jobs/{job_id}"}
+            except Exception as e:
+                print(f"Failed to start background refresh for {riot_id}: {str(e)}")
+                response_body['revalidation'] = None
+            return create_response(200, response_body)
+        
+        if run_async:
+            return start_collection_job(riot_id, region, match_count, mastery_mode, context, stale_types, force_refresh)
+        
+        # Identical concurrent searches share one collection
+        lease_key = collection_lease.get_lease_key(riot_id, region, match_count, mastery_mode, stale_types)
+        status_code, response_body = run_single_flight(
+            s3, lease_key,
+            lambda: collect_summoner(riot_id, region, match_count, mastery_mode, data_types=stale_types),
+            force_refresh
+        )
+        if status_code is None:
+            # The identical collection is still running; hand out a job that follows it
+            # (not forced: it joins that collection rather than starting another one)
+            return start_collection_job(riot_id, region, match_count, mastery_mode, context, stale_types)
+        return create_response(status_code, response_body)
+        
+    except Exception as e:
+        print(f"Error in summoner search: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return create_response(500, {
+            'error': 'Internal server error',
+            'message': 'An unexpected error occurred during data collection'
+        })
+
+def run_single_flight(s3, lease_key, collect, force_refresh=False, wait_seconds=None):
+    """
+    Coalesce identical concurrent searches and mark responses served from another search's collection.
+    Returns (None, None) when the wait for the other search's collection ended before it finished.
+    """
+    status_code, response_body, coalesced = collection_lease.run_single_flight(
+        s3, lease_key, collect, force_refresh, wait_seconds
+    )
+    if status_code is None:
+        return None, None
+    return status_code, dict(response_body, coalesced=coalesced)
+
+def collect_summoner(riot_id, region, match_count, mastery_mode=None, progress=None, data_types=None):
+    """
+    Run the collections (in this process by default, or via Lambda invokes) and build the response.
+    data_types limits which collections run (default: all); the others are reported as fresh.
+    """
+    if ORCHESTRATION_MODE == 'invoke':
+        collection_results = collect_via_invoke(riot_id, region, match_count, mastery_mode, data_types)
+    else:
+        collection_results = collect_in_process(riot_id, region, match_count, mastery_mode, progress, data_types)
+    
+    return finish_collection(riot_id, region, collection_results, progress, match_count, mastery_mode)
+
+def finish_collection(riot_id, region, collection_results, progress=None, match_count=None, mastery_mode=None):
+    """Build the search response from collection results and refresh the profile document"""
+    progress = progress or (lambda stage, status, **details: None)
+    
+    # Process results and create response
+    response_data = process_collection_results(riot_id, region, collection_results)
+    
+    # Determine overall success
+    match_success = collection_results.get('matchHistory', {}).get('success', False)
+    mastery_success = collection_results.get('mastery', {}).get('success', False)
+    
+    # Refresh the precomputed profile document served by /summoner/{riotId}/profile
+    if match_success or mastery_success:
+        collected_types = [
+            data_type for data_type in DATA_TYPES
+            if collection_results.get(data_type, {}).get('success') and not collection_results[data_type].get('fresh')
+        ]
+        _, puuid = get_collected_account(riot_id, collection_results)
+        if puuid:
+            record_collection(boto3.client('s3'), MATCH_DATA_BUCKET, puuid, collected_types, match_count, mastery_mode)
         
-        mastery_payload = {
-            'riotId': riot_id,
-            'region': region
+        progress('profile', 'running')
+        response_data['dataLocations']['profile'] = update_profile_document(riot_id, region, collection_results)
+        progress('profile', 'done' if response_data['dataLocations']['profile'] else 'failed')
+    
+    if match_success or mastery_success:
+        return 200, response_data
+    else:
+        return 500, {
+            'error': 'Data collection failed',
+            'message': 'Both match history and mastery collection failed',
+            'details': response_data
         }
+
+def build_stored_response(riot_id, region, puuid, freshness, stale_types=()):
+    """Search response for data served from storage, in the same shape as a collection response"""
+    stored_results = {
+        data_type: {'success': True, 'fresh': data_type not in stale_types, 'stale': data_type in stale_types, 'data': {}}
+        for data_type in DATA_TYPES
+    }
+    response_data = process_collection_results(riot_id, region, stored_results, puuid)
+    response_data['dataLocations']['profile'] = get_profile_key(puuid)
+    response_data['message'] = (
+        f'Serving stored data for {riot_id}; refreshing {", ".join(stale_types)} in the background'
+        if stale_types else f'Stored data for {riot_id} is up to date'
+    )
+    response_data['lastCollectedAt'] = {
+        data_type: freshness.get(data_type, {}).get('lastCollectedAt') for data_type in DATA_TYPES
+    }
+    return response_data
+
+def submit_collection_job(s3, riot_id, region, match_count, mastery_mode, context, data_types=None, force_refresh=False):
+    """Create (or join) a background collection job; returns (jobId, deduplicated)"""
+    job = new_job(riot_id, region, match_count, mastery_mode, data_types, force_refresh)
+    
+    # Identical in-flight searches share one job; a forced refresh never joins a running one
+    existing_job_id = None if force_refresh else claim_inflight(s3, job)
+    if existing_job_id:
+        print(f"Joining in-flight job {existing_job_id} for {riot_id}")
+        return existing_job_id, True
+    
+    tracker = JobTracker(s3, job)
+    tracker.set_status('queued')
+    
+    try:
+        boto3.client('lambda').invoke(
+            FunctionName=context.function_name,
+            InvocationType='Event',
+            Payload=json.dumps({'action': 'runJob', 'jobId': job['jobId']})
+        )
+    except Exception:
+        tracker.set_status('failed', error='Failed to start data collection')
+        release_inflight(s3, job)
+        raise
+    
+    return job['jobId'], False
+
+def start_collection_job(riot_id, region, match_count, mastery_mode, context, data_types=None, force_refresh=False):
+    """Create (or join) a background collection job and return its ID immediately"""
+    try:
+        job_id, deduplicated = submit_collection_job(
+            boto3.client('s3'), riot_id, region, match_count, mastery_mode, context, data_types, force_refresh
+        )
+    except Exception as e:
+        print(f"Failed to start collection job for {riot_id}: {str(e)}")
+        return create_response(500, {
+            'error': 'Internal server error',
+            'message': 'Could not start data collection'
+        })
+    
+    return create_response(202, {
+        'jobId': job_id,
+        'status': 'running' if deduplicated else 'queued',
+        'deduplicated': deduplicated,
+        'statusUrl': f"/summoner/jobs/{job_id}"
+    })
+
+def run_collection_job(job_id):
+    """Background worker: run the collection for a job, recording progress on the job document"""
+    s3 = boto3.client('s3')
+    job = load_job(s3, job_id)
+    if not job:
+        print(f"Job {job_id} not found")
+        return {'statusCode': 404, 'error': 'Job not found'}
+    
+    request = job['request']
+    riot_id = request['riotId']
+    region = request['region']
+    tracker = JobTracker(s3, job)
+    tracker.set_status('running')
+    
+    try:
+        lease_key = collection_lease.get_lease_key(
+            riot_id, region, request['matchCount'], request.get('masteryMode'), request.get('dataTypes')
+        )
+        collect = lambda: collect_summoner(
+            riot_id, region, request['matchCount'], request.get('masteryMode'),
+            tracker.progress, request.get('dataTypes')
+        )
+        status_code, response_body = run_single_flight(
+            s3, lease_key, collect, request.get('forceRefresh', False),
+            # Not bound by API Gateway: wait until the leader finishes or its lease expires
+            wait_seconds=collection_lease.LEASE_TTL_SECONDS
+        )
+        if status_code is None:
+            # The leader outlived the wait; collect without the lease rather than fail the job
+            status_code, response_body = collect()
+        if status_code == 200:
+            tracker.set_status('complete' if response_body['overallStatus'] == 'complete' else 'partial', result=response_body)
+        else:
+            tracker.set_status('failed', result=response_body, error=response_body['message'])
         
-        # Execute both functions concurrently
-        collection_results = {}
+        return {'statusCode': status_code, 'jobId': job_id}
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            # Submit both tasks
-            match_future = executor.submit(
-                invoke_lambda_function,
-                lambda_client,
-                'fetch-match-history',
-                match_payload
+    except Exception as e:
+        print(f"Job {job_id} failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        tracker.set_status('failed', error='An unexpected error occurred during data collection')
+        return {'statusCode': 500, 'jobId': job_id}
+    finally:
+        release_inflight(s3, job)
+
+def fresh_result():
+    """Collection result for a data type skipped because its stored copy is fresh"""
+    return {'success': True, 'fresh': True, 'data': {}}
+
+def collect_in_process(riot_id, region, match_count, mastery_mode=None, progress=None, data_types=None):
+    """
+    Run both collectors as library functions in this process.
+    The account is resolved once and the API key, HTTP pool, rate limiter and S3 client are shared.
+    progress, if given, receives per-stage updates (account, matchList, matches, mastery).
+    data_types limits which collectors run (default: both).
+    """
+    progress = progress or (lambda stage, status, **details: None)
+    data_types = data_types or DATA_TYPES
+    
+    try:
+        api_key = get_api_key()
+    except Exception as e:
+        print(f"Failed to get API key: {str(e)}")
+        failure = {'success': False, 'error': 'Failed to retrieve API key', 'statusCode': 500}
+        return {'matchHistory': failure, 'mastery': dict(failure)}
+    
+    headers = {'X-Riot-Token': api_key}
+    http = urllib3.PoolManager(maxsize=4)
+    s3 = boto3.client('s3')
+    
+    progress('account', 'running')
+    account_response = resolve_account(http, headers, riot_id, region, s3)
+    if account_response['status'] != 200:
+        progress('account', 'failed', statusCode=account_response['status'])
+        failure = to_collection_result(account_error_response(account_response['status']))
+        return {'matchHistory': failure, 'mastery': dict(failure)}
+    account_data = account_response['data']
+    progress('account', 'done', cached=bool(account_response.get('cached')))
+    
+    collection_results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        futures = {}
+        if 'matchHistory' in data_types:
+            futures['matchHistory'] = executor.submit(
+                match_collector.collect_match_history,
+                http, headers, s3, account_data, region, match_count, progress
             )
-            
-            mastery_future = executor.submit(
-                invoke_lambda_function,
-                lambda_client,
-                'fetch-champion-mastery',
-                mastery_payload
+        if 'mastery' in data_types:
+            futures['mastery'] = executor.submit(
+                mastery_collector.collect_mastery,
+                http, headers, s3, account_data, region, mastery_mode or os.getenv('MASTERY_COLLECTION_MODE', 'top'), progress
             )
-            
-            # Wait for both to complete
+        
+        for result_type in DATA_TYPES:
+            future = futures.get(result_type)
+            if future is None:
+                collection_results[result_type] = fresh_result()
+                continue
+            try:
+                collection_results[result_type] = to_collection_result(future.result())
+            except Exception as e:
+                print(f"{result_type} collection failed: {str(e)}")
+                collection_results[result_type] = {
+                    'success': False,
+                    'error': str(e)
+                }
+    
+    return collection_results
+
+def collect_via_invoke(riot_id, region, match_count, mastery_mode=None, data_types=None):
+    """Run both collectors as separate Lambda functions (synchronous RequestResponse invokes)"""
+    data_types = data_types or DATA_TYPES
+    
+    # Initialize Lambda client for invoking other functions
+    lambda_client = boto3.client('lambda')
+    
+    # Prepare payloads for both functions
+    match_payload = {
+        'riotId': riot_id,
+        'region': region,
+        'count': match_count
+    }
+    
+    mastery_payload = {
+        'riotId': riot_id,
+        'region': region
+    }
+    if mastery_mode:
+        mastery_payload['mode'] = mastery_mode
+    
+    # Execute both functions concurrently
+    collection_results = {}
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        # Submit the tasks for stale data types
+        match_future = executor.submit(
+            invoke_lambda_function,
+            lambda_client,
+            'fetch-match-history',
+            match_payload
+        ) if 'matchHistory' in data_types else None
+        
+        mastery_future = executor.submit(
+            invoke_lambda_function,
+            lambda_client,
+            'fetch-champion-mastery',
+            mastery_payload
+        ) if 'mastery' in data_types else None
+        
+        # Wait for both to complete
+        if match_future is None:
+            collection_results['matchHistory'] = fresh_result()
+        else:
             try:
                 match_result = match_future.result(timeout=50)  # 50 second timeout
                 collection_results['matchHistory'] = match_result
@@ -99,7 +421,10 @@ def lambda_handler(event, context):
                     'success': False,
                     'error': str(e)
                 }
-            
+        
+        if mastery_future is None:
+            collection_results['mastery'] = fresh_result()
+        else:
             try:
                 mastery_result = mastery_future.result(timeout=30)  # 30 second timeout
                 collection_results['mastery'] = mastery_result
@@ -109,31 +434,21 @@ def lambda_handler(event, context):
                     'success': False,
                     'error': str(e)
                 }
-        
-        # Process results and create response
-        response_data = process_collection_results(riot_id, region, collection_results)
-        
-        # Determine overall success
-        match_success = collection_results.get('matchHistory', {}).get('success', False)
-        mastery_success = collection_results.get('mastery', {}).get('success', False)
-        
-        if match_success or mastery_success:
-            return create_response(200, response_data)
-        else:
-            return create_response(500, {
-                'error': 'Data collection failed',
-                'message': 'Both match history and mastery collection failed',
-                'details': response_data
-            })
-        
-    except Exception as e:
-        print(f"Error in summoner search: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return create_response(500, {
-            'error': 'Internal server error',
-            'message': 'An unexpected error occurred during data collection'
-        })
+    
+    return collection_results
+
+def to_collection_result(response_payload):
+    """Wrap a collector payload as a collection result ({'success': ..., 'data'/'error': ...})"""
+    if response_payload.get('statusCode') == 200:
+        return {
+            'success': True,
+            'data': response_payload
+        }
+    return {
+        'success': False,
+        'error': response_payload.get('error', 'Unknown error'),
+        'statusCode': response_payload.get('statusCode', 500)
+    }
 
 def invoke_lambda_function(lambda_client, function_name, payload):
     """Invoke a Lambda function and return the result"""
@@ -148,17 +463,7 @@ def invoke_lambda_function(lambda_client, function_name, payload):
         response_payload = json.loads(response['Payload'].read())
         
         # Check if the function executed successfully
-        if response_payload.get('statusCode') == 200:
-            return {
-                'success': True,
-                'data': response_payload
-            }
-        else:
-            return {
-                'success': False,
-                'error': response_payload.get('error', 'Unknown error'),
-                'statusCode': response_payload.get('statusCode', 500)
-            }
+        return to_collection_result(response_payload)
             
     except Exception as e:
         print(f"Failed to invoke {function_name}: {str(e)}")
@@ -167,8 +472,37 @@ def invoke_lambda_function(lambda_client, function_name, payload):
             'error': str(e)
         }
 
-def process_collection_results(riot_id, region, results):
-    """Process and format the collection results"""
+def get_collected_account(riot_id, results):
+    """Children report the canonical account name and the PUUID their data is stored under"""
+    for result in results.values():
+        if result.get('success') and result.get('data', {}).get('puuid'):
+            return result['data']['summoner'], result['data']['puuid']
+    return riot_id, None
+
+def update_profile_document(riot_id, region, results):
+    """Rebuild the summoner's profile document from the freshly collected data"""
+    summoner_name, puuid = get_collected_account(riot_id, results)
+    if not puuid:
+        return None
+    
+    try:
+        s3 = boto3.client('s3')
+        return refresh_profile(s3, MATCH_DATA_BUCKET, summoner_name, region, puuid)
+    except Exception as e:
+        # The profile is derived data; collection still succeeded
+        print(f"Failed to refresh profile for {summoner_name}: {str(e)}")
+        return None
+
+def get_success_status(result):
+    """'success' for collected data, 'fresh'/'stale' for data served from storage"""
+    if result.get('fresh'):
+        return 'fresh'
+    if result.get('stale'):
+        return 'stale'
+    return 'success'
+
+def process_collection_results(riot_id, region, results, puuid=None):
+    """Process and format the collection results (puuid: stored account, if not reported by the collectors)"""
     response = {
         'summoner': riot_id,
         'region': region,
@@ -184,7 +518,7 @@ def process_collection_results(riot_id, region, results):
     match_result = results.get('matchHistory', {})
     if match_result.get('success'):
         match_data = match_result.get('data', {})
-        response['collectionStatus']['matchHistory'] = 'success'
+        response['collectionStatus']['matchHistory'] = get_success_status(match_result)
         response['data']['matchHistory'] = {
             'matchesProcessed': match_data.get('matchesProcessed', 0),
             'matches': match_data.get('matches', []),
@@ -200,7 +534,7 @@ def process_collection_results(riot_id, region, results):
     mastery_result = results.get('mastery', {})
     if mastery_result.get('success'):
         mastery_data = mastery_result.get('data', {})
-        response['collectionStatus']['mastery'] = 'success'
+        response['collectionStatus']['mastery'] = get_success_status(mastery_result)
         response['data']['mastery'] = {
             'totalScore': mastery_data.get('totalScore', 0),
             'championCount': mastery_data.get('championCount', 0),
@@ -216,15 +550,15 @@ def process_collection_results(riot_id, region, results):
         })
     
     # Add data locations for successful collections
-    safe_summoner_name = riot_id.replace(' ', '_')
+    puuid = puuid or get_collected_account(riot_id, results)[1]
     response['dataLocations'] = {
-        'matchHistory': f"match-history/{safe_summoner_name}/",
-        'mastery': f"mastery-data/{safe_summoner_name}/"
-    }
+        'matchHistory': get_match_stats_prefix(puuid),
+        'mastery': get_mastery_key(puuid)
+    } if puuid else {}
     
     # Add overall status
-    match_success = response['collectionStatus']['matchHistory'] == 'success'
-    mastery_success = response['collectionStatus']['mastery'] == 'success'
+    match_success = response['collectionStatus']['matchHistory'] != 'failed'
+    mastery_success = response['collectionStatus']['mastery'] != 'failed'
     
     if match_success and mastery_success:
         response['overallStatus'] = 'complete'
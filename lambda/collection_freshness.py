@@ -0,0 +1,109 @@
+"""
+Freshness policy for summoner collections.
+
+Each collection records when every data type was last collected, and how much was
+collected (match count, mastery mode), in a small metadata document
+(summoners/{puuid}/freshness.json). A search consults it first: data types collected
+within their staleness threshold and covering what the search asks for are served from
+storage instead of being collected again, and only the others are refreshed.
+"""
+
+import json
+import os
+from datetime import datetime
+
+from botocore.exceptions import ClientError
+from key_layout import get_freshness_key
+
+# Data types tracked, as named in collection results
+DATA_TYPES = ['matchHistory', 'mastery']
+
+# Seconds after which each data type is considered stale
+STALE_THRESHOLDS = {
+    'matchHistory': int(os.getenv('MATCH_LIST_STALE_SECONDS', '900')),
+    'mastery': int(os.getenv('MASTERY_STALE_SECONDS', '3600'))
+}
+
+# Mastery collection modes, each covering the ones before it
+MASTERY_MODES = ['top', 'full']
+DEFAULT_MASTERY_MODE = os.getenv('MASTERY_COLLECTION_MODE', 'top')
+
+
+def load_freshness(s3, bucket_name, puuid):
+    """Read a summoner's freshness metadata ({} if never collected)"""
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=get_freshness_key(puuid))
+        return json.loads(response['Body'].read().decode('utf-8'))
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            print(f"Failed to read freshness for {puuid}: {e}")
+    except Exception as e:
+        print(f"Failed to read freshness for {puuid}: {str(e)}")
+    return {}
+
+
+def get_last_collected(freshness, data_type):
+    """When a data type was last collected (None if never)"""
+    last_collected_at = freshness.get(data_type, {}).get('lastCollectedAt')
+    return datetime.fromisoformat(last_collected_at) if last_collected_at else None
+
+
+def covers_request(freshness, data_type, match_count=None, mastery_mode=None):
+    """
+    Whether the stored collection of a data type covers a request: at least as many matches,
+    and a mastery mode at least as complete (records without these fields cover nothing)
+    """
+    record = freshness.get(data_type, {})
+    if data_type == 'matchHistory' and match_count is not None:
+        return record.get('matchCount', 0) >= match_count
+    if data_type == 'mastery':
+        stored_mode = record.get('masteryMode')
+        requested_mode = mastery_mode or DEFAULT_MASTERY_MODE
+        if stored_mode not in MASTERY_MODES or requested_mode not in MASTERY_MODES:
+            return stored_mode == requested_mode
+        return MASTERY_MODES.index(stored_mode) >= MASTERY_MODES.index(requested_mode)
+    return True
+
+
+def get_stale_types(freshness, now=None, match_count=None, mastery_mode=None):
+    """Data types that were never collected, are older than their threshold or collected less than requested"""
+    now = now or datetime.now()
+    stale_types = []
+    for data_type in DATA_TYPES:
+        last_collected = get_last_collected(freshness, data_type)
+        if (last_collected is None
+                or (now - last_collected).total_seconds() >= STALE_THRESHOLDS[data_type]
+                or not covers_request(freshness, data_type, match_count, mastery_mode)):
+            stale_types.append(data_type)
+    return stale_types
+
+
+def has_stored_data(freshness, data_types):
+    """True if every given data type has been collected at least once"""
+    return all(get_last_collected(freshness, data_type) is not None for data_type in data_types)
+
+
+def record_collection(s3, bucket_name, puuid, data_types, match_count=None, mastery_mode=None):
+    """Stamp lastCollectedAt, with the match count or mastery mode, for freshly collected data types (best effort)"""
+    if not data_types:
+        return
+
+    freshness = load_freshness(s3, bucket_name, puuid)
+    collected_at = datetime.now().isoformat()
+    for data_type in data_types:
+        record = {'lastCollectedAt': collected_at}
+        if data_type == 'matchHistory' and match_count is not None:
+            record['matchCount'] = match_count
+        if data_type == 'mastery':
+            record['masteryMode'] = mastery_mode or DEFAULT_MASTERY_MODE
+        freshness[data_type] = record
+
+    try:
+        s3.put_object(
+            Bucket=bucket_name,
+            Key=get_freshness_key(puuid),
+            Body=json.dumps(freshness),
+            ContentType='application/json'
+        )
+    except Exception as e:
+        print(f"Failed to record freshness for {puuid}: {str(e)}")
@@ -0,0 +1,184 @@
+"""
+Asynchronous summoner collection jobs.
+
+POST /summoner/search with "async": true creates a job document (jobs/{jobId}.json),
+hands the work to a background invocation and returns the job ID immediately. The
+worker records per-stage progress on the document, which GET /summoner/jobs/{jobId}
+serves. An in-flight marker per search (Riot ID, region and what it collects, as for
+collection leases) lets identical searches attach to the running job instead of starting
+another one; forced refreshes always start their own job.
+"""
+
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from botocore.exceptions import ClientError
+from collection_lease import get_search_path
+
+JOB_BUCKET = os.getenv('JOB_BUCKET', 'rift-rewind-match-data-doyaji')
+
+# A running job that has not reported progress for this long is treated as dead
+JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', '300'))
+
+ACTIVE_JOB_STATUSES = ('queued', 'running')
+
+JOB_STAGES = ['account', 'matchList', 'matches', 'mastery', 'profile']
+
+
+def get_job_key(job_id):
+    """S3 key of a job document"""
+    return f"jobs/{job_id}.json"
+
+
+def get_inflight_key(request):
+    """S3 key of the in-flight marker for a job request (Riot ID, region and what it collects)"""
+    search_path = get_search_path(
+        request['riotId'], request['region'], request['matchCount'],
+        request.get('masteryMode'), request.get('dataTypes')
+    )
+    return f"jobs/inflight/{search_path}.json"
+
+
+def is_valid_job_id(job_id):
+    """Job IDs are uuid4 hex strings"""
+    try:
+        return uuid.UUID(job_id).hex == job_id
+    except (ValueError, TypeError, AttributeError):
+        return False
+
+
+def new_job(riot_id, region, match_count, mastery_mode=None, data_types=None, force_refresh=False):
+    """
+    Create a queued job document (data_types limits which collections run; default all,
+    force_refresh skips reusing a collection that just finished)
+    """
+    now = datetime.now().isoformat()
+    return {
+        'jobId': uuid.uuid4().hex,
+        'status': 'queued',
+        'request': {
+            'riotId': riot_id,
+            'region': region,
+            'matchCount': match_count,
+            'masteryMode': mastery_mode,
+            'dataTypes': data_types,
+            'forceRefresh': force_refresh
+        },
+        'progress': {stage: {'status': 'pending'} for stage in JOB_STAGES},
+        'createdAt': now,
+        'updatedAt': now,
+        'result': None,
+        'error': None
+    }
+
+
+def load_job(s3, job_id):
+    """Read a job document (None if it does not exist)"""
+    try:
+        response = s3.get_object(Bucket=JOB_BUCKET, Key=get_job_key(job_id))
+        return json.loads(response['Body'].read().decode('utf-8'))
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+
+
+def is_job_active(job):
+    """True while a job is queued/running and still reporting progress"""
+    if not job or job.get('status') not in ACTIVE_JOB_STATUSES:
+        return False
+    updated_at = datetime.fromisoformat(job['updatedAt'])
+    return (datetime.now() - updated_at).total_seconds() < JOB_STALE_SECONDS
+
+
+def claim_inflight(s3, job):
+    """
+    Register a job as the in-flight job for its search.
+    Returns the ID of an already active job for the same search instead, if there is one.
+    Conditional writes make concurrent claims race-safe: only one caller wins.
+    """
+    inflight_key = get_inflight_key(job['request'])
+    marker = json.dumps({'jobId': job['jobId'], 'createdAt': datetime.now().isoformat()})
+
+    for _ in range(2):
+        try:
+            response = s3.get_object(Bucket=JOB_BUCKET, Key=inflight_key)
+            existing = json.loads(response['Body'].read().decode('utf-8'))
+            condition = {'IfMatch': response['ETag']}
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+                raise
+            existing = None
+            condition = {'IfNoneMatch': '*'}
+
+        if existing and is_job_active(load_job(s3, existing['jobId'])):
+            return existing['jobId']
+
+        try:
+            s3.put_object(
+                Bucket=JOB_BUCKET,
+                Key=inflight_key,
+                Body=marker,
+                ContentType='application/json',
+                **condition
+            )
+            return None
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('PreconditionFailed', 'ConditionalRequestConflict', '412'):
+                raise
+            # Another search claimed it first; re-read and attach to its job
+
+    return None
+
+
+def release_inflight(s3, job):
+    """Remove the in-flight marker of a job's search if it still belongs to the job"""
+    inflight_key = get_inflight_key(job['request'])
+    try:
+        response = s3.get_object(Bucket=JOB_BUCKET, Key=inflight_key)
+        existing = json.loads(response['Body'].read().decode('utf-8'))
+        if existing.get('jobId') == job['jobId']:
+            s3.delete_object(Bucket=JOB_BUCKET, Key=inflight_key)
+    except Exception as e:
+        print(f"Failed to release in-flight marker {inflight_key}: {str(e)}")
+
+
+class JobTracker:
+    """Thread-safe progress recorder for a running job; every change is written to S3"""
+
+    def __init__(self, s3, job):
+        self.s3 = s3
+        self.job = job
+        self.lock = threading.Lock()
+
+    def progress(self, stage, status, **details):
+        """Progress callback handed to the collectors, e.g. progress('matches', 'running', completed=3, total=20)"""
+        with self.lock:
+            self.job['progress'][stage] = dict(details, status=status)
+            self._save()
+
+    def set_status(self, status, result=None, error=None):
+        """Move the job to queued/running/complete/partial/failed"""
+        with self.lock:
+            self.job['status'] = status
+            if result is not None:
+                self.job['result'] = result
+            if error is not None:
+                self.job['error'] = error
+            self._save()
+
+    def _save(self):
+        self.job['updatedAt'] = datetime.now().isoformat()
+        try:
+            self.s3.put_object(
+                Bucket=JOB_BUCKET,
+                Key=get_job_key(self.job['jobId']),
+                Body=json.dumps(self.job, ensure_ascii=False),
+                ContentType='application/json'
+            )
+        except Exception as e:
+            # Progress is advisory; never fail the collection because of it
+            print(f"Failed to save job {self.job['jobId']}: {str(e)}")
@@ -0,0 +1,163 @@
+"""
+Single-flight coalescing for summoner collections.
+
+Concurrent identical searches share one collection. A search is identified by the
+Riot ID, region and what it collects (match count, mastery mode and data types), so a
+search asking for more matches or another mastery mode never receives a smaller
+collection's result. A lease object (leases/collection/{region}/{riotId}/{request}.json)
+written with conditional puts elects the leader across containers; followers poll the
+lease and return the leader's result. A result stays reusable for
+LEASE_RESULT_TTL_SECONDS so a burst of searches right after a collection serves the
+freshly written data, except for forced refreshes, which always collect (or follow a
+collection that is still running).
+
+Each Lambda container handles one request at a time, so there is no in-process
+coalescing: concurrent searches always meet on the S3 lease.
+"""
+
+import json
+import os
+import time
+import uuid
+from urllib.parse import quote
+
+from botocore.exceptions import ClientError
+from key_layout import normalize_riot_id
+
+LEASE_BUCKET = os.getenv('LEASE_BUCKET', 'rift-rewind-match-data-doyaji')
+
+# A leader that has not finished within this long is presumed dead and can be replaced
+LEASE_TTL_SECONDS = int(os.getenv('LEASE_TTL_SECONDS', '120'))
+
+# How long followers of a synchronous search wait for the leader; below the 30 s API Gateway
+# integration timeout so the follower can still answer with a job to poll
+LEASE_WAIT_SECONDS = int(os.getenv('LEASE_WAIT_SECONDS', '25'))
+LEASE_POLL_SECONDS = float(os.getenv('LEASE_POLL_SECONDS', '1'))
+
+# How long a finished collection's result is handed to new searches
+LEASE_RESULT_TTL_SECONDS = int(os.getenv('LEASE_RESULT_TTL_SECONDS', '30'))
+
+PRECONDITION_ERRORS = ('PreconditionFailed', 'ConditionalRequestConflict', '412')
+
+def get_search_path(riot_id, region, match_count, mastery_mode=None, data_types=None):
+    """
+    Key path identifying a search: {region}/{riotId}/{match count}-{mastery mode}-{data types}.
+    Shared by collection leases and in-flight job markers so both match identical searches only.
+    """
+    types = '+'.join(sorted(data_types)) if data_types else 'all'
+    request = f"{match_count}-{mastery_mode or 'default'}-{types}"
+    return f"{region}/{quote(normalize_riot_id(riot_id), safe='')}/{quote(request, safe='')}"
+
+
+def get_lease_key(riot_id, region, match_count, mastery_mode=None, data_types=None):
+    """S3 key of the collection lease for a search (Riot ID, region and what it collects)"""
+    return f"leases/collection/{get_search_path(riot_id, region, match_count, mastery_mode, data_types)}.json"
+
+
+def run_single_flight(s3, lease_key, collect, force_refresh=False, wait_seconds=None):
+    """
+    Run collect() -> (status_code, body) at most once at a time per lease key: lead under
+    the S3 lease or follow its holder for up to wait_seconds (default LEASE_WAIT_SECONDS).
+    A finished result is reused unless force_refresh; a forced search that followed a
+    running collection takes its result.
+    Returns (status_code, body, coalesced) where coalesced is True when the result came
+    from another caller's collection, or (None, None, True) when the wait ended with the
+    leader still running.
+    """
+    owner = uuid.uuid4().hex
+    deadline = time.time() + (LEASE_WAIT_SECONDS if wait_seconds is None else wait_seconds)
+    followed = False
+
+    while True:
+        lease, etag = load_lease(s3, lease_key)
+        now = time.time()
+
+        if lease and lease['status'] == 'done' and now < lease['expiresAt'] and (followed or not force_refresh):
+            print(f"Reusing collection result from {lease_key}")
+            return lease['statusCode'], lease['result'], True
+
+        if lease and lease['status'] == 'running' and now < lease['expiresAt'] and now < deadline:
+            followed = True
+            time.sleep(LEASE_POLL_SECONDS)
+            continue
+
+        if lease and lease['status'] == 'running' and now < lease['expiresAt']:
+            print(f"Timed out waiting for {lease_key}; the collection is still running")
+            return None, None, True
+
+        if acquire_lease(s3, lease_key, owner, etag):
+            break
+        # Lost the race for the lease; follow the winner
+
+    try:
+        status_code, body = collect()
+    except Exception:
+        release_lease(s3, lease_key, owner)
+        raise
+
+    complete_lease(s3, lease_key, owner, status_code, body)
+    return status_code, body, False
+
+
+def load_lease(s3, lease_key):
+    """Read a lease and its ETag ((None, None) if there is none)"""
+    try:
+        response = s3.get_object(Bucket=LEASE_BUCKET, Key=lease_key)
+        return json.loads(response['Body'].read().decode('utf-8')), response['ETag']
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            raise
+        return None, None
+
+
+def acquire_lease(s3, lease_key, owner, etag=None):
+    """Write a running lease; conditional on the lease being absent or unchanged since it was read"""
+    lease = {
+        'owner': owner,
+        'status': 'running',
+        'expiresAt': time.time() + LEASE_TTL_SECONDS
+    }
+    condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+    try:
+        s3.put_object(
+            Bucket=LEASE_BUCKET,
+            Key=lease_key,
+            Body=json.dumps(lease),
+            ContentType='application/json',
+            **condition
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] in PRECONDITION_ERRORS:
+            return False
+        raise
+
+
+def complete_lease(s3, lease_key, owner, status_code, body):
+    """Publish the leader's result on the lease so followers and new searches can reuse it"""
+    lease = {
+        'owner': owner,
+        'status': 'done',
+        'statusCode': status_code,
+        'result': body,
+        'expiresAt': time.time() + LEASE_RESULT_TTL_SECONDS
+    }
+    try:
+        s3.put_object(
+            Bucket=LEASE_BUCKET,
+            Key=lease_key,
+            Body=json.dumps(lease, ensure_ascii=False),
+            ContentType='application/json'
+        )
+    except Exception as e:
+        print(f"Failed to publish collection result on {lease_key}: {str(e)}")
+
+
+def release_lease(s3, lease_key, owner):
+    """Drop a lease after a failed collection so the next search can lead"""
+    try:
+        lease, _ = load_lease(s3, lease_key)
+        if lease and lease.get('owner') == owner:
+            s3.delete_object(Bucket=LEASE_BUCKET, Key=lease_key)
+    except Exception as e:
+        print(f"Failed to release lease {lease_key}: {str(e)}")
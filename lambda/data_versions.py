@@ -0,0 +1,75 @@
+"""
+Published Data Dragon patch versions in S3.
+
+upload_champion_data_to_s3.py stores each patch under {prefix}{version}/ and writes
+{version}/manifest.json last, so a version counts as published once its manifest exists.
+Versions are listed from the prefix's sub-directories; manifests are checked newest first
+and the check stops at the first published version (older patches were published before it).
+"""
+
+from botocore.exceptions import ClientError
+
+
+def is_patch_version(version):
+    """Check for a Data Dragon patch version such as 15.21.1"""
+    parts = version.split('.')
+    return len(parts) == 3 and all(part.isdigit() for part in parts)
+
+
+def version_sort_key(version):
+    """Numeric sort key so 15.10.1 sorts after 15.9.1"""
+    return tuple(int(part) for part in version.split('.'))
+
+
+def get_manifest_key(prefix, version):
+    return f"{prefix}{version}/manifest.json"
+
+
+def list_patch_versions(s3, bucket_name, prefix):
+    """Patch versions stored under the prefix, newest first (published or not)"""
+    versions = []
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, Delimiter='/'):
+        for common_prefix in page.get('CommonPrefixes', []):
+            version = common_prefix['Prefix'][len(prefix):].rstrip('/')
+            if is_patch_version(version):
+                versions.append(version)
+    versions.sort(key=version_sort_key, reverse=True)
+    return versions
+
+
+def has_manifest(s3, bucket_name, prefix, version):
+    """Whether a version's manifest.json exists"""
+    try:
+        s3.head_object(Bucket=bucket_name, Key=get_manifest_key(prefix, version))
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            raise
+        return False
+
+
+def list_published_versions(s3, bucket_name, prefix, is_published=None):
+    """
+    Published patch versions, newest first. Only the versions newer than the newest published
+    one are checked for a manifest (one check per patch still uploading, usually just one);
+    is_published(version) replaces the manifest HEAD, e.g. with a caching manifest loader.
+    """
+    if is_published is None:
+        is_published = lambda version: has_manifest(s3, bucket_name, prefix, version)
+
+    versions = list_patch_versions(s3, bucket_name, prefix)
+    for index, version in enumerate(versions):
+        if is_published(version):
+            return versions[index:]
+    return []
+
+
+def get_latest_version(s3, bucket_name, prefix, fallback_version=None):
+    """Newest published patch version, or fallback_version when none is published or S3 fails"""
+    try:
+        versions = list_published_versions(s3, bucket_name, prefix)
+    except ClientError as e:
+        print(f"Failed to resolve latest data version: {e}")
+        return fallback_version
+    return versions[0] if versions else fallback_version
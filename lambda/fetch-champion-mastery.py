@@ -1,23 +1,30 @@
 import json
+import os
 import boto3
 import urllib3
-from urllib.parse import quote
 from datetime import datetime
-import time
+from botocore.exceptions import ClientError
+from mastery_store import encode_mastery_table, get_mastery_rows, diff_mastery_rows
+from riot_api import get_api_key, make_api_request, resolve_account, account_error_response
+from data_versions import get_latest_version
+from key_layout import get_mastery_key, get_mastery_changes_key, get_mastery_history_key, save_riot_id_alias
+
+# Configuration - UPDATE THIS WITH YOUR BUCKET NAME
+BUCKET_NAME = 'rift-rewind-match-data-doyaji'  # Replace with your actual bucket name
 
 def lambda_handler(event, context):
     """
     Fetches League of Legends champion mastery data for a summoner using Riot ID.
-    Expected event: {"riotId": "GameName#TAG", "region": "kr"}
+    Expected event: {"riotId": "GameName#TAG", "region": "kr", "mode": "top" | "full"}
+    "top" stores the top 10 champions; "full" stores the whole pool in the compact
+    table layout and only writes when something changed since the last collection.
     """
     
-    # Configuration - UPDATE THIS WITH YOUR BUCKET NAME
-    bucket_name = 'rift-rewind-match-data-doyaji'  # Replace with your actual bucket name
-    
     try:
         # Parse the event
         riot_id = event.get('riotId', '').strip()
         region = event.get('region', 'kr')
+        mode = event.get('mode') or os.getenv('MASTERY_COLLECTION_MODE', 'top')
         
         # Validate input
         if not riot_id:
@@ -34,13 +41,8 @@ def lambda_handler(event, context):
             }
         
         # Get API key from Parameter Store
-        ssm = boto3.client('ssm')
         try:
-            parameter = ssm.get_parameter(
-                Name='/rift-rewind-challenge2/riot-api-key',
-                WithDecryption=True
-            )
-            api_key = parameter['Parameter']['Value']
+            api_key = get_api_key()
         except Exception as e:
             print(f"Failed to get API key: {str(e)}")
             return {
@@ -54,85 +56,11 @@ def lambda_handler(event, context):
         headers = {'X-Riot-Token': api_key}
         
         # Step 1: Get account PUUID using Riot ID
-        game_name, tag_line = riot_id.split('#', 1)
-        game_name = quote(game_name)
-        tag_line = quote(tag_line)
-        
-        routing_value = get_routing_value(region)
-        account_url = f"https://{routing_value}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-        
-        print(f"Fetching account data for {riot_id}")
-        account_response = make_api_request(http, 'GET', account_url, headers)
-        
-        if account_response['status'] == 404:
-            return {
-                'statusCode': 404,
-                'error': 'Riot ID not found. Check spelling and region.'
-            }
-        elif account_response['status'] == 403:
-            return {
-                'statusCode': 403,
-                'error': 'Your API key has expired. Please regenerate it in the Riot Developer Portal.'
-            }
-        elif account_response['status'] != 200:
-            return {
-                'statusCode': account_response['status'],
-                'error': f'Failed to fetch account: {account_response["status"]}'
-            }
-        
-        account_data = account_response['data']
-        puuid = account_data['puuid']
-        summoner_name = f"{account_data['gameName']}#{account_data['tagLine']}"
-        safe_summoner_name = summoner_name.replace(' ', '_')
-
-        # Step 2: Get top 10 champion mastery data directly using PUUID
-        mastery_url = f"https://{region}.api.riotgames.com/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top?count=10"
-        
-        print(f"Fetching champion mastery for {summoner_name}")
-        mastery_response = make_api_request(http, 'GET', mastery_url, headers)
-        
-        if mastery_response['status'] != 200:
-            return {
-                'statusCode': mastery_response['status'],
-                'error': f'Failed to fetch champion mastery: {mastery_response["status"]}'
-            }
-        
-        mastery_data = mastery_response['data']
-        
-        # Step 3: Process and enhance mastery data
-        processed_mastery = process_mastery_data(mastery_data, summoner_name, region)
-        
-        # Step 4: Save to S3 (single file, overwrite on each request)
-        s3_key = f"mastery-data/{safe_summoner_name}/mastery.json"
+        account_response = resolve_account(http, headers, riot_id, region, s3)
+        if account_response['status'] != 200:
+            return account_error_response(account_response['status'])
         
-        s3.put_object(
-            Bucket=bucket_name,
-            Key=s3_key,
-            Body=json.dumps(processed_mastery, indent=2),
-            ContentType='application/json'
-        )
-        
-        # Calculate summary statistics
-        total_score = sum(mastery.get('championPoints', 0) for mastery in processed_mastery['masteries'])
-        level_7_count = len([m for m in processed_mastery['masteries'] if m.get('championLevel', 0) == 7])
-        level_6_count = len([m for m in processed_mastery['masteries'] if m.get('championLevel', 0) == 6])
-        level_5_count = len([m for m in processed_mastery['masteries'] if m.get('championLevel', 0) == 5])
-        
-        return {
-            'statusCode': 200,
-            'summoner': summoner_name,
-            'region': region,
-            'totalScore': total_score,
-            'championCount': len(processed_mastery['masteries']),
-            'masteryLevels': {
-                'level7': level_7_count,
-                'level6': level_6_count,
-                'level5': level_5_count
-            },
-            'topChampions': processed_mastery['masteries'][:5],  # Top 5 champions
-            's3Location': s3_key,
-            'message': f'Successfully collected mastery data for {summoner_name}'
-        }
+        return collect_mastery(http, headers, s3, account_response['data'], region, mode)
         
     except Exception as e:
         print(f"Error: {str(e)}")
@@ -143,41 +71,142 @@ def lambda_handler(event, context):
             'error': 'Internal server error'
         }
 
-def make_api_request(http, method, url, headers, max_retries=3):
-    """Make API request with retry logic for rate limiting"""
-    for attempt in range(max_retries):
-        try:
-            response = http.request(method, url, headers=headers)
-            
-            # Handle rate limiting
-            if response.status == 429:
-                retry_after = int(response.headers.get('Retry-After', 1))
-                print(f"Rate limited. Waiting {retry_after} seconds before retry {attempt + 1}/{max_retries}")
-                time.sleep(retry_after)
-                continue
-            
-            # Parse response data if successful
-            data = None
-            if response.status == 200:
-                data = json.loads(response.data.decode('utf-8'))
-            
-            return {
-                'status': response.status,
-                'data': data,
-                'headers': dict(response.headers)
-            }
-            
-        except Exception as e:
-            print(f"Request attempt {attempt + 1} failed: {str(e)}")
-            if attempt == max_retries - 1:
-                raise
-            time.sleep(1)  # Wait before retry
+def collect_mastery(http, headers, s3, account_data, region, mode='top', progress=None):
+    """
+    Fetch and store champion mastery for an already-resolved account.
+    Library entry point for in-process orchestration; returns the same payload as lambda_handler.
+    progress, if given, is called as progress(stage, status, **details) for the 'mastery' stage.
+    """
+    progress = progress or (lambda stage, status, **details: None)
+    puuid = account_data['puuid']
+    summoner_name = f"{account_data['gameName']}#{account_data['tagLine']}"
+    save_riot_id_alias(s3, BUCKET_NAME, account_data)
+
+    # Step 2: Get champion mastery data directly using PUUID (top 10, or the full pool)
+    mastery_url = f"https://{region}.api.riotgames.com/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}"
+    if mode != 'full':
+        mastery_url += "/top?count=10"
+    
+    print(f"Fetching champion mastery for {summoner_name}")
+    progress('mastery', 'running')
+    mastery_response = make_api_request(http, 'GET', mastery_url, headers)
+    
+    if mastery_response['status'] != 200:
+        progress('mastery', 'failed')
+        return {
+            'statusCode': mastery_response['status'],
+            'error': f'Failed to fetch champion mastery: {mastery_response["status"]}'
+        }
+    
+    mastery_data = mastery_response['data']
+    
+    # Step 3: Process and enhance mastery data
+    processed_mastery = process_mastery_data(mastery_data, summoner_name, region)
+    
+    # Step 4: Save to S3 (single file, overwrite on each request)
+    s3_key = get_mastery_key(puuid)
+    
+    if mode == 'full':
+        changes = save_mastery_table(s3, BUCKET_NAME, s3_key, puuid, processed_mastery)
+    else:
+        changes = None
+        s3.put_object(
+            Bucket=BUCKET_NAME,
+            Key=s3_key,
+            Body=json.dumps(processed_mastery, indent=2),
+            ContentType='application/json'
+        )
+    
+    # Optional history mode: keep a timestamped snapshot to track progression over time
+    if os.getenv('MASTERY_HISTORY_ENABLED', 'false').lower() == 'true':
+        snapshot_time = datetime.now().strftime('%Y%m%dT%H%M%S')
+        s3.put_object(
+            Bucket=BUCKET_NAME,
+            Key=get_mastery_history_key(puuid, snapshot_time),
+            Body=json.dumps(processed_mastery),
+            ContentType='application/json'
+        )
+    
+    # Calculate summary statistics
+    total_score = sum(mastery.get('championPoints', 0) for mastery in processed_mastery['masteries'])
+    level_7_count = len([m for m in processed_mastery['masteries'] if m.get('championLevel', 0) == 7])
+    level_6_count = len([m for m in processed_mastery['masteries'] if m.get('championLevel', 0) == 6])
+    level_5_count = len([m for m in processed_mastery['masteries'] if m.get('championLevel', 0) == 5])
+    
+    progress('mastery', 'done', championCount=len(processed_mastery['masteries']))
     
     return {
-        'status': 500,
-        'data': None,
-        'headers': {}
+        'statusCode': 200,
+        'summoner': summoner_name,
+        'puuid': puuid,
+        'region': region,
+        'totalScore': total_score,
+        'championCount': len(processed_mastery['masteries']),
+        'masteryLevels': {
+            'level7': level_7_count,
+            'level6': level_6_count,
+            'level5': level_5_count
+        },
+        'topChampions': processed_mastery['masteries'][:5],  # Top 5 champions
+        's3Location': s3_key,
+        'mode': mode,
+        'changes': changes,
+        'message': f'Successfully collected mastery data for {summoner_name}'
+    }
+
+def save_mastery_table(s3, bucket_name, s3_key, puuid, processed_mastery):
+    """
+    Store full-pool mastery in the compact table layout, diffed against the previous collection.
+    Nothing is written when no row changed; otherwise the table is replaced and a changelog
+    holding only the changed rows is written next to it.
+    """
+    previous_document = None
+    try:
+        previous_response = s3.get_object(Bucket=bucket_name, Key=s3_key)
+        previous_document = json.loads(previous_response['Body'].read().decode('utf-8'))
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            raise
+    
+    table = encode_mastery_table(processed_mastery)
+    changed, removed = diff_mastery_rows(get_mastery_rows(previous_document), table['rows'])
+    
+    changes = {
+        'changedCount': len(changed),
+        'removedCount': len(removed),
+        'changelogLocation': None
     }
+    
+    if previous_document is not None and not changed and not removed:
+        print(f"Mastery unchanged for {processed_mastery.get('riotId', puuid)}, skipping write")
+        return changes
+    
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=s3_key,
+        Body=json.dumps(table, separators=(',', ':'), ensure_ascii=False),
+        ContentType='application/json'
+    )
+    
+    # The first collection is the baseline; later ones record what moved
+    if previous_document is not None:
+        changelog_key = get_mastery_changes_key(puuid, datetime.now().strftime('%Y%m%dT%H%M%S'))
+        changelog = {
+            'collectedAt': table['collectedAt'],
+            'previousCollectedAt': previous_document.get('collectedAt', ''),
+            'columns': table['columns'],
+            'changed': changed,
+            'removed': removed
+        }
+        s3.put_object(
+            Bucket=bucket_name,
+            Key=changelog_key,
+            Body=json.dumps(changelog, separators=(',', ':'), ensure_ascii=False),
+            ContentType='application/json'
+        )
+        changes['changelogLocation'] = changelog_key
+    
+    return changes
 
 def process_mastery_data(mastery_data, summoner_name, region):
     """Process and enhance mastery data with additional information"""
@@ -224,6 +253,11 @@ def process_mastery_data(mastery_data, summoner_name, region):
             'masteries': []
         }
 
+# Data Dragon patches published by upload_champion_data_to_s3.py (not the match data bucket)
+CHAMPION_DATA_BUCKET = os.getenv('CHAMPION_DATA_BUCKET', 'rift-rewind-web-doyaji')
+CHAMPION_DATA_PREFIX = os.getenv('CHAMPION_DATA_PREFIX', 'lol-data/')
+FALLBACK_DATA_VERSION = '15.21.1'
+
 # Global cache for champion mapping (Lambda container reuse)
 _champion_mapping_cache = None
 
@@ -238,11 +272,11 @@ def get_champion_id_mapping():
     try:
         # Load champion data from S3
         s3 = boto3.client('s3')
-        bucket_name = 'rift-rewind-web-doyaji'  # Same bucket as match data
-        champion_data_key = 'lol-data/15.21.1/data/en_US/champion.json'
+        version = get_latest_version(s3, CHAMPION_DATA_BUCKET, CHAMPION_DATA_PREFIX, FALLBACK_DATA_VERSION)
+        champion_data_key = f'{CHAMPION_DATA_PREFIX}{version}/data/en_US/champion.json'
         
-        print("Loading champion data from S3...")
-        obj_response = s3.get_object(Bucket=bucket_name, Key=champion_data_key)
+        print(f"Loading champion data for {version} from S3...")
+        obj_response = s3.get_object(Bucket=CHAMPION_DATA_BUCKET, Key=champion_data_key)
         champion_data = json.loads(obj_response['Body'].read().decode('utf-8'))
         
         # Create ID to name mapping
@@ -259,32 +293,11 @@ def get_champion_id_mapping():
         return mapping
         
     except Exception as e:
-        print(f"Failed to load champion data from S3: {str(e)}")
-        # Fallback to a basic mapping if S3 fails
+        # Not cached, so the next collection retries; champions outside the fallback are stored as Champion_<id>
+        print(f"ERROR: Failed to load champion data from s3://{CHAMPION_DATA_BUCKET}/{CHAMPION_DATA_PREFIX}: {str(e)}. "
+              f"Falling back to a 15-champion mapping; check CHAMPION_DATA_BUCKET and read access to it")
         return {
             "1": "Annie", "2": "Olaf", "3": "Galio", "4": "TwistedFate", "5": "XinZhao",
             "22": "Ashe", "51": "Caitlyn", "81": "Ezreal", "103": "Ahri", "157": "Yasuo",
             "202": "Jhin", "222": "Jinx", "238": "Zed", "266": "Aatrox", "777": "Yone"
         }
-
-def get_routing_value(region):
-    """Map platform region to routing value for Riot API"""
-    routing_map = {
-        'na1': 'americas',
-        'br1': 'americas',
-        'la1': 'americas',
-        'la2': 'americas',
-        'euw1': 'europe',
-        'eun1': 'europe',
-        'tr1': 'europe',
-        'ru': 'europe',
-        'kr': 'asia',
-        'jp1': 'asia',
-        'oc1': 'sea',
-        'ph2': 'sea',
-        'sg2': 'sea',
-        'th2': 'sea',
-        'tw2': 'sea',
-        'vn2': 'sea'
-    }
-    return routing_map.get(region, 'americas')
\ No newline at end of file
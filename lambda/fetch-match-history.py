@@ -1,9 +1,14 @@
-import json
 import boto3
 import urllib3
-from urllib.parse import quote
 from datetime import datetime
 from botocore.exceptions import ClientError
+from riot_api import get_api_key, get_routing_value, make_api_request, resolve_account, account_error_response
+from storage_codec import get_document, put_document
+from match_store import load_match, save_match, load_match_index, save_match_index
+from key_layout import get_match_key, get_match_stats_key, save_riot_id_alias
+
+# Configuration - UPDATE THIS WITH YOUR BUCKET NAME
+BUCKET_NAME = 'rift-rewind-match-data-doyaji'  # Replace with your actual bucket name
 
 def lambda_handler(event, context):
     """
@@ -11,9 +16,6 @@ def lambda_handler(event, context):
     Expected event: {"riotId": "GameName#TAG", "region": "na1", "count": 5}
     """
     
-    # Configuration - UPDATE THIS WITH YOUR BUCKET NAME
-    bucket_name = 'rift-rewind-match-data-doyaji'  # Replace with your actual bucket name
-    
     try:
         # Parse the event
         riot_id = event.get('riotId', '').strip()
@@ -35,13 +37,8 @@ def lambda_handler(event, context):
             }
         
         # Get API key from Parameter Store
-        ssm = boto3.client('ssm')
         try:
-            parameter = ssm.get_parameter(
-                Name='/rift-rewind-challenge2/riot-api-key',
-                WithDecryption=True
-            )
-            api_key = parameter['Parameter']['Value']
+            api_key = get_api_key()
         except Exception as e:
             print(f"Failed to get API key: {str(e)}")
             return {
@@ -55,150 +52,143 @@ def lambda_handler(event, context):
         headers = {'X-Riot-Token': api_key}
         
         # Step 1: Get account PUUID using Riot ID
-        game_name, tag_line = riot_id.split('#', 1)
-        game_name = quote(game_name)
-        tag_line = quote(tag_line)
-        
-        routing_value = get_routing_value(region)
-        account_url = f"https://{routing_value}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
+        account_response = resolve_account(http, headers, riot_id, region, s3)
+        if account_response['status'] != 200:
+            return account_error_response(account_response['status'])
         
-        print(f"Fetching account data for {riot_id}")
-        account_response = http.request('GET', account_url, headers=headers)
+        return collect_match_history(http, headers, s3, account_response['data'], region, match_count)
         
-        if account_response.status == 404:
-            return {
-                'statusCode': 404,
-                'error': 'Riot ID not found. Check spelling and region.'
-            }
-        elif account_response.status == 403:
-            return {
-                'statusCode': 403,
-                'error': 'Your API key has expired. Please regenerate it in the Riot Developer Portal.'
-            }
-        elif account_response.status != 200:
-            return {
-                'statusCode': account_response.status,
-                'error': f'Failed to fetch account: {account_response.status}'
-            }
-        
-        account_data = json.loads(account_response.data.decode('utf-8'))
-        puuid = account_data['puuid']
-        summoner_name = f"{account_data['gameName']}#{account_data['tagLine']}"
-        safe_summoner_name = summoner_name.replace(' ', '_')
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {
+            'statusCode': 500,
+            'error': 'Internal server error'
+        }
 
-        # Step 2: Get match list
-        match_list_url = f"https://{routing_value}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count={match_count}"
-        
-        print(f"Fetching match list for {summoner_name}")
-        match_list_response = http.request('GET', match_list_url, headers=headers)
-        
-        if match_list_response.status != 200:
-            return {
-                'statusCode': match_list_response.status,
-                'error': f'Failed to fetch match list: {match_list_response.status}'
-            }
-        
-        match_ids = json.loads(match_list_response.data.decode('utf-8'))
-        
-        if not match_ids:
-            return {
-                'statusCode': 404,
-                'error': 'No matches found for this summoner'
-            }
+def collect_match_history(http, headers, s3, account_data, region, match_count, progress=None, match_cache=None):
+    """
+    Fetch and store recent matches for an already-resolved account.
+    Library entry point for in-process orchestration; returns the same payload as lambda_handler.
+    progress, if given, is called as progress(stage, status, **details) for the
+    'matchList' and 'matches' stages.
+    Matches already in the global store (matches/{platform}/{matchId}.json) are not fetched
+    again. match_cache, if given, is a dict-like {matchId: match data} shared between calls
+    that also saves the store read.
+    """
+    progress = progress or (lambda stage, status, **details: None)
+    puuid = account_data['puuid']
+    summoner_name = f"{account_data['gameName']}#{account_data['tagLine']}"
+    routing_value = get_routing_value(region)
+    save_riot_id_alias(s3, BUCKET_NAME, account_data)
+
+    # Step 2: Get match list
+    match_list_url = f"https://{routing_value}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count={match_count}"
+    
+    print(f"Fetching match list for {summoner_name}")
+    progress('matchList', 'running')
+    match_list_response = make_api_request(http, 'GET', match_list_url, headers)
+    
+    if match_list_response['status'] != 200:
+        progress('matchList', 'failed')
+        return {
+            'statusCode': match_list_response['status'],
+            'error': f'Failed to fetch match list: {match_list_response["status"]}'
+        }
+    
+    match_ids = match_list_response['data']
+    progress('matchList', 'done', total=len(match_ids or []))
+    
+    if not match_ids:
+        return {
+            'statusCode': 404,
+            'error': 'No matches found for this summoner'
+        }
+    
+    # Step 3: Fetch and process each match
+    # Full match data lives once in the global store; the summoner keeps stats and a reference index
+    match_index = load_match_index(s3, BUCKET_NAME, puuid)
+    index_changed = False
+    processed_matches = []
+    
+    for i, match_id in enumerate(match_ids):
+        print(f"Processing match {i+1}/{len(match_ids)}: {match_id}")
+        progress('matches', 'running', completed=i, total=len(match_ids))
         
-        # Step 3: Fetch and process each match
-        processed_matches = []
+        match_key = get_match_key(match_id)
+        stats_key = get_match_stats_key(puuid, match_id)
         
-        for i, match_id in enumerate(match_ids):
-            print(f"Processing match {i+1}/{len(match_ids)}: {match_id}")
-            
-            # Use match_id as filename (no timestamp) to avoid duplicates
-            full_key = f"match-history/{safe_summoner_name}/full/{match_id}.json"
-            stats_key = f"match-history/{safe_summoner_name}/stats/{match_id}.json"
-            
-            # Check if match already exists in S3 to avoid re-fetching
+        # Already collected for this summoner: reuse the stored stats
+        if match_id in match_index['matches']:
             try:
-                s3.head_object(Bucket=bucket_name, Key=full_key)
+                player_stats = get_document(s3, BUCKET_NAME, stats_key)
                 print(f"Match {match_id} already exists, skipping API call")
-                
-                # Load existing stats
-                stats_response = s3.get_object(Bucket=bucket_name, Key=stats_key)
-                player_stats = json.loads(stats_response['Body'].read().decode('utf-8'))
-                
-                processed_matches.append({
-                    'matchId': match_id,
-                    'champion': player_stats.get('championName'),
-                    'kda': f"{player_stats.get('kills', 0)}/{player_stats.get('deaths', 0)}/{player_stats.get('assists', 0)}",
-                    'win': player_stats.get('win'),
-                    'fullDataLocation': full_key,
-                    'statsLocation': stats_key,
-                    'cached': True
-                })
+                processed_matches.append(summarize_match(match_id, player_stats, match_key, stats_key, cached=True))
                 continue
             except ClientError as e:
-                # Match doesn't exist (404), fetch from API
-                if e.response['Error']['Code'] == '404':
-                    print(f"Match {match_id} not found in S3, fetching from API")
-                else:
-                    print(f"S3 error checking match {match_id}: {e}")
-                    continue
-            
+                print(f"Stats for match {match_id} unavailable, rebuilding: {e}")
+        
+        # Played with another tracked summoner: this run's cache, then the global store
+        match_data = match_cache.get(match_id) if match_cache is not None else None
+        if match_data is None:
+            match_data = load_match(s3, BUCKET_NAME, match_id)
+        
+        cached = match_data is not None
+        if cached:
+            print(f"Match {match_id} already stored, skipping API call")
+        else:
             # Get full match data from Riot API
             match_url = f"https://{routing_value}.api.riotgames.com/lol/match/v5/matches/{match_id}"
-            match_response = http.request('GET', match_url, headers=headers)
+            match_response = make_api_request(http, 'GET', match_url, headers)
             
-            if match_response.status != 200:
-                print(f"Failed to fetch match {match_id}: {match_response.status}")
+            if match_response['status'] != 200:
+                print(f"Failed to fetch match {match_id}: {match_response['status']}")
                 continue
             
-            match_data = json.loads(match_response.data.decode('utf-8'))
-            
-            # Save full match data to S3 (overwrites if exists)
-            s3.put_object(
-                Bucket=bucket_name,
-                Key=full_key,
-                Body=json.dumps(match_data, indent=2),
-                ContentType='application/json'
-            )
-            
-            # Extract player stats
-            player_stats = extract_player_stats(match_data, puuid)
-            if player_stats:
-                # Save extracted stats to S3 (overwrites if exists)
-                s3.put_object(
-                    Bucket=bucket_name,
-                    Key=stats_key,
-                    Body=json.dumps(player_stats, indent=2),
-                    ContentType='application/json'
-                )
-                
-                processed_matches.append({
-                    'matchId': match_id,
-                    'champion': player_stats.get('championName'),
-                    'kda': f"{player_stats.get('kills', 0)}/{player_stats.get('deaths', 0)}/{player_stats.get('assists', 0)}",
-                    'win': player_stats.get('win'),
-                    'fullDataLocation': full_key,
-                    'statsLocation': stats_key,
-                    'cached': False
-                })
+            match_data = match_response['data']
+            save_match(s3, BUCKET_NAME, match_id, match_data)
         
-        return {
-            'statusCode': 200,
-            'summoner': summoner_name,
-            'region': region,
-            'matchesProcessed': len(processed_matches),
-            'matches': processed_matches,
-            'message': f'Successfully processed {len(processed_matches)} matches for {summoner_name}'
-        }
+        if match_cache is not None:
+            match_cache[match_id] = match_data
         
-    except Exception as e:
-        print(f"Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return {
-            'statusCode': 500,
-            'error': 'Internal server error'
-        }
+        # Extract player stats
+        player_stats = extract_player_stats(match_data, puuid)
+        if player_stats:
+            # Save extracted stats to S3 (overwrites if exists)
+            put_document(s3, BUCKET_NAME, stats_key, player_stats)
+            
+            match_index['matches'][match_id] = match_key
+            index_changed = True
+            processed_matches.append(summarize_match(match_id, player_stats, match_key, stats_key, cached=cached))
+    
+    if index_changed:
+        match_index['summoner'] = summoner_name
+        save_match_index(s3, BUCKET_NAME, puuid, match_index)
+    
+    progress('matches', 'done', completed=len(match_ids), total=len(match_ids), stored=len(processed_matches))
+    
+    return {
+        'statusCode': 200,
+        'summoner': summoner_name,
+        'puuid': puuid,
+        'region': region,
+        'matchesProcessed': len(processed_matches),
+        'matches': processed_matches,
+        'message': f'Successfully processed {len(processed_matches)} matches for {summoner_name}'
+    }
+
+def summarize_match(match_id, player_stats, match_key, stats_key, cached):
+    """Per-match entry of the collection response"""
+    return {
+        'matchId': match_id,
+        'champion': player_stats.get('championName'),
+        'kda': f"{player_stats.get('kills', 0)}/{player_stats.get('deaths', 0)}/{player_stats.get('assists', 0)}",
+        'win': player_stats.get('win'),
+        'fullDataLocation': match_key,
+        'statsLocation': stats_key,
+        'cached': cached
+    }
 
 def extract_player_stats(match_data, puuid):
     """Extract relevant player statistics from match data"""
@@ -260,25 +250,3 @@ def extract_player_stats(match_data, puuid):
     except Exception as e:
         print(f"Error extracting player stats: {str(e)}")
         return None
-
-def get_routing_value(region):
-    """Map platform region to routing value for Riot API"""
-    routing_map = {
-        'na1': 'americas',
-        'br1': 'americas',
-        'la1': 'americas',
-        'la2': 'americas',
-        'euw1': 'europe',
-        'eun1': 'europe',
-        'tr1': 'europe',
-        'ru': 'europe',
-        'kr': 'asia',
-        'jp1': 'asia',
-        'oc1': 'sea',
-        'ph2': 'sea',
-        'sg2': 'sea',
-        'th2': 'sea',
-        'tw2': 'sea',
-        'vn2': 'sea'
-    }
-    return routing_map.get(region, 'americas')
\ No newline at end of file
@@ -0,0 +1,52 @@
+import json
+import boto3
+from collection_jobs import is_valid_job_id, load_job
+
+def lambda_handler(event, context):
+    """
+    Returns the status and per-stage progress of an async summoner collection job.
+    Expected path parameter: jobId
+    """
+    
+    try:
+        path_parameters = event.get('pathParameters') or {}
+        job_id = path_parameters.get('jobId', '')
+        
+        if not is_valid_job_id(job_id):
+            return create_response(400, {
+                'error': 'Invalid job ID',
+                'message': 'Please provide the job ID returned by /summoner/search'
+            })
+        
+        s3 = boto3.client('s3')
+        job = load_job(s3, job_id)
+        
+        if not job:
+            return create_response(404, {
+                'error': 'Job not found',
+                'message': f'No collection job found with ID {job_id}'
+            })
+        
+        return create_response(200, job)
+        
+    except Exception as e:
+        print(f"Error retrieving job: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return create_response(500, {
+            'error': 'Internal server error',
+            'message': 'An unexpected error occurred while retrieving the job'
+        })
+
+def create_response(status_code, body):
+    """Create a properly formatted API Gateway response"""
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'
+        },
+        'body': json.dumps(body, ensure_ascii=False)
+    }
@@ -2,6 +2,16 @@ import json
 import boto3
 from urllib.parse import unquote
 from datetime import datetime
+from botocore.exceptions import ClientError
+from summoner_profile import build_mastery_profile
+from mastery_store import decode_mastery_document
+from key_layout import get_mastery_key, get_mastery_history_prefix, resolve_puuid
+
+# Initialize S3 client once per container
+s3 = boto3.client('s3')
+
+# Processed mastery responses cached per container, keyed by S3 key and validated by ETag
+_mastery_cache = {}
 
 def lambda_handler(event, context):
     """
@@ -33,67 +43,35 @@ def lambda_handler(event, context):
                 'message': 'Please use Riot ID format: GameName#TAG (e.g., Hide on bush#KR1)'
             })
         
-        # Convert to safe name for S3 path
-        safe_summoner_name = riot_id.replace(' ', '_')
-        
-        # Initialize S3 client
-        s3 = boto3.client('s3')
-        
-        # List objects in the summoner's mastery directory
-        mastery_prefix = f"mastery-data/{safe_summoner_name}/"
-        
-        try:
-            response = s3.list_objects_v2(
-                Bucket=bucket_name,
-                Prefix=mastery_prefix,
-                MaxKeys=50  # Should be plenty for mastery files
-            )
-        except Exception as e:
-            print(f"Failed to list S3 objects: {str(e)}")
-            return create_response(500, {
-                'error': 'Failed to access mastery data',
-                'message': 'Could not retrieve mastery data from storage'
-            })
-        
-        if 'Contents' not in response:
+        # Stored data is keyed by PUUID; the alias is written when the summoner is collected
+        puuid = resolve_puuid(s3, bucket_name, riot_id)
+        if not puuid:
             return create_response(404, {
                 'error': 'No mastery data found',
                 'message': f'No mastery data found for {riot_id}. Please collect data first.'
             })
         
-        # Get the most recent mastery file
-        mastery_files = sorted(
-            response['Contents'],
-            key=lambda x: x['LastModified'],
-            reverse=True
-        )
-        
-        if not mastery_files:
-            return create_response(404, {
-                'error': 'No mastery files found',
-                'message': f'No mastery files found for {riot_id}'
-            })
+        query_parameters = event.get('queryStringParameters') or {}
+        if query_parameters.get('history', '').lower() == 'true':
+            return create_response(200, get_mastery_history(bucket_name, riot_id, puuid))
         
-        # Get the most recent mastery data
-        latest_file = mastery_files[0]
+        # fetch-champion-mastery always writes this single key, so read it directly
+        mastery_key = get_mastery_key(puuid)
         
         try:
-            obj_response = s3.get_object(
-                Bucket=bucket_name,
-                Key=latest_file['Key']
-            )
-            
-            mastery_data = json.loads(obj_response['Body'].read().decode('utf-8'))
-            
+            processed_data = get_latest_mastery(bucket_name, mastery_key)
         except Exception as e:
-            print(f"Failed to read mastery file {latest_file['Key']}: {str(e)}")
+            print(f"Failed to read mastery file {mastery_key}: {str(e)}")
             return create_response(500, {
                 'error': 'Failed to process mastery data',
                 'message': 'Could not read mastery data file'
             })
         
-        # Process and enhance the mastery data
-        processed_data = process_mastery_data(mastery_data, latest_file)
+        if processed_data is None:
+            return create_response(404, {
+                'error': 'No mastery data found',
+                'message': f'No mastery data found for {riot_id}. Please collect data first.'
+            })
         
         return create_response(200, processed_data)
         
@@ -106,74 +84,85 @@ def lambda_handler(event, context):
             'message': 'An unexpected error occurred while retrieving mastery data'
         })
 
-def process_mastery_data(mastery_data, file_info):
-    """Process and enhance mastery data with additional statistics"""
+def get_latest_mastery(bucket_name, mastery_key):
+    """
+    Return processed mastery data for a key with a single conditional GET.
+    A cached response is revalidated with IfNoneMatch and reused on 304 Not Modified.
+    Returns None when no mastery data has been collected.
+    """
+    cached = _mastery_cache.get(mastery_key)
+    request_args = {'Bucket': bucket_name, 'Key': mastery_key}
+    if cached:
+        request_args['IfNoneMatch'] = cached['etag']
+    
     try:
-        masteries = mastery_data.get('masteries', [])
-        
-        # Calculate statistics
-        total_score = mastery_data.get('totalScore', 0)
-        total_champions = len(masteries)
-        
-        # Count by mastery levels
-        level_counts = {}
-        for i in range(1, 8):
-            level_counts[f'level{i}'] = len([m for m in masteries if m.get('championLevel', 0) == i])
-        
-        # Get top champions by points
-        top_champions = masteries[:10]  # Already sorted by points in the original data
-        
-        # Calculate average points per champion
-        avg_points = total_score / total_champions if total_champions > 0 else 0
-        
-        # Find champions with tokens earned (for level 6/7 upgrades)
-        champions_with_tokens = [
-            m for m in masteries 
-            if m.get('tokensEarned', 0) > 0
-        ]
-        
-        # Find champions with chests available
-        chest_available = [
-            m for m in masteries 
-            if not m.get('chestGranted', True)
-        ]
-        
-        return {
-            'summoner': mastery_data.get('riotId', ''),
-            'region': mastery_data.get('region', ''),
-            'collectedAt': mastery_data.get('collectedAt', ''),
-            'totalScore': total_score,
-            'totalChampions': total_champions,
-            'averagePoints': round(avg_points, 0),
-            'masteryLevels': level_counts,
-            'topChampions': top_champions,
-            'championsWithTokens': champions_with_tokens,
-            'chestsAvailable': len(chest_available),
-            'allMasteries': masteries,
-            'fileInfo': {
-                's3Location': file_info['Key'],
-                'lastModified': file_info['LastModified'].isoformat(),
-                'fileSize': file_info['Size']
-            },
-            'statistics': {
-                'highestLevel': max([m.get('championLevel', 0) for m in masteries]) if masteries else 0,
-                'highestPoints': max([m.get('championPoints', 0) for m in masteries]) if masteries else 0,
-                'averageLevel': round(sum([m.get('championLevel', 0) for m in masteries]) / len(masteries), 2) if masteries else 0
-            }
-        }
-        
-    except Exception as e:
-        print(f"Error processing mastery data: {str(e)}")
-        # Return basic data if processing fails
-        return {
-            'summoner': mastery_data.get('riotId', ''),
-            'region': mastery_data.get('region', ''),
-            'collectedAt': mastery_data.get('collectedAt', ''),
-            'totalScore': mastery_data.get('totalScore', 0),
-            'totalChampions': len(mastery_data.get('masteries', [])),
-            'allMasteries': mastery_data.get('masteries', []),
-            'error': 'Some statistics could not be calculated'
-        }
+        obj_response = s3.get_object(**request_args)
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        if cached and error_code in ('304', 'NotModified'):
+            return cached['data']
+        if error_code in ('NoSuchKey', '404'):
+            _mastery_cache.pop(mastery_key, None)
+            return None
+        raise
+    
+    body = obj_response['Body'].read()
+    mastery_data = decode_mastery_document(json.loads(body.decode('utf-8')))
+    file_info = {
+        'Key': mastery_key,
+        'LastModified': obj_response['LastModified'],
+        'Size': obj_response.get('ContentLength', len(body))
+    }
+    
+    processed_data = build_mastery_profile(mastery_data, file_info)
+    _mastery_cache[mastery_key] = {
+        'etag': obj_response['ETag'],
+        'data': processed_data
+    }
+    
+    return processed_data
+
+def get_mastery_history(bucket_name, riot_id, puuid):
+    """
+    Summarize the timestamped snapshots written by fetch-champion-mastery in history mode.
+    Only used for ?history=true, so the latest-read path never lists the prefix.
+    """
+    history_prefix = get_mastery_history_prefix(puuid)
+    
+    snapshots = []
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=history_prefix):
+        for obj in page.get('Contents', []):
+            try:
+                obj_response = s3.get_object(Bucket=bucket_name, Key=obj['Key'])
+                snapshot = decode_mastery_document(json.loads(obj_response['Body'].read().decode('utf-8')))
+            except Exception as e:
+                print(f"Failed to read mastery snapshot {obj['Key']}: {str(e)}")
+                continue
+            
+            snapshots.append({
+                'collectedAt': snapshot.get('collectedAt', ''),
+                'totalScore': snapshot.get('totalScore', 0),
+                'championCount': len(snapshot.get('masteries', [])),
+                'champions': {
+                    str(m.get('championId')): {
+                        'championLevel': m.get('championLevel', 0),
+                        'championPoints': m.get('championPoints', 0)
+                    }
+                    for m in snapshot.get('masteries', [])
+                },
+                's3Location': obj['Key']
+            })
+    
+    # Snapshot keys are timestamps, but sort on the recorded time to be safe
+    snapshots.sort(key=lambda x: x['collectedAt'])
+    
+    return {
+        'summoner': riot_id,
+        'snapshotCount': len(snapshots),
+        'snapshots': snapshots,
+        'dataLocation': history_prefix
+    }
 
 def create_response(status_code, body):
     """Create a properly formatted API Gateway response"""
@@ -2,6 +2,9 @@ import json
 import boto3
 from urllib.parse import unquote
 from datetime import datetime
+from summoner_profile import build_match_history
+from storage_codec import decode_document
+from key_layout import get_match_stats_prefix, resolve_puuid
 
 def lambda_handler(event, context):
     """
@@ -33,14 +36,19 @@ def lambda_handler(event, context):
                 'message': 'Please use Riot ID format: GameName#TAG (e.g., Hide on bush#KR1)'
             })
         
-        # Convert to safe name for S3 path
-        safe_summoner_name = riot_id.replace(' ', '_')
-        
         # Initialize S3 client
         s3 = boto3.client('s3')
         
+        # Stored data is keyed by PUUID; the alias is written when the summoner is collected
+        puuid = resolve_puuid(s3, bucket_name, riot_id)
+        if not puuid:
+            return create_response(404, {
+                'error': 'No match data found',
+                'message': f'No match history found for {riot_id}. Please collect data first.'
+            })
+        
         # List objects in the summoner's match history directory
-        stats_prefix = f"match-history/{safe_summoner_name}/stats/"
+        stats_prefix = get_match_stats_prefix(puuid)
         
         try:
             response = s3.list_objects_v2(
@@ -78,7 +86,7 @@ def lambda_handler(event, context):
                     Key=match_file['Key']
                 )
                 
-                match_data = json.loads(obj_response['Body'].read().decode('utf-8'))
+                match_data = decode_document(obj_response['Body'].read())
                 
                 # Add metadata
                 match_data['s3Location'] = match_file['Key']
@@ -97,51 +105,7 @@ def lambda_handler(event, context):
                 'message': f'Match files exist but could not be processed for {riot_id}'
             })
         
-        # Calculate summary statistics
-        total_matches = len(matches)
-        wins = sum(1 for match in matches if match.get('win', False))
-        losses = total_matches - wins
-        win_rate = (wins / total_matches * 100) if total_matches > 0 else 0
-        
-        # Get champion statistics
-        champion_stats = {}
-        for match in matches:
-            champion = match.get('championName', 'Unknown')
-            if champion not in champion_stats:
-                champion_stats[champion] = {'games': 0, 'wins': 0}
-            
-            champion_stats[champion]['games'] += 1
-            if match.get('win', False):
-                champion_stats[champion]['wins'] += 1
-        
-        # Sort champions by games played
-        top_champions = sorted(
-            champion_stats.items(),
-            key=lambda x: x[1]['games'],
-            reverse=True
-        )[:5]
-        
-        return create_response(200, {
-            'summoner': riot_id,
-            'totalMatches': total_matches,
-            'summary': {
-                'wins': wins,
-                'losses': losses,
-                'winRate': round(win_rate, 1)
-            },
-            'topChampions': [
-                {
-                    'championName': champ[0],
-                    'games': champ[1]['games'],
-                    'wins': champ[1]['wins'],
-                    'winRate': round((champ[1]['wins'] / champ[1]['games'] * 100), 1)
-                }
-                for champ in top_champions
-            ],
-            'matches': matches,
-            'dataLocation': stats_prefix,
-            'lastUpdated': matches[0]['lastModified'] if matches else None
-        })
+        return create_response(200, build_match_history(riot_id, matches, stats_prefix))
         
     except Exception as e:
         print(f"Error retrieving match data: {str(e)}")
@@ -0,0 +1,86 @@
+import json
+import boto3
+from urllib.parse import unquote
+from botocore.exceptions import ClientError
+from key_layout import get_profile_key, resolve_puuid
+
+def lambda_handler(event, context):
+    """
+    Retrieves the precomputed summoner profile (match summary, recent matches and mastery)
+    written by the collection pipeline. One S3 GET per request once the Riot ID's PUUID is cached.
+    Expected path parameter: riotId (URL encoded)
+    """
+    
+    # Configuration
+    bucket_name = 'rift-rewind-match-data-doyaji'  # Replace with your actual bucket name
+    
+    try:
+        # Extract riot ID from path parameters
+        path_parameters = event.get('pathParameters', {})
+        riot_id = path_parameters.get('riotId', '')
+        
+        if not riot_id:
+            return create_response(400, {
+                'error': 'Riot ID is required',
+                'message': 'Please provide a valid Riot ID in the path'
+            })
+        
+        # URL decode the riot ID
+        riot_id = unquote(riot_id)
+        
+        # Validate Riot ID format
+        if '#' not in riot_id:
+            return create_response(400, {
+                'error': 'Invalid Riot ID format',
+                'message': 'Please use Riot ID format: GameName#TAG (e.g., Hide on bush#KR1)'
+            })
+        
+        s3 = boto3.client('s3')
+        
+        # Stored data is keyed by PUUID; the alias is written when the summoner is collected
+        puuid = resolve_puuid(s3, bucket_name, riot_id)
+        if not puuid:
+            return create_response(404, {
+                'error': 'No profile found',
+                'message': f'No profile found for {riot_id}. Please collect data first.'
+            })
+        profile_key = get_profile_key(puuid)
+        
+        try:
+            obj_response = s3.get_object(Bucket=bucket_name, Key=profile_key)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                return create_response(404, {
+                    'error': 'No profile found',
+                    'message': f'No profile found for {riot_id}. Please collect data first.'
+                })
+            print(f"Failed to read profile {profile_key}: {str(e)}")
+            return create_response(500, {
+                'error': 'Failed to access profile data',
+                'message': 'Could not retrieve profile from storage'
+            })
+        
+        # The document is stored in its response shape; pass it through without re-encoding
+        return create_response(200, obj_response['Body'].read().decode('utf-8'))
+        
+    except Exception as e:
+        print(f"Error retrieving profile data: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return create_response(500, {
+            'error': 'Internal server error',
+            'message': 'An unexpected error occurred while retrieving profile data'
+        })
+
+def create_response(status_code, body):
+    """Create a properly formatted API Gateway response (body may be a dict or pre-encoded JSON)"""
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'
+        },
+        'body': body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)
+    }
@@ -0,0 +1,200 @@
+"""
+Canonical S3 key layout for summoner data.
+
+Every component (collectors, read endpoints, orchestration, CLI tools and the agent
+runtime) builds keys through this module. Summoner data is anchored on the account
+PUUID, which never changes and needs no escaping:
+
+    summoners/{puuid}/profile.json
+    summoners/{puuid}/freshness.json
+    summoners/{puuid}/matches/index.json
+    summoners/{puuid}/matches/stats/{matchId}.json
+    summoners/{puuid}/mastery/mastery.json
+    summoners/{puuid}/mastery/changes/{timestamp}.json
+    summoners/{puuid}/mastery/history/{timestamp}.json
+    matches/{platform}/{matchId}.json
+
+Riot IDs are resolved to PUUIDs through alias objects keyed by the normalized
+(case-folded, whitespace-collapsed) Riot ID:
+
+    summoners/by-riot-id/{normalized Riot ID, URL-quoted}.json
+
+The legacy_* helpers describe the old name-based layout and are only used by the
+migration tool.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote
+
+from botocore.exceptions import ClientError
+
+SUMMONER_PREFIX = 'summoners/'
+ALIAS_PREFIX = f"{SUMMONER_PREFIX}by-riot-id/"
+
+# Riot ID -> PUUID aliases kept per container, re-read after the TTL (a Riot ID can move to another account)
+ALIAS_CACHE_SIZE = int(os.getenv('ALIAS_CACHE_SIZE', '1024'))
+ALIAS_CACHE_TTL_SECONDS = int(os.getenv('ALIAS_CACHE_TTL_SECONDS', '3600'))
+
+_alias_cache = OrderedDict()
+_alias_cache_lock = threading.Lock()
+
+
+def normalize_riot_id(riot_id):
+    """Canonical form of a Riot ID: case-folded, surrounding and repeated whitespace removed"""
+    game_name, _, tag_line = riot_id.partition('#')
+    return f"{' '.join(game_name.split())}#{tag_line.strip()}".casefold()
+
+
+def get_riot_id_alias_key(riot_id):
+    """S3 key of the Riot ID -> PUUID alias"""
+    return f"{ALIAS_PREFIX}{quote(normalize_riot_id(riot_id), safe='')}.json"
+
+
+def get_summoner_prefix(puuid):
+    """Prefix holding everything stored for one account"""
+    return f"{SUMMONER_PREFIX}{puuid}/"
+
+
+def get_profile_key(puuid):
+    """Precomputed profile document served by /summoner/{riotId}/profile"""
+    return f"{get_summoner_prefix(puuid)}profile.json"
+
+
+def get_freshness_key(puuid):
+    """Per-data-type lastCollectedAt metadata"""
+    return f"{get_summoner_prefix(puuid)}freshness.json"
+
+
+def get_match_index_key(puuid):
+    """Reference index mapping the summoner's match IDs to global match keys"""
+    return f"{get_summoner_prefix(puuid)}matches/index.json"
+
+
+def get_match_stats_prefix(puuid):
+    """Prefix of the summoner's per-match stats"""
+    return f"{get_summoner_prefix(puuid)}matches/stats/"
+
+
+def get_match_stats_key(puuid, match_id):
+    """The summoner's stats for one match"""
+    return f"{get_match_stats_prefix(puuid)}{match_id}.json"
+
+
+def get_mastery_key(puuid):
+    """Latest champion mastery document"""
+    return f"{get_summoner_prefix(puuid)}mastery/mastery.json"
+
+
+def get_mastery_changes_key(puuid, timestamp):
+    """Changelog of mastery rows changed by one collection"""
+    return f"{get_summoner_prefix(puuid)}mastery/changes/{timestamp}.json"
+
+
+def get_mastery_history_prefix(puuid):
+    """Prefix of timestamped mastery snapshots"""
+    return f"{get_summoner_prefix(puuid)}mastery/history/"
+
+
+def get_mastery_history_key(puuid, timestamp):
+    """One timestamped mastery snapshot"""
+    return f"{get_mastery_history_prefix(puuid)}{timestamp}.json"
+
+
+def get_match_platform(match_id):
+    """Platform a match was played on, from its ID (e.g. 'KR_7312345' -> 'kr')"""
+    return match_id.split('_', 1)[0].lower()
+
+
+def get_match_key(match_id):
+    """S3 key of a match in the global store"""
+    return f"matches/{get_match_platform(match_id)}/{match_id}.json"
+
+
+def save_riot_id_alias(s3, bucket_name, account_data):
+    """Record the Riot ID -> PUUID alias for a resolved account (skipped if already known here)"""
+    riot_id = f"{account_data['gameName']}#{account_data['tagLine']}"
+    alias_key = get_riot_id_alias_key(riot_id)
+
+    with _alias_cache_lock:
+        entry = _alias_cache.get(alias_key)
+        if entry and entry['puuid'] == account_data['puuid'] and entry['expiresAt'] > time.time():
+            return
+
+    alias = {
+        'puuid': account_data['puuid'],
+        'gameName': account_data['gameName'],
+        'tagLine': account_data['tagLine']
+    }
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=alias_key,
+        Body=json.dumps(alias, ensure_ascii=False),
+        ContentType='application/json'
+    )
+    remember_alias(alias_key, account_data['puuid'])
+
+
+def resolve_puuid(s3, bucket_name, riot_id):
+    """PUUID of a previously collected Riot ID (None if it was never collected)"""
+    alias_key = get_riot_id_alias_key(riot_id)
+
+    with _alias_cache_lock:
+        entry = _alias_cache.get(alias_key)
+        if entry and entry['expiresAt'] > time.time():
+            _alias_cache.move_to_end(alias_key)
+            return entry['puuid']
+
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=alias_key)
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            raise
+        return None
+
+    puuid = json.loads(response['Body'].read().decode('utf-8'))['puuid']
+    remember_alias(alias_key, puuid)
+    return puuid
+
+
+def remember_alias(alias_key, puuid):
+    """Add an alias to the container LRU for ALIAS_CACHE_TTL_SECONDS, evicting the least recently used"""
+    with _alias_cache_lock:
+        _alias_cache[alias_key] = {'puuid': puuid, 'expiresAt': time.time() + ALIAS_CACHE_TTL_SECONDS}
+        _alias_cache.move_to_end(alias_key)
+        while len(_alias_cache) > ALIAS_CACHE_SIZE:
+            _alias_cache.popitem(last=False)
+
+
+def get_legacy_summoner_name(riot_id):
+    """Folder name of the old name-based layout ('Hide on bush#KR1' -> 'Hide_on_bush#KR1')"""
+    return riot_id.replace(' ', '_')
+
+
+def get_legacy_match_index_key(legacy_name):
+    """Match reference index of the old layout, written by migrate_match_store.py"""
+    return f"match-history/{legacy_name}/index.json"
+
+
+LEGACY_PREFIXES = {
+    # old prefix -> function(puuid, relative key) giving the canonical key
+    'match-history/': lambda puuid, rest: (
+        get_match_index_key(puuid) if rest == 'index.json'
+        else f"{get_summoner_prefix(puuid)}matches/{rest}" if rest.startswith('stats/')
+        else None
+    ),
+    'mastery-data/': lambda puuid, rest: f"{get_summoner_prefix(puuid)}mastery/{rest}",
+    'profiles/': lambda puuid, rest: f"{get_summoner_prefix(puuid)}{rest}"
+}
+
+
+def get_canonical_key(legacy_key, puuid):
+    """Canonical key for an object of the old layout (None for objects that do not move, e.g. full/ match copies)"""
+    for prefix, to_canonical in LEGACY_PREFIXES.items():
+        if legacy_key.startswith(prefix):
+            rest = legacy_key[len(prefix):].split('/', 1)[1]
+            return to_canonical(puuid, rest)
+    return None
@@ -0,0 +1,86 @@
+"""
+Compact mastery storage shared by the mastery collector and readers.
+
+Full-pool mastery (~170 champions) is stored as a column list plus one row array per
+champion, keyed by champion key:
+
+    {"format": "table", "columns": [...], "rows": {"103": [7, 215000, ...]}, ...}
+
+Readers call decode_mastery_document, which accepts both this layout and the original
+list-of-dicts mastery.json, so the two formats can coexist in the bucket.
+"""
+
+MASTERY_TABLE_FORMAT = 'table'
+
+MASTERY_COLUMNS = [
+    'championName',
+    'championLevel',
+    'championPoints',
+    'lastPlayTime',
+    'championPointsSinceLastLevel',
+    'championPointsUntilNextLevel',
+    'tokensEarned',
+    'chestGranted'
+]
+
+
+def encode_mastery_table(processed_mastery):
+    """Convert processed mastery data (list of dicts) into the compact table layout"""
+    rows = {}
+    for mastery in processed_mastery.get('masteries', []):
+        rows[str(mastery['championId'])] = [mastery.get(column) for column in MASTERY_COLUMNS]
+
+    return {
+        'format': MASTERY_TABLE_FORMAT,
+        'riotId': processed_mastery.get('riotId', ''),
+        'region': processed_mastery.get('region', ''),
+        'totalScore': processed_mastery.get('totalScore', 0),
+        'collectedAt': processed_mastery.get('collectedAt', ''),
+        'columns': MASTERY_COLUMNS,
+        'rows': rows
+    }
+
+
+def decode_mastery_document(document):
+    """Return mastery data in the list-of-dicts shape, whichever layout was stored"""
+    if document.get('format') != MASTERY_TABLE_FORMAT:
+        return document
+
+    columns = document.get('columns', MASTERY_COLUMNS)
+    masteries = []
+    for champion_id, row in document.get('rows', {}).items():
+        mastery = {'championId': int(champion_id)}
+        mastery.update(zip(columns, row))
+        masteries.append(mastery)
+
+    # Sort by champion points (highest first), as the collector does
+    masteries.sort(key=lambda x: x.get('championPoints', 0), reverse=True)
+
+    return {
+        'riotId': document.get('riotId', ''),
+        'region': document.get('region', ''),
+        'totalScore': document.get('totalScore', 0),
+        'collectedAt': document.get('collectedAt', ''),
+        'masteries': masteries
+    }
+
+
+def get_mastery_rows(document):
+    """Return {championId: row} for a stored document of either layout"""
+    if not document:
+        return {}
+    if document.get('format') == MASTERY_TABLE_FORMAT:
+        return document.get('rows', {})
+    return encode_mastery_table(document)['rows']
+
+
+def diff_mastery_rows(previous_rows, current_rows):
+    """Return (changed, removed): rows that are new or differ, and champion keys no longer present"""
+    changed = {
+        champion_id: row
+        for champion_id, row in current_rows.items()
+        if previous_rows.get(champion_id) != row
+    }
+    removed = [champion_id for champion_id in previous_rows if champion_id not in current_rows]
+
+    return changed, removed
@@ -0,0 +1,62 @@
+"""
+Global match store shared by every tracked summoner.
+
+A match is stored once under matches/{platform}/{matchId}.json, where the platform is
+the match ID's own prefix (KR_123 -> kr), no matter how many tracked summoners played
+in it. Each summoner keeps a small reference index (summoners/{puuid}/matches/index.json)
+mapping their match IDs to the global keys, next to their per-match stats. Keys come
+from key_layout.
+"""
+
+import json
+
+from botocore.exceptions import ClientError
+from storage_codec import get_document, put_document
+from key_layout import get_match_key, get_match_index_key
+
+PRECONDITION_ERRORS = ('PreconditionFailed', 'ConditionalRequestConflict', '412')
+
+
+def load_match(s3, bucket_name, match_id):
+    """Read a match from the global store (None if it has not been stored)"""
+    try:
+        return get_document(s3, bucket_name, get_match_key(match_id))
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            raise
+        return None
+
+
+def save_match(s3, bucket_name, match_id, match_data):
+    """
+    Store a match in the global store if it is not there yet.
+    Matches are immutable once played, so a concurrent writer having stored it first is fine.
+    """
+    match_key = get_match_key(match_id)
+    try:
+        put_document(s3, bucket_name, match_key, match_data, IfNoneMatch='*')
+    except ClientError as e:
+        if e.response['Error']['Code'] not in PRECONDITION_ERRORS:
+            raise
+    return match_key
+
+
+def load_match_index(s3, bucket_name, puuid):
+    """Read a summoner's reference index ({'matches': {matchId: globalKey}}; empty if missing)"""
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=get_match_index_key(puuid))
+        return json.loads(response['Body'].read().decode('utf-8'))
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            raise
+        return {'matches': {}}
+
+
+def save_match_index(s3, bucket_name, puuid, index):
+    """Write a summoner's reference index"""
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=get_match_index_key(puuid),
+        Body=json.dumps(index, ensure_ascii=False),
+        ContentType='application/json'
+    )
@@ -0,0 +1,278 @@
+"""
+Riot API helpers shared by the collection Lambdas.
+
+Holds the API key lookup, platform → routing mapping, the retrying request helper,
+a process-wide rate limiter and the Riot ID → account cache, so collectors running in
+the same process share one HTTP pool, one request budget and one account lookup.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from urllib.parse import quote
+
+import boto3
+from botocore.exceptions import ClientError
+from key_layout import normalize_riot_id
+
+RIOT_API_KEY_PARAMETER = '/rift-rewind-challenge2/riot-api-key'
+
+VALID_REGIONS = ['na1', 'br1', 'la1', 'la2', 'euw1', 'eun1', 'tr1', 'ru', 'kr', 'jp1', 'oc1', 'ph2', 'sg2', 'th2', 'tw2', 'vn2']
+
+# Riot ID -> account cache: container LRU in front of an S3-backed store
+ACCOUNT_CACHE_BUCKET = os.getenv('ACCOUNT_CACHE_BUCKET', 'rift-rewind-match-data-doyaji')
+ACCOUNT_CACHE_SIZE = int(os.getenv('ACCOUNT_CACHE_SIZE', '512'))
+ACCOUNT_CACHE_TTL_SECONDS = int(os.getenv('ACCOUNT_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+ACCOUNT_NEGATIVE_TTL_SECONDS = int(os.getenv('ACCOUNT_NEGATIVE_TTL_SECONDS', '300'))
+
+# "requests:seconds" windows, e.g. the development key limits of 20/1s and 100/2min
+DEFAULT_RATE_LIMITS = os.getenv('RIOT_RATE_LIMITS', '20:1,100:120')
+
+
+class RateLimiter:
+    """Thread-safe sliding-window rate limiter covering one or more (requests, seconds) windows"""
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.history = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request fits every window, then record it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                longest_window = max(seconds for _, seconds in self.limits)
+                while self.history and now - self.history[0] >= longest_window:
+                    self.history.popleft()
+
+                wait = 0.0
+                for max_requests, seconds in self.limits:
+                    in_window = [t for t in self.history if now - t < seconds]
+                    if len(in_window) >= max_requests:
+                        wait = max(wait, seconds - (now - in_window[-max_requests]))
+
+                if wait <= 0:
+                    self.history.append(now)
+                    return
+
+            time.sleep(wait)
+
+
+def parse_rate_limits(spec):
+    """Parse "20:1,100:120" into [(20, 1), (100, 120)]"""
+    limits = []
+    for part in spec.split(','):
+        if part.strip():
+            max_requests, seconds = part.split(':')
+            limits.append((int(max_requests), float(seconds)))
+    return limits
+
+
+# One limiter per routing host, shared by every collector in the process
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(host):
+    """Return the process-wide rate limiter for an API host (e.g. 'asia' or 'kr')"""
+    with _rate_limiters_lock:
+        if host not in _rate_limiters:
+            _rate_limiters[host] = RateLimiter(parse_rate_limits(DEFAULT_RATE_LIMITS))
+        return _rate_limiters[host]
+
+
+def get_api_key():
+    """Get the Riot API key from Parameter Store"""
+    ssm = boto3.client('ssm')
+    parameter = ssm.get_parameter(
+        Name=RIOT_API_KEY_PARAMETER,
+        WithDecryption=True
+    )
+    return parameter['Parameter']['Value']
+
+
+def get_routing_value(region):
+    """Map platform region to routing value for Riot API"""
+    routing_map = {
+        'na1': 'americas',
+        'br1': 'americas',
+        'la1': 'americas',
+        'la2': 'americas',
+        'euw1': 'europe',
+        'eun1': 'europe',
+        'tr1': 'europe',
+        'ru': 'europe',
+        'kr': 'asia',
+        'jp1': 'asia',
+        'oc1': 'sea',
+        'ph2': 'sea',
+        'sg2': 'sea',
+        'th2': 'sea',
+        'tw2': 'sea',
+        'vn2': 'sea'
+    }
+    return routing_map.get(region, 'americas')
+
+
+def make_api_request(http, method, url, headers, max_retries=3):
+    """Make API request with retry logic for rate limiting"""
+    # https://{host}.api.riotgames.com/... — each host has its own budget
+    host = url.split('://', 1)[-1].split('.', 1)[0]
+    rate_limiter = get_rate_limiter(host)
+
+    for attempt in range(max_retries):
+        try:
+            rate_limiter.acquire()
+            response = http.request(method, url, headers=headers)
+
+            # Handle rate limiting
+            if response.status == 429:
+                retry_after = int(response.headers.get('Retry-After', 1))
+                print(f"Rate limited. Waiting {retry_after} seconds before retry {attempt + 1}/{max_retries}")
+                time.sleep(retry_after)
+                continue
+
+            # Parse response data if successful
+            data = None
+            if response.status == 200:
+                data = json.loads(response.data.decode('utf-8'))
+
+            return {
+                'status': response.status,
+                'data': data,
+                'headers': dict(response.headers)
+            }
+
+        except Exception as e:
+            print(f"Request attempt {attempt + 1} failed: {str(e)}")
+            if attempt == max_retries - 1:
+                raise
+            time.sleep(1)  # Wait before retry
+
+    return {
+        'status': 500,
+        'data': None,
+        'headers': {}
+    }
+
+
+def fetch_account(http, headers, riot_id, region):
+    """Resolve a Riot ID (GameName#TAG) to its account (puuid, gameName, tagLine)"""
+    game_name, tag_line = riot_id.split('#', 1)
+    game_name = quote(game_name)
+    tag_line = quote(tag_line)
+
+    routing_value = get_routing_value(region)
+    account_url = f"https://{routing_value}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
+
+    print(f"Fetching account data for {riot_id}")
+    return make_api_request(http, 'GET', account_url, headers)
+
+
+_account_cache = OrderedDict()
+_account_cache_lock = threading.Lock()
+
+
+def get_account_cache_key(riot_id, region):
+    """Case-insensitive cache key for a Riot ID on a routing cluster (accounts are per cluster)"""
+    return f"{get_routing_value(region)}/{normalize_riot_id(riot_id)}"
+
+
+def get_account_store_key(cache_key):
+    """S3 key of a stored account lookup"""
+    return f"account-cache/{quote(cache_key, safe='/')}.json"
+
+
+def resolve_account(http, headers, riot_id, region, s3=None):
+    """
+    Resolve a Riot ID to its account, consulting the container LRU, then the S3 store,
+    then the Riot API. Successful lookups are kept for ACCOUNT_CACHE_TTL_SECONDS and 404s
+    for ACCOUNT_NEGATIVE_TTL_SECONDS. Returns the same shape as make_api_request.
+    """
+    cache_key = get_account_cache_key(riot_id, region)
+    now = time.time()
+
+    with _account_cache_lock:
+        entry = _account_cache.get(cache_key)
+        if entry and entry['expiresAt'] > now:
+            _account_cache.move_to_end(cache_key)
+            return {'status': entry['status'], 'data': entry['data'], 'headers': {}, 'cached': 'memory'}
+
+    s3 = s3 or boto3.client('s3')
+    store_key = get_account_store_key(cache_key)
+
+    entry = load_account_entry(s3, store_key)
+    if entry and entry['expiresAt'] > now:
+        remember_account(cache_key, entry)
+        return {'status': entry['status'], 'data': entry['data'], 'headers': {}, 'cached': 'store'}
+
+    account_response = fetch_account(http, headers, riot_id, region)
+
+    # Only definitive answers are cached; errors such as 403/429/5xx are retried next time
+    if account_response['status'] in (200, 404):
+        ttl = ACCOUNT_CACHE_TTL_SECONDS if account_response['status'] == 200 else ACCOUNT_NEGATIVE_TTL_SECONDS
+        entry = {
+            'status': account_response['status'],
+            'data': account_response['data'],
+            'expiresAt': now + ttl
+        }
+        remember_account(cache_key, entry)
+        save_account_entry(s3, store_key, entry)
+
+    return account_response
+
+
+def remember_account(cache_key, entry):
+    """Add an entry to the container LRU, evicting the least recently used"""
+    with _account_cache_lock:
+        _account_cache[cache_key] = entry
+        _account_cache.move_to_end(cache_key)
+        while len(_account_cache) > ACCOUNT_CACHE_SIZE:
+            _account_cache.popitem(last=False)
+
+
+def load_account_entry(s3, store_key):
+    """Read a stored account lookup (None if missing or unreadable)"""
+    try:
+        response = s3.get_object(Bucket=ACCOUNT_CACHE_BUCKET, Key=store_key)
+        return json.loads(response['Body'].read().decode('utf-8'))
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            print(f"Failed to read account cache {store_key}: {e}")
+    except Exception as e:
+        print(f"Failed to read account cache {store_key}: {str(e)}")
+    return None
+
+
+def save_account_entry(s3, store_key, entry):
+    """Write an account lookup to the shared store (best effort)"""
+    try:
+        s3.put_object(
+            Bucket=ACCOUNT_CACHE_BUCKET,
+            Key=store_key,
+            Body=json.dumps(entry),
+            ContentType='application/json'
+        )
+    except Exception as e:
+        print(f"Failed to write account cache {store_key}: {str(e)}")
+
+
+def account_error_response(status):
+    """Collector error payload for a failed account lookup"""
+    if status == 404:
+        return {
+            'statusCode': 404,
+            'error': 'Riot ID not found. Check spelling and region.'
+        }
+    elif status == 403:
+        return {
+            'statusCode': 403,
+            'error': 'Your API key has expired. Please regenerate it in the Riot Developer Portal.'
+        }
+    return {
+        'statusCode': status,
+        'error': f'Failed to fetch account: {status}'
+    }
@@ -0,0 +1,51 @@
+"""
+Storage codec for match and stats documents.
+
+Documents are written as compact JSON (no indentation or spaces) and, by default,
+gzip-compressed with Content-Encoding: gzip on the S3 object. Readers detect gzip from
+the gzip magic bytes, so objects written before the codec (indented plain JSON) and
+after it decode the same way. STORAGE_CODEC=json writes compact JSON uncompressed.
+"""
+
+import gzip
+import json
+import os
+
+STORAGE_CODEC = os.getenv('STORAGE_CODEC', 'gzip')
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# zlib's default level: most of level 9's size reduction at a fraction of its CPU cost
+GZIP_LEVEL = int(os.getenv('STORAGE_GZIP_LEVEL', '6'))
+
+
+def encode_document(document, codec=None):
+    """Encode a document for storage; returns (body bytes, extra put_object arguments)"""
+    codec = codec or STORAGE_CODEC
+    body = json.dumps(document, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    if codec == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), {
+            'ContentType': 'application/json',
+            'ContentEncoding': 'gzip'
+        }
+    return body, {'ContentType': 'application/json'}
+
+
+def decode_document(body):
+    """Decode a stored document body in any supported format (gzip or plain JSON)"""
+    if body[:2] == GZIP_MAGIC:
+        body = gzip.decompress(body)
+    return json.loads(body.decode('utf-8'))
+
+
+def put_document(s3, bucket_name, key, document, **kwargs):
+    """Write a document with the configured codec (extra kwargs go to put_object, e.g. IfNoneMatch)"""
+    body, extra_args = encode_document(document)
+    return s3.put_object(Bucket=bucket_name, Key=key, Body=body, **extra_args, **kwargs)
+
+
+def get_document(s3, bucket_name, key):
+    """Read and decode a document (ClientError propagates, e.g. NoSuchKey)"""
+    response = s3.get_object(Bucket=bucket_name, Key=key)
+    return decode_document(response['Body'].read())
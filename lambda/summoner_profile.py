@@ -0,0 +1,249 @@
+"""
+Summoner profile helpers shared by the collection and read Lambdas.
+
+The match and mastery summaries served by get-match-data and get-mastery-data are
+built here, and the collection pipeline uses the same functions to precompute a
+single profile document (summoners/{puuid}/profile.json) so a profile page load
+is one S3 GET.
+"""
+
+import json
+from datetime import datetime
+from mastery_store import decode_mastery_document
+from storage_codec import decode_document
+from match_store import load_match_index
+from key_layout import get_profile_key, get_match_stats_prefix, get_match_stats_key, get_mastery_key
+
+# Matches kept in the precomputed profile document
+PROFILE_MATCH_LIMIT = 100
+
+
+def build_match_history(riot_id, matches, stats_prefix):
+    """Build the match history response body from stored per-match stats (newest first)"""
+    # Calculate summary statistics
+    total_matches = len(matches)
+    wins = sum(1 for match in matches if match.get('win', False))
+    losses = total_matches - wins
+    win_rate = (wins / total_matches * 100) if total_matches > 0 else 0
+
+    # Get champion statistics
+    champion_stats = {}
+    for match in matches:
+        champion = match.get('championName', 'Unknown')
+        if champion not in champion_stats:
+            champion_stats[champion] = {'games': 0, 'wins': 0}
+
+        champion_stats[champion]['games'] += 1
+        if match.get('win', False):
+            champion_stats[champion]['wins'] += 1
+
+    # Sort champions by games played
+    top_champions = sorted(
+        champion_stats.items(),
+        key=lambda x: x[1]['games'],
+        reverse=True
+    )[:5]
+
+    return {
+        'summoner': riot_id,
+        'totalMatches': total_matches,
+        'summary': {
+            'wins': wins,
+            'losses': losses,
+            'winRate': round(win_rate, 1)
+        },
+        'topChampions': [
+            {
+                'championName': champ[0],
+                'games': champ[1]['games'],
+                'wins': champ[1]['wins'],
+                'winRate': round((champ[1]['wins'] / champ[1]['games'] * 100), 1)
+            }
+            for champ in top_champions
+        ],
+        'matches': matches,
+        'dataLocation': stats_prefix,
+        'lastUpdated': matches[0]['lastModified'] if matches else None
+    }
+
+
+def build_mastery_profile(mastery_data, file_info):
+    """Process and enhance mastery data with additional statistics"""
+    try:
+        masteries = mastery_data.get('masteries', [])
+
+        # Calculate statistics
+        total_score = mastery_data.get('totalScore', 0)
+        total_champions = len(masteries)
+
+        # Count by mastery levels
+        level_counts = {}
+        for i in range(1, 8):
+            level_counts[f'level{i}'] = len([m for m in masteries if m.get('championLevel', 0) == i])
+
+        # Get top champions by points
+        top_champions = masteries[:10]  # Already sorted by points in the original data
+
+        # Calculate average points per champion
+        avg_points = total_score / total_champions if total_champions > 0 else 0
+
+        # Find champions with tokens earned (for level 6/7 upgrades)
+        champions_with_tokens = [
+            m for m in masteries
+            if m.get('tokensEarned', 0) > 0
+        ]
+
+        # Find champions with chests available
+        chest_available = [
+            m for m in masteries
+            if not m.get('chestGranted', True)
+        ]
+
+        return {
+            'summoner': mastery_data.get('riotId', ''),
+            'region': mastery_data.get('region', ''),
+            'collectedAt': mastery_data.get('collectedAt', ''),
+            'totalScore': total_score,
+            'totalChampions': total_champions,
+            'averagePoints': round(avg_points, 0),
+            'masteryLevels': level_counts,
+            'topChampions': top_champions,
+            'championsWithTokens': champions_with_tokens,
+            'chestsAvailable': len(chest_available),
+            'allMasteries': masteries,
+            'fileInfo': {
+                's3Location': file_info['Key'],
+                'lastModified': file_info['LastModified'].isoformat(),
+                'fileSize': file_info['Size']
+            },
+            'statistics': {
+                'highestLevel': max([m.get('championLevel', 0) for m in masteries]) if masteries else 0,
+                'highestPoints': max([m.get('championPoints', 0) for m in masteries]) if masteries else 0,
+                'averageLevel': round(sum([m.get('championLevel', 0) for m in masteries]) / len(masteries), 2) if masteries else 0
+            }
+        }
+
+    except Exception as e:
+        print(f"Error processing mastery data: {str(e)}")
+        # Return basic data if processing fails
+        return {
+            'summoner': mastery_data.get('riotId', ''),
+            'region': mastery_data.get('region', ''),
+            'collectedAt': mastery_data.get('collectedAt', ''),
+            'totalScore': mastery_data.get('totalScore', 0),
+            'totalChampions': len(mastery_data.get('masteries', [])),
+            'allMasteries': mastery_data.get('masteries', []),
+            'error': 'Some statistics could not be calculated'
+        }
+
+
+def get_match_sort_key(match_id):
+    """Match IDs are {platform}_{gameId} with game IDs increasing over time"""
+    game_id = match_id.rpartition('_')[2]
+    return int(game_id) if game_id.isdigit() else 0
+
+
+def load_match_history(s3, bucket_name, riot_id, puuid, previous_matches=None):
+    """
+    Build the match history body from the summoner's match index, newest PROFILE_MATCH_LIMIT
+    matches first (None if empty). Entries in previous_matches ({matchId: entry} of the stored
+    profile) are reused, so only the stats of matches collected since then are read.
+    """
+    stats_prefix = get_match_stats_prefix(puuid)
+    previous_matches = previous_matches or {}
+
+    match_ids = sorted(
+        load_match_index(s3, bucket_name, puuid)['matches'],
+        key=get_match_sort_key,
+        reverse=True
+    )[:PROFILE_MATCH_LIMIT]
+
+    matches = []
+    for match_id in match_ids:
+        match_data = previous_matches.get(match_id)
+        if match_data is None:
+            stats_key = get_match_stats_key(puuid, match_id)
+            try:
+                obj_response = s3.get_object(Bucket=bucket_name, Key=stats_key)
+                body = obj_response['Body'].read()
+                match_data = decode_document(body)
+
+                # Add metadata
+                match_data['s3Location'] = stats_key
+                match_data['lastModified'] = obj_response['LastModified'].isoformat()
+                match_data['fileSize'] = obj_response.get('ContentLength', len(body))
+            except Exception as e:
+                print(f"Failed to process match file {stats_key}: {str(e)}")
+                continue
+
+        matches.append(match_data)
+
+    if not matches:
+        return None
+
+    matches.sort(key=lambda match: match.get('gameCreation', 0), reverse=True)
+    return build_match_history(riot_id, matches, stats_prefix)
+
+
+def load_stored_profile(s3, bucket_name, puuid):
+    """Read the precomputed profile document (None if missing or unreadable)"""
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=get_profile_key(puuid))
+        return json.loads(response['Body'].read().decode('utf-8'))
+    except Exception as e:
+        print(f"No stored profile for {puuid}: {str(e)}")
+        return None
+
+
+def load_mastery_profile(s3, bucket_name, puuid):
+    """Load the stored mastery.json for a summoner and build the mastery body (None if missing)"""
+    mastery_key = get_mastery_key(puuid)
+
+    try:
+        obj_response = s3.get_object(Bucket=bucket_name, Key=mastery_key)
+    except Exception as e:
+        print(f"No mastery data at {mastery_key}: {str(e)}")
+        return None
+
+    body = obj_response['Body'].read()
+    mastery_data = decode_mastery_document(json.loads(body.decode('utf-8')))
+    file_info = {
+        'Key': mastery_key,
+        'LastModified': obj_response['LastModified'],
+        'Size': obj_response.get('ContentLength', len(body))
+    }
+
+    return build_mastery_profile(mastery_data, file_info)
+
+
+def refresh_profile(s3, bucket_name, riot_id, region, puuid):
+    """
+    Rebuild and store the precomputed profile document for a summoner.
+    Called by the collection pipeline after new match/mastery data is written; matches
+    already in the previous profile document are carried over instead of read again.
+    """
+    previous = load_stored_profile(s3, bucket_name, puuid) or {}
+    previous_matches = {
+        match['matchId']: match
+        for match in (previous.get('matches') or {}).get('matches', [])
+        if match.get('matchId')
+    }
+
+    profile = {
+        'summoner': riot_id,
+        'region': region,
+        'generatedAt': datetime.now().isoformat(),
+        'matches': load_match_history(s3, bucket_name, riot_id, puuid, previous_matches),
+        'mastery': load_mastery_profile(s3, bucket_name, puuid)
+    }
+
+    profile_key = get_profile_key(puuid)
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=profile_key,
+        Body=json.dumps(profile, ensure_ascii=False),
+        ContentType='application/json'
+    )
+
+    print(f"Refreshed profile document {profile_key}")
+    return profile_key
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Migrate summoner data to the canonical PUUID-anchored key layout
+Copies match-history/{summoner}/, mastery-data/{summoner}/ and profiles/{summoner}/
+objects to summoners/{puuid}/ (see lambda/key_layout.py) and writes the Riot ID alias
+for every summoner. Run migrate_match_store.py first so full match copies are in the
+global store. Safe to rerun: objects already at their canonical key are left alone;
+pass --delete-legacy to remove the migrated legacy objects afterwards
+"""
+
+import os
+import sys
+import json
+import concurrent.futures
+from collections import defaultdict
+
+import boto3
+import urllib3
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lambda'))
+
+from riot_api import VALID_REGIONS, get_api_key, resolve_account
+from key_layout import LEGACY_PREFIXES, get_canonical_key, save_riot_id_alias
+
+BUCKET_NAME = 'rift-rewind-match-data-doyaji'
+MAX_WORKERS = int(os.getenv('MIGRATION_WORKERS', '16'))
+
+
+def list_legacy_objects(s3_client):
+    """Return {legacy summoner folder: [keys]} for every object of the old layout"""
+    legacy_objects = defaultdict(list)
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for prefix in LEGACY_PREFIXES:
+        for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                parts = obj['Key'][len(prefix):].split('/', 1)
+                if len(parts) == 2:
+                    legacy_objects[parts[0]].append(obj['Key'])
+    return legacy_objects
+
+
+def resolve_legacy_summoner(http, headers, s3_client, legacy_name, region):
+    """
+    Resolve a legacy folder name ('Hide_on_bush#KR1') to its account; None if it cannot be resolved.
+    The old layout wrote spaces as '_', so each '_' may be a space or a real underscore: both
+    readings are looked up, and a name for which both (or neither) resolve is reported unresolved.
+    """
+    candidates = list(dict.fromkeys([legacy_name.replace('_', ' '), legacy_name]))
+    accounts = []
+    for riot_id in candidates:
+        account_response = resolve_account(http, headers, riot_id, region, s3_client)
+        if account_response['status'] == 200:
+            accounts.append(account_response['data'])
+        elif account_response['status'] != 404:
+            print(f"✗ Could not resolve {riot_id}: {account_response['status']}")
+            return None
+
+    if len({account['puuid'] for account in accounts}) != 1:
+        reason = 'matches several accounts' if accounts else 'not found'
+        print(f"✗ Could not resolve {legacy_name}: {reason} ('_' may be a space or an underscore)")
+        return None
+
+    save_riot_id_alias(s3_client, BUCKET_NAME, accounts[0])
+    return accounts[0]
+
+
+def migrate_object(s3_client, legacy_key, canonical_key):
+    """Copy one object to its canonical key; returns 'copied', 'merged' or 'exists'"""
+    # Match indexes from both layouts are merged; everything else keeps the newer canonical copy
+    if canonical_key.endswith('/matches/index.json'):
+        legacy_index = json.loads(s3_client.get_object(Bucket=BUCKET_NAME, Key=legacy_key)['Body'].read().decode('utf-8'))
+        try:
+            index = json.loads(s3_client.get_object(Bucket=BUCKET_NAME, Key=canonical_key)['Body'].read().decode('utf-8'))
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+                raise
+            index = {'matches': {}}
+        index['matches'] = dict(legacy_index.get('matches', {}), **index['matches'])
+        index.setdefault('summoner', legacy_index.get('summoner'))
+        s3_client.put_object(
+            Bucket=BUCKET_NAME,
+            Key=canonical_key,
+            Body=json.dumps(index, ensure_ascii=False),
+            ContentType='application/json'
+        )
+        return 'merged'
+
+    try:
+        s3_client.head_object(Bucket=BUCKET_NAME, Key=canonical_key)
+        return 'exists'
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('404', 'NoSuchKey'):
+            raise
+
+    s3_client.copy_object(
+        Bucket=BUCKET_NAME,
+        Key=canonical_key,
+        CopySource={'Bucket': BUCKET_NAME, 'Key': legacy_key}
+    )
+    return 'copied'
+
+
+def main():
+    """Main function to migrate summoner keys"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    delete_legacy = '--delete-legacy' in sys.argv[1:]
+    # Account lookups work from any region of the same routing cluster
+    region = args[0] if args else 'kr'
+    if region not in VALID_REGIONS:
+        print(f"Error: region must be one of: {', '.join(VALID_REGIONS)}")
+        sys.exit(1)
+
+    print("Summoner Key Layout Migration")
+    print("=" * 40)
+
+    s3_client = boto3.client('s3')
+    legacy_objects = list_legacy_objects(s3_client)
+    print(f"Legacy summoner folders: {len(legacy_objects)} ({sum(len(keys) for keys in legacy_objects.values())} objects)")
+
+    headers = {'X-Riot-Token': os.getenv('RIOT_API_KEY') or get_api_key()}
+    http = urllib3.PoolManager(maxsize=MAX_WORKERS)
+
+    # Step 1: legacy folder name -> PUUID (account cache first, Riot API otherwise)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        accounts = dict(zip(
+            legacy_objects,
+            executor.map(lambda name: resolve_legacy_summoner(http, headers, s3_client, name, region), legacy_objects)
+        ))
+    unresolved = [name for name, account in accounts.items() if account is None]
+    print(f"✓ Resolved {len(accounts) - len(unresolved)} summoners to PUUIDs")
+
+    # Step 2: copy every object to its canonical key
+    moves = []
+    for legacy_name, keys in legacy_objects.items():
+        if accounts[legacy_name] is None:
+            continue
+        for legacy_key in keys:
+            canonical_key = get_canonical_key(legacy_key, accounts[legacy_name]['puuid'])
+            if canonical_key:
+                moves.append((legacy_key, canonical_key))
+
+    outcomes = defaultdict(int)
+    migrated_keys = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(migrate_object, s3_client, legacy_key, canonical_key): legacy_key
+            for legacy_key, canonical_key in moves
+        }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                outcomes[future.result()] += 1
+                migrated_keys.append(futures[future])
+            except Exception as e:
+                outcomes['failed'] += 1
+                print(f"✗ Failed to migrate {futures[future]}: {e}")
+
+    print(f"✓ Copied {outcomes['copied']}, merged {outcomes['merged']} indexes, "
+          f"{outcomes['exists']} already at their canonical key")
+
+    if delete_legacy:
+        for start in range(0, len(migrated_keys), 1000):
+            batch = [{'Key': key} for key in migrated_keys[start:start + 1000]]
+            s3_client.delete_objects(Bucket=BUCKET_NAME, Delete={'Objects': batch, 'Quiet': True})
+        print(f"✓ Deleted {len(migrated_keys)} legacy objects")
+
+    if unresolved or outcomes['failed']:
+        print(f"⚠ {len(unresolved)} summoners unresolved, {outcomes['failed']} objects failed; rerun to retry them")
+        for name in unresolved:
+            print(f"  - {name}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Migrate per-summoner match files into the global match store
+Copies match-history/{summoner}/full/{matchId}.json to matches/{platform}/{matchId}.json
+(once per match, however many summoners stored it) and writes each summoner's match
+reference index next to the old files; migrate_key_layout.py then moves the index to the
+summoner's PUUID folder. Safe to rerun; pass --delete-legacy to remove the old copies afterwards
+"""
+
+import os
+import sys
+import json
+import concurrent.futures
+from collections import defaultdict
+
+import boto3
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lambda'))
+
+from key_layout import get_match_key, get_legacy_match_index_key
+
+BUCKET_NAME = 'rift-rewind-match-data-doyaji'
+LEGACY_PREFIX = 'match-history/'
+MAX_WORKERS = int(os.getenv('MIGRATION_WORKERS', '16'))
+
+
+def list_legacy_matches(s3_client):
+    """Return {safe summoner name: {matchId: legacy key}} for every legacy full match file"""
+    legacy_matches = defaultdict(dict)
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=LEGACY_PREFIX):
+        for obj in page.get('Contents', []):
+            # match-history/{summoner}/full/{matchId}.json
+            parts = obj['Key'][len(LEGACY_PREFIX):].split('/')
+            if len(parts) == 3 and parts[1] == 'full' and parts[2].endswith('.json'):
+                legacy_matches[parts[0]][parts[2][:-len('.json')]] = obj['Key']
+    return legacy_matches
+
+
+def copy_match(s3_client, match_id, legacy_key):
+    """Copy one match into the global store unless it is already there; returns True if copied"""
+    match_key = get_match_key(match_id)
+    try:
+        s3_client.head_object(Bucket=BUCKET_NAME, Key=match_key)
+        return False
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('404', 'NoSuchKey'):
+            raise
+
+    s3_client.copy_object(
+        Bucket=BUCKET_NAME,
+        Key=match_key,
+        CopySource={'Bucket': BUCKET_NAME, 'Key': legacy_key},
+        ContentType='application/json',
+        MetadataDirective='REPLACE'
+    )
+    return True
+
+
+def main():
+    """Main function to migrate match storage"""
+    delete_legacy = '--delete-legacy' in sys.argv[1:]
+
+    print("Match Store Migration")
+    print("=" * 40)
+
+    s3_client = boto3.client('s3')
+    legacy_matches = list_legacy_matches(s3_client)
+
+    # Any summoner's copy of a match will do; each match is copied once
+    unique_matches = {}
+    for matches in legacy_matches.values():
+        for match_id, legacy_key in matches.items():
+            unique_matches.setdefault(match_id, legacy_key)
+
+    total_files = sum(len(matches) for matches in legacy_matches.values())
+    print(f"Summoners: {len(legacy_matches)}")
+    print(f"Legacy match files: {total_files} ({len(unique_matches)} unique matches)")
+
+    copied = failed = 0
+    failed_matches = set()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(copy_match, s3_client, match_id, legacy_key): match_id
+            for match_id, legacy_key in unique_matches.items()
+        }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                if future.result():
+                    copied += 1
+            except Exception as e:
+                failed += 1
+                failed_matches.add(futures[future])
+                print(f"✗ Failed to copy {futures[future]}: {e}")
+
+    print(f"✓ Copied {copied} matches into the global store ({len(unique_matches) - copied - failed} already present)")
+
+    # Reference indexes only point at matches that made it into the store
+    for safe_summoner_name, matches in legacy_matches.items():
+        index_key = get_legacy_match_index_key(safe_summoner_name)
+        try:
+            index = json.loads(s3_client.get_object(Bucket=BUCKET_NAME, Key=index_key)['Body'].read().decode('utf-8'))
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+                raise
+            index = {'matches': {}}
+        for match_id in matches:
+            if match_id not in failed_matches:
+                index['matches'][match_id] = get_match_key(match_id)
+        index.setdefault('summoner', safe_summoner_name.replace('_', ' '))
+        s3_client.put_object(
+            Bucket=BUCKET_NAME,
+            Key=index_key,
+            Body=json.dumps(index, ensure_ascii=False),
+            ContentType='application/json'
+        )
+    print(f"✓ Wrote {len(legacy_matches)} summoner match indexes")
+
+    if delete_legacy:
+        legacy_keys = [
+            {'Key': legacy_key}
+            for matches in legacy_matches.values()
+            for match_id, legacy_key in matches.items()
+            if match_id not in failed_matches
+        ]
+        for start in range(0, len(legacy_keys), 1000):
+            s3_client.delete_objects(Bucket=BUCKET_NAME, Delete={'Objects': legacy_keys[start:start + 1000], 'Quiet': True})
+        print(f"✓ Deleted {len(legacy_keys)} legacy match files")
+
+    if failed:
+        print(f"⚠ {failed} matches failed to copy; rerun to retry them")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -44,6 +44,18 @@ aws ecr get-login-password --region $AWS_REGION | docker login --username AWS --
 
 # Build Docker image
 echo "🔨 Building AgentCore runtime Docker image..."
+# The runtime shares the S3 key layout and document codec with the Lambda functions
+cp lambda/key_layout.py lambda/storage_codec.py agentcore-runtime/
+# Local knowledge index searched before the remote knowledge base (optional: without it
+# the runtime uses the remote knowledge base only)
+python3 build_knowledge_index.py || echo "⚠️ Knowledge index not built; the runtime will use the remote knowledge base only"
+# Item/rune/summoner spell ID lookups, written next to the index
+python3 build_game_data_index.py || echo "⚠️ Game data not built; item and rune IDs will stay unresolved"
+cp agentcore/local_retrieval.py agentcore/game_data.py agentcore-runtime/
+mkdir -p agentcore-runtime/knowledge_index
+if [ -d knowledge_index ]; then
+    cp -r knowledge_index/. agentcore-runtime/knowledge_index/
+fi
 cd agentcore-runtime
 docker build -t $ECR_REPOSITORY:latest .
 docker tag $ECR_REPOSITORY:latest $AWS_ACCOUNT_ID.dkr.ecr.$AWS_REGION.amazonaws.com/$ECR_REPOSITORY:latest
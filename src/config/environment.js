@@ -13,6 +13,7 @@ export const endpoints = {
   summonerSearch: '/summoner/search',
   summonerMatches: (riotId) => `/summoner/${encodeURIComponent(riotId)}/matches`,
   summonerMastery: (riotId) => `/summoner/${encodeURIComponent(riotId)}/mastery`,
+  summonerProfile: (riotId) => `/summoner/${encodeURIComponent(riotId)}/profile`,
   chat: '/analysis'  // AgentCore proxy endpoint
 };
 
@@ -156,6 +156,18 @@ const SummonerPage = () => {
   };
 
   const fetchSummonerData = async (riotId) => {
+    try {
+      // Prefer the precomputed profile document (one request for matches and mastery)
+      const profileResponse = await fetch(`${config.apiUrl}${endpoints.summonerProfile(riotId)}`);
+      if (profileResponse.ok) {
+        const profile = await profileResponse.json();
+        setSummonerData({ matches: profile.matches, mastery: profile.mastery });
+        return;
+      }
+    } catch (err) {
+      console.warn('Profile unavailable, falling back to separate requests:', err);
+    }
+
     try {
       // Fetch both match history and mastery data
       const [matchResponse, masteryResponse] = await Promise.allSettled([
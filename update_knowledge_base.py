@@ -2,13 +2,56 @@
 """
 LoL Knowledge Base Update Script
 Automatically processes all available patch versions and updates the knowledge base
+The converters are imported and run in a process pool, fanned out across versions,
+languages and individual champion files, with wall time reported per stage. Builds are
+incremental: each patch folder keeps a manifest of input hashes and converter versions,
+and only documents whose input or converter changed are regenerated and listed for ingestion.
+With --split, items, runes and summoner spells are written as one document per entry and
+every document gets a Bedrock .metadata.json sidecar for metadata-filtered retrieval
 """
 
 import os
 import sys
-import subprocess
+import json
+import time
+import hashlib
+import concurrent.futures
+from datetime import datetime
 from pathlib import Path
 
+import convert_champion_to_markdown as champion_converter
+import convert_items_to_markdown as item_converter
+import convert_runes_to_markdown as rune_converter
+import convert_summoner_spells_to_markdown as summoner_spell_converter
+
+KNOWLEDGE_BASE_DIR = 'gameplay_knowledge_base'
+LANGUAGES = ['en_US', 'ko_KR']
+
+# Per-patch build manifest and the documents changed by the last run
+MANIFEST_NAME = 'manifest.json'
+CHANGES_FILE = f"{KNOWLEDGE_BASE_DIR}/changed_documents.json"
+
+# Worker processes (default: one per CPU)
+MAX_WORKERS = int(os.getenv('KB_BUILD_WORKERS', '0')) or os.cpu_count()
+
+# Champion files sent to a worker at a time
+CHAMPION_CHUNK_SIZE = 8
+
+# Stage name -> (converter module, converter function, per-entry documents builder, Data Dragon input, output name)
+# Champions have one input file per champion and one output per champion in a folder; in split
+# mode the other stages also write one document per entry into a folder named like their output
+STAGES = {
+    'champions': (champion_converter, champion_converter.convert_champion_to_markdown,
+                  champion_converter.build_champion_documents, 'champion/*.json', 'champion'),
+    'items': (item_converter, item_converter.convert_items_to_markdown,
+              item_converter.build_item_documents, 'item.json', 'items'),
+    'runes': (rune_converter, rune_converter.convert_runes_to_markdown,
+              rune_converter.build_rune_documents, 'runesReforged.json', 'runesReforged'),
+    'summoner spells': (summoner_spell_converter, summoner_spell_converter.convert_summoner_spells_to_markdown,
+                        summoner_spell_converter.build_summoner_spell_documents, 'summoner.json', 'summoner_spells')
+}
+
+
 def get_available_versions():
     """Get all available patch versions from the directory structure"""
     versions = []
@@ -23,64 +66,257 @@ def get_available_versions():
                 continue
     return sorted(versions, reverse=True)  # Latest version first
 
-def run_conversion_script(script_name, version, language='en_US'):
-    """Run a conversion script with specified parameters"""
-    try:
-        cmd = [sys.executable, script_name, version, language]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        print(f"✓ {script_name} completed for {version} ({language})")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"✗ {script_name} failed for {version} ({language}): {e.stderr}")
-        return False
-    except FileNotFoundError:
-        print(f"✗ Script {script_name} not found")
-        return False
-
-def update_knowledge_base_for_version(version, languages=['en_US', 'ko_KR']):
-    """Update knowledge base for a specific version"""
-    print(f"\n=== Processing version {version} ===")
-    
-    scripts = [
-        'convert_champion_to_markdown.py',
-        'convert_items_to_markdown.py', 
-        'convert_runes_to_markdown.py',
-        'convert_summoner_spells_to_markdown.py'
-    ]
-    
-    success_count = 0
-    total_count = 0
-    
-    for language in languages:
-        print(f"\nProcessing {language} for version {version}:")
-        
-        for script in scripts:
-            total_count += 1
-            if run_conversion_script(script, version, language):
-                success_count += 1
-    
-    print(f"\nVersion {version} completed: {success_count}/{total_count} conversions successful")
-    return success_count == total_count
+
+def get_language_suffix(language):
+    """Output name suffix of a language ('' for English, '_ko' for Korean)"""
+    return '_ko' if language == 'ko_KR' else ''
+
+
+def get_stage_inputs(stage, version, language):
+    """Data Dragon files a stage converts for one version and language"""
+    input_pattern = STAGES[stage][3]
+    return sorted(str(path) for path in Path(f"{version}/data/{language}").glob(input_pattern))
+
+
+def get_output_path(stage, version, language, name=None):
+    """Markdown output of a stage (named documents go into a folder, e.g. champion/Ahri.md)"""
+    output_name = f"{STAGES[stage][4]}{get_language_suffix(language)}"
+    if name:
+        return f"{KNOWLEDGE_BASE_DIR}/{version}/{output_name}/{name}.md"
+    return f"{KNOWLEDGE_BASE_DIR}/{version}/{output_name}.md"
+
+
+def hash_file(path):
+    """SHA-256 of a file's contents"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_manifest(version):
+    """Read a patch's build manifest ({input path: {sha256, converterVersion, split, outputs}})"""
+    manifest_path = f"{KNOWLEDGE_BASE_DIR}/{version}/{MANIFEST_NAME}"
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('documents', {})
+
+
+def save_manifest(version, documents):
+    """Write a patch's build manifest"""
+    manifest_path = f"{KNOWLEDGE_BASE_DIR}/{version}/{MANIFEST_NAME}"
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'documents': dict(sorted(documents.items()))}, f, indent=2, ensure_ascii=False)
+
+
+def write_markdown(output_path, markdown_content):
+    """Write a markdown document, creating its directory"""
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(markdown_content)
+
+
+def write_metadata(output_path, metadata):
+    """Write a document's Bedrock metadata sidecar ({document}.metadata.json); returns its path"""
+    metadata_path = f"{output_path}.metadata.json"
+    attributes = {key: value for key, value in metadata.items() if value not in (None, '', [])}
+    with open(metadata_path, 'w', encoding='utf-8') as f:
+        json.dump({'metadataAttributes': attributes}, f, ensure_ascii=False)
+    return metadata_path
+
+
+def remove_output(output_path):
+    """Delete a generated file, and its folder once empty (per-entry document folders)"""
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    output_dir = os.path.dirname(output_path)
+    if os.path.dirname(output_dir) != KNOWLEDGE_BASE_DIR and os.path.isdir(output_dir) and not os.listdir(output_dir):
+        os.rmdir(output_dir)
+
+
+def get_entry_outputs(entry):
+    """Outputs recorded for an input (manifests before split mode kept a single 'output')"""
+    return entry.get('outputs') or [entry['output']]
+
+
+def convert_files(stage, version, language, input_paths, split=False):
+    """Worker: convert input files of one stage; returns [(input path, output paths, error or None)]"""
+    converter, build_documents = STAGES[stage][1:3]
+    results = []
+    for input_path in input_paths:
+        try:
+            with open(input_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            outputs = []
+            if split:
+                for name, markdown_content, metadata in build_documents(data, language, version):
+                    output_path = get_output_path(stage, version, language, name)
+                    write_markdown(output_path, markdown_content)
+                    outputs.extend([output_path, write_metadata(output_path, metadata)])
+            else:
+                if stage == 'champions':
+                    output_path = get_output_path(stage, version, language, list(data['data'].keys())[0])
+                else:
+                    output_path = get_output_path(stage, version, language)
+                write_markdown(output_path, converter(data, language))
+                outputs.append(output_path)
+            results.append((input_path, outputs, None))
+        except Exception as e:
+            results.append((input_path, [], str(e)))
+    return results
+
+
+def plan_stage(stage, versions, languages, manifests, split=False, force=False):
+    """
+    Find the inputs of a stage that need converting.
+    Returns ([(version, language, input paths)], {input path: sha256}, unchanged count)
+    """
+    converter_version = STAGES[stage][0].CONVERTER_VERSION
+    chunk_size = CHAMPION_CHUNK_SIZE if stage == 'champions' else 1
+    tasks = []
+    hashes = {}
+    unchanged = 0
+
+    for version in versions:
+        for language in languages:
+            input_paths = get_stage_inputs(stage, version, language)
+            if not input_paths:
+                print(f"✗ {stage}: no input for {version} ({language})")
+
+            pending = []
+            for input_path in input_paths:
+                hashes[input_path] = hash_file(input_path)
+                entry = manifests[version].get(input_path)
+                if (not force and entry
+                        and entry['sha256'] == hashes[input_path]
+                        and entry['converterVersion'] == converter_version
+                        and entry.get('split', False) == split
+                        and all(os.path.exists(output) for output in get_entry_outputs(entry))):
+                    unchanged += 1
+                else:
+                    pending.append(input_path)
+
+            for start in range(0, len(pending), chunk_size):
+                tasks.append((version, language, pending[start:start + chunk_size]))
+
+    return tasks, hashes, unchanged
+
+
+def run_stage(executor, stage, versions, languages, manifests, split=False, force=False):
+    """Convert one stage's changed inputs on the pool; returns (changed outputs, removed outputs, failures, wall seconds)"""
+    started = time.perf_counter()
+    tasks, hashes, unchanged = plan_stage(stage, versions, languages, manifests, split, force)
+    converter_version = STAGES[stage][0].CONVERTER_VERSION
+
+    changed = []
+    removed = []
+    failed = 0
+    futures = {
+        executor.submit(convert_files, stage, version, language, input_paths, split): version
+        for version, language, input_paths in tasks
+    }
+    for future in concurrent.futures.as_completed(futures):
+        version = futures[future]
+        for input_path, outputs, error in future.result():
+            if error:
+                # Left out of the manifest so the next run retries it
+                failed += 1
+                manifests[version].pop(input_path, None)
+                print(f"✗ {stage}: {input_path}: {error}")
+                continue
+            # Documents the input no longer produces (switched mode, entry dropped from the file)
+            previous = manifests[version].get(input_path)
+            for output in set(get_entry_outputs(previous) if previous else []) - set(outputs):
+                remove_output(output)
+                removed.append(output)
+
+            manifests[version][input_path] = {
+                'sha256': hashes[input_path],
+                'converterVersion': converter_version,
+                'split': split,
+                'outputs': outputs
+            }
+            changed.extend(outputs)
+
+    elapsed = time.perf_counter() - started
+    print(f"✓ {stage}: {len(hashes) - unchanged - failed} converted ({len(changed)} files written), "
+          f"{unchanged} unchanged in {elapsed:.2f}s")
+    return sorted(changed), sorted(removed), failed, elapsed
+
+
+def remove_stale_documents(versions, manifests):
+    """Delete outputs whose Data Dragon input no longer exists; returns the removed outputs"""
+    removed = []
+    for version in versions:
+        for input_path, entry in list(manifests[version].items()):
+            if not os.path.exists(input_path):
+                for output in get_entry_outputs(entry):
+                    remove_output(output)
+                    removed.append(output)
+                del manifests[version][input_path]
+    return sorted(removed)
+
+
+def build_knowledge_base(versions, languages, split=False, force=False):
+    """Convert every stage for the given versions and languages; returns True if all conversions succeeded"""
+    manifests = {version: load_manifest(version) for version in versions}
+    changed = []
+    removed = []
+    total_failed = 0
+    stage_times = {}
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for stage in STAGES:
+            stage_changed, stage_removed, failed, stage_times[stage] = run_stage(
+                executor, stage, versions, languages, manifests, split, force
+            )
+            changed.extend(stage_changed)
+            removed.extend(stage_removed)
+            total_failed += failed
+
+    removed = sorted(removed + remove_stale_documents(versions, manifests))
+    for version in versions:
+        save_manifest(version, manifests[version])
+
+    # Only these documents need to be re-ingested into the Bedrock knowledge base
+    with open(CHANGES_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'builtAt': datetime.now().isoformat(),
+            'versions': versions,
+            'changed': changed,
+            'removed': removed
+        }, f, indent=2, ensure_ascii=False)
+
+    print("\nStage wall time:")
+    for stage, elapsed in stage_times.items():
+        print(f"  {stage:<16} {elapsed:7.2f}s")
+
+    print(f"\nChanged documents: {len(changed)}, removed: {len(removed)} (listed in {CHANGES_FILE})")
+    return total_failed == 0
+
 
 def main():
     """Main function to update knowledge base"""
     print("LoL Knowledge Base Update Script")
     print("=" * 40)
-    
+
     # Get command line arguments
-    target_version = sys.argv[1] if len(sys.argv) > 1 else None
-    languages = ['en_US', 'ko_KR']  # Default languages
-    
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    force = '--force' in sys.argv[1:]
+    split = '--split' in sys.argv[1:]
+    target_version = args[0] if args else None
+    languages = LANGUAGES
+
     # Get available versions
     available_versions = get_available_versions()
-    
+
     if not available_versions:
         print("Error: No patch version directories found")
         print("Expected format: 15.21.1, 15.20.1, etc.")
         sys.exit(1)
-    
+
     print(f"Available versions: {', '.join(available_versions)}")
-    
+
     # Determine which versions to process
     if target_version:
         if target_version not in available_versions:
@@ -91,25 +327,24 @@ def main():
     else:
         versions_to_process = available_versions
         print("Processing all available versions")
-    
-    # Process each version
-    all_successful = True
-    for version in versions_to_process:
-        success = update_knowledge_base_for_version(version, languages)
-        if not success:
-            all_successful = False
-    
+    print(f"Workers: {MAX_WORKERS}, documents: {'one per entry' if split else 'one per file'}{', full rebuild' if force else ''}\n")
+
+    started = time.perf_counter()
+    all_successful = build_knowledge_base(versions_to_process, languages, split, force)
+
     # Summary
     print("\n" + "=" * 40)
     if all_successful:
         print("✓ All knowledge base updates completed successfully!")
     else:
         print("⚠ Some conversions failed. Check the output above for details.")
-    
+    print(f"Total build time: {time.perf_counter() - started:.2f}s")
+
     print(f"\nKnowledge base structure:")
-    print("gameplay_knowledge_base/")
+    print(f"{KNOWLEDGE_BASE_DIR}/")
     for version in versions_to_process:
         print(f"├── {version}/")
+        print(f"│   ├── manifest.json")
         print(f"│   ├── champion/")
         print(f"│   ├── champion_ko/")
         print(f"│   ├── items.md")
@@ -120,4 +355,4 @@ def main():
         print(f"│   └── summoner_spells_ko.md")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,22 +2,78 @@
 """
 Upload champion data and images to S3 bucket
 Supports multiple patch versions and proper folder structure
+Syncs instead of re-uploading: the destination is listed once per version, local files are
+compared by size and MD5/ETag, and only new or changed files are uploaded through a thread
+pool. --dry-run prints the diff without uploading; --force re-uploads unchanged files too
+(to apply new content types or cache headers to objects that are already there)
+Every Data Dragon image family is published with its detected content type and, since
+version-prefixed paths never change, an immutable Cache-Control
 """
 
 import os
 import sys
+import time
 import boto3
 import json
+import hashlib
+import concurrent.futures
+from datetime import datetime, timezone
 from pathlib import Path
+from boto3.s3.transfer import TransferConfig, S3UploadFailedError
+from s3transfer.utils import ChunksizeAdjuster
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 
 # S3 bucket configuration
 BUCKET_NAME = 'rift-rewind-web-doyaji'
 
-def get_s3_client():
-    """Initialize S3 client"""
+# Concurrent uploads (S3_SYNC_WORKERS or --workers=N)
+DEFAULT_WORKERS = 16
+
+# Files from this size (MB) upload in parts of the chunk size (MB); this also decides their ETag
+DEFAULT_MULTIPART_MB = 8
+MB = 1024 * 1024
+
+CONTENT_TYPES = {
+    '.json': 'application/json',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.webp': 'image/webp',
+    '.gif': 'image/gif'
+}
+
+# Image content types by file signature (Data Dragon has JPEGs and PNGs behind either extension)
+IMAGE_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF8', 'image/gif')
+]
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif')
+
+# Image family -> directory of the patch, uploaded to lol-data/{version}/{directory}/.
+# Rune icons (perk-images) are not versioned in Data Dragon and sit next to the patch
+# folders; they are published under every version so all image URLs share the prefix
+IMAGE_FAMILIES = {
+    'champion': 'img/champion',
+    'spell': 'img/spell',
+    'passive': 'img/passive',
+    'item': 'img/item',
+    'profileicon': 'img/profileicon',
+    'rune': 'img/perk-images'
+}
+
+# Sprite sheets and their coordinate map (build_sprite_atlases.py)
+ATLAS_DIR = 'img/atlas'
+ATLAS_FILE = 'atlas.json'
+
+# Version-prefixed objects never change once published
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+def get_s3_client(workers=DEFAULT_WORKERS):
+    """Initialize S3 client (with a connection per upload worker)"""
     try:
-        return boto3.client('s3')
+        return boto3.client('s3', config=Config(max_pool_connections=workers))
     except NoCredentialsError:
         print("Error: AWS credentials not found. Please configure your credentials.")
         sys.exit(1)
@@ -36,96 +92,102 @@ def get_available_versions():
                 continue
     return sorted(versions, reverse=True)  # Latest version first
 
-def upload_file_to_s3(s3_client, local_path, s3_key, content_type=None):
-    """Upload a single file to S3 with proper content type and tags"""
-    try:
-        extra_args = {
-            'Tagging': 'public=true&source=riot-api'
-        }
-        
-        if content_type:
-            extra_args['ContentType'] = content_type
-        
-        # Set cache control for static assets
-        if s3_key.endswith(('.png', '.jpg', '.jpeg')):
-            extra_args['CacheControl'] = 'max-age=86400'  # 24 hours
-        elif s3_key.endswith('.json'):
-            extra_args['CacheControl'] = 'max-age=3600'   # 1 hour
-        
-        s3_client.upload_file(local_path, BUCKET_NAME, s3_key, ExtraArgs=extra_args)
-        print(f"✓ Uploaded: {s3_key}")
-        return True
-    except ClientError as e:
-        print(f"✗ Failed to upload {s3_key}: {e}")
-        return False
-
-def upload_champion_data(s3_client, version, language='en_US'):
-    """Upload champion JSON data for a specific version and language"""
-    print(f"\nUploading champion data for {version} ({language})...")
-    
-    success_count = 0
-    total_count = 0
+def get_sync_options(args):
+    """
+    Sync settings from --workers=N, --multipart-threshold=MB and --multipart-chunksize=MB
+    (S3_SYNC_WORKERS sets the default worker count); raises ValueError for non-positive integers
+    """
+    options = {
+        'workers': os.getenv('S3_SYNC_WORKERS', str(DEFAULT_WORKERS)),
+        'multipart-threshold': str(DEFAULT_MULTIPART_MB),
+        'multipart-chunksize': str(DEFAULT_MULTIPART_MB)
+    }
+    for arg in args:
+        name, _, value = arg[2:].partition('=')
+        if name in options and value:
+            options[name] = value
     
-    # Upload champion.json
-    champion_file = f"{version}/data/{language}/champion.json"
-    if os.path.exists(champion_file):
-        s3_key = f"lol-data/{version}/data/{language}/champion.json"
-        total_count += 1
-        if upload_file_to_s3(s3_client, champion_file, s3_key, 'application/json'):
-            success_count += 1
-    else:
-        print(f"Warning: {champion_file} not found")
+    for name, value in options.items():
+        if not value.strip().isdigit() or int(value) < 1:
+            raise ValueError(f"{name} must be a positive integer, got {value!r}")
+        options[name] = int(value)
+    return options
+
+def get_content_type(path):
+    """Content type of a local file: images by their signature, everything else by extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        with open(path, 'rb') as f:
+            header = f.read(12)
+        for signature, content_type in IMAGE_SIGNATURES:
+            if header.startswith(signature):
+                return content_type
+        if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+            return 'image/webp'
+    return CONTENT_TYPES.get(extension, 'application/octet-stream')
+
+def get_cache_control(s3_key):
+    """Cache control for static assets"""
+    if s3_key.lower().endswith(IMAGE_EXTENSIONS):
+        return IMMUTABLE_CACHE_CONTROL
+    if s3_key.endswith('.json'):
+        return 'max-age=3600'   # 1 hour
+    return None
+
+def get_champion_data_files(version, language='en_US'):
+    """Champion JSON data for a specific version and language: [(local path, S3 key)]"""
+    files = []
     
-    # Upload championFull.json if it exists
-    champion_full_file = f"{version}/data/{language}/championFull.json"
-    if os.path.exists(champion_full_file):
-        s3_key = f"lol-data/{version}/data/{language}/championFull.json"
-        total_count += 1
-        if upload_file_to_s3(s3_client, champion_full_file, s3_key, 'application/json'):
-            success_count += 1
+    # champion.json and championFull.json
+    for data_file in ('champion.json', 'championFull.json'):
+        local_path = f"{version}/data/{language}/{data_file}"
+        if os.path.exists(local_path):
+            files.append((local_path, f"lol-data/{local_path}"))
+        elif data_file == 'champion.json':
+            print(f"Warning: {local_path} not found")
     
-    # Upload individual champion files
+    # Individual champion files
     champion_dir = f"{version}/data/{language}/champion"
     if os.path.exists(champion_dir):
-        for champion_file in os.listdir(champion_dir):
+        for champion_file in sorted(os.listdir(champion_dir)):
             if champion_file.endswith('.json'):
-                local_path = os.path.join(champion_dir, champion_file)
-                s3_key = f"lol-data/{version}/data/{language}/champion/{champion_file}"
-                total_count += 1
-                if upload_file_to_s3(s3_client, local_path, s3_key, 'application/json'):
-                    success_count += 1
+                files.append((f"{champion_dir}/{champion_file}", f"lol-data/{champion_dir}/{champion_file}"))
     
-    return success_count, total_count
+    return files
 
-def upload_champion_images(s3_client, version):
-    """Upload champion images for a specific version"""
-    print(f"\nUploading champion images for {version}...")
-    
-    success_count = 0
-    total_count = 0
+def get_image_files(version):
+    """Images of every family for a specific version: [(local path, S3 key)]"""
+    files = []
     
-    img_dir = f"{version}/img/champion"
-    if not os.path.exists(img_dir):
-        print(f"Warning: {img_dir} not found")
-        return success_count, total_count
+    for family, directory in IMAGE_FAMILIES.items():
+        # Versioned families live in the patch folder; rune icons may only exist unversioned
+        img_dir = next((path for path in (f"{version}/{directory}", directory) if os.path.isdir(path)), None)
+        if not img_dir:
+            print(f"Warning: {version}/{directory} not found, skipping {family} images")
+            continue
+        
+        family_files = [
+            (path.as_posix(), f"lol-data/{version}/{directory}/{path.relative_to(img_dir).as_posix()}")
+            for path in sorted(Path(img_dir).rglob('*'))
+            if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS
+        ]
+        print(f"{family} images: {len(family_files)}")
+        files.extend(family_files)
     
-    for img_file in os.listdir(img_dir):
-        if img_file.endswith(('.png', '.jpg', '.jpeg')):
-            local_path = os.path.join(img_dir, img_file)
-            s3_key = f"lol-data/{version}/img/champion/{img_file}"
-            total_count += 1
-            if upload_file_to_s3(s3_client, local_path, s3_key, 'image/png'):
-                success_count += 1
+    # Sprite atlases, when they were built for this version
+    atlas_dir = f"{version}/{ATLAS_DIR}"
+    if os.path.isdir(atlas_dir):
+        atlas_files = [
+            (f"{atlas_dir}/{file_name}", f"lol-data/{atlas_dir}/{file_name}")
+            for file_name in sorted(os.listdir(atlas_dir))
+        ]
+        print(f"sprite atlas files: {len(atlas_files)}")
+        files.extend(atlas_files)
     
-    return success_count, total_count
+    return files
 
-def upload_other_game_data(s3_client, version, language='en_US'):
-    """Upload other game data files (items, runes, summoner spells, etc.)"""
-    print(f"\nUploading other game data for {version} ({language})...")
-    
-    success_count = 0
-    total_count = 0
-    
+def get_other_game_data_files(version, language='en_US'):
+    """Other game data files (items, runes, summoner spells, etc.): [(local path, S3 key)]"""
     data_files = [
         'item.json',
         'runesReforged.json', 
@@ -134,21 +196,117 @@ def upload_other_game_data(s3_client, version, language='en_US'):
         'profileicon.json'
     ]
     
+    files = []
     for data_file in data_files:
         local_path = f"{version}/data/{language}/{data_file}"
         if os.path.exists(local_path):
-            s3_key = f"lol-data/{version}/data/{language}/{data_file}"
-            total_count += 1
-            if upload_file_to_s3(s3_client, local_path, s3_key, 'application/json'):
-                success_count += 1
+            files.append((local_path, f"lol-data/{local_path}"))
+    return files
+
+def list_remote_objects(s3_client, prefix):
+    """Every object under a prefix in one listing: {key: (size, ETag)}"""
+    remote = {}
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            remote[obj['Key']] = (obj['Size'], obj['ETag'].strip('"'))
+    return remote
+
+def get_local_etag(local_path, size, transfer_config):
+    """
+    The ETag S3 reports for this file when uploaded with the given transfer settings:
+    the MD5 of the content, or for multipart uploads the MD5 of the part MD5s plus '-<parts>'.
+    Parts are sized like s3transfer does (at least 5 MiB, doubled until there are at most 10,000)
+    """
+    with open(local_path, 'rb') as f:
+        if size < transfer_config.multipart_threshold:
+            return hashlib.md5(f.read()).hexdigest()
+        chunksize = ChunksizeAdjuster().adjust_chunksize(transfer_config.multipart_chunksize, size)
+        part_digests = [hashlib.md5(part).digest() for part in iter(lambda: f.read(chunksize), b'')]
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+def diff_files(files, remote, transfer_config, force=False):
+    """Split [(local path, S3 key)] into new and changed files (size first, then MD5/ETag; all when forced)"""
+    new_files = []
+    changed_files = []
+    for local_path, s3_key in files:
+        size = os.path.getsize(local_path)
+        if s3_key not in remote:
+            new_files.append((local_path, s3_key, size))
+            continue
+        remote_size, remote_etag = remote[s3_key]
+        if force or remote_size != size or remote_etag != get_local_etag(local_path, size, transfer_config):
+            changed_files.append((local_path, s3_key, size))
+    return new_files, changed_files
+
+def upload_file_to_s3(s3_client, local_path, s3_key, transfer_config):
+    """Upload a single file to S3 with proper content type and tags"""
+    try:
+        extra_args = {
+            'Tagging': 'public=true&source=riot-api',
+            'ContentType': get_content_type(local_path)
+        }
+        
+        cache_control = get_cache_control(s3_key)
+        if cache_control:
+            extra_args['CacheControl'] = cache_control
+        
+        s3_client.upload_file(local_path, BUCKET_NAME, s3_key, ExtraArgs=extra_args, Config=transfer_config)
+        print(f"✓ Uploaded: {s3_key}")
+        return True
+    except (ClientError, S3UploadFailedError) as e:
+        print(f"✗ Failed to upload {s3_key}: {e}")
+        return False
+
+def sync_files(s3_client, files, remote, transfer_config, workers, dry_run=False, force=False):
+    """
+    Upload new and changed files through a thread pool.
+    Returns (uploaded, failed, unchanged, bytes uploaded, seconds)
+    """
+    started = time.perf_counter()
+    new_files, changed_files = diff_files(files, remote, transfer_config, force)
+    pending = new_files + changed_files
+    unchanged = len(files) - len(pending)
+    
+    if dry_run:
+        for _, s3_key, size in new_files:
+            print(f"+ {s3_key} ({size} bytes)")
+        for _, s3_key, size in changed_files:
+            print(f"~ {s3_key} ({size} bytes)")
+        print(f"Dry run: {len(new_files)} new, {len(changed_files)} changed, {unchanged} unchanged")
+        return 0, 0, unchanged, 0, time.perf_counter() - started
+    
+    # atlas.json points at the sheets, so it goes up only once every sheet is in place
+    atlas_maps = [entry for entry in pending if entry[1].endswith(f"/{ATLAS_DIR}/{ATLAS_FILE}")]
+    pooled = [entry for entry in pending if entry not in atlas_maps]
+    
+    uploaded = 0
+    uploaded_bytes = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(upload_file_to_s3, s3_client, local_path, s3_key, transfer_config): size
+            for local_path, s3_key, size in pooled
+        }
+        for future in concurrent.futures.as_completed(futures):
+            if future.result():
+                uploaded += 1
+                uploaded_bytes += futures[future]
+    
+    if atlas_maps and uploaded < len(pooled):
+        print(f"✗ Skipping {len(atlas_maps)} sprite atlas map(s): some files failed to upload")
+    else:
+        for local_path, s3_key, size in atlas_maps:
+            if upload_file_to_s3(s3_client, local_path, s3_key, transfer_config):
+                uploaded += 1
+                uploaded_bytes += size
     
-    return success_count, total_count
+    return uploaded, len(pending) - uploaded, unchanged, uploaded_bytes, time.perf_counter() - started
 
 def create_version_manifest(s3_client, version):
     """Create a manifest file for the version with metadata"""
     manifest = {
         "version": version,
-        "uploaded_at": "2024-11-05T00:00:00Z",
+        "uploaded_at": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
         "data_types": [
             "champions",
             "items", 
@@ -156,6 +314,7 @@ def create_version_manifest(s3_client, version):
             "summoner_spells",
             "champion_images"
         ],
+        "image_families": list(IMAGE_FAMILIES),
         "languages": ["en_US", "ko_KR"],
         "base_url": f"https://{BUCKET_NAME}.s3.amazonaws.com/lol-data/{version}/"
     }
@@ -179,8 +338,22 @@ def create_version_manifest(s3_client, version):
 def main():
     """Main function to upload champion data to S3"""
     # Parse command line arguments
-    target_version = sys.argv[1] if len(sys.argv) > 1 else None
-    language_arg = sys.argv[2] if len(sys.argv) > 2 else 'all'
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    target_version = args[0] if len(args) > 0 else None
+    language_arg = args[1] if len(args) > 1 else 'all'
+    dry_run = '--dry-run' in flags
+    force = '--force' in flags
+    try:
+        options = get_sync_options(flags)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    transfer_config = TransferConfig(
+        multipart_threshold=options['multipart-threshold'] * MB,
+        multipart_chunksize=options['multipart-chunksize'] * MB,
+        max_concurrency=4
+    )
     
     # Determine languages to process
     if language_arg == 'all':
@@ -191,9 +364,11 @@ def main():
     print(f"LoL Champion Data S3 Upload Script")
     print(f"Target S3 Bucket: {BUCKET_NAME}")
     print(f"Languages: {', '.join(languages)}")
+    print(f"Workers: {options['workers']}, multipart from {options['multipart-threshold']} MB in "
+          f"{options['multipart-chunksize']} MB parts{' (dry run)' if dry_run else ''}")
     
     # Initialize S3 client
-    s3_client = get_s3_client()
+    s3_client = get_s3_client(options['workers'])
     
     # Check if bucket exists
     try:
@@ -223,57 +398,70 @@ def main():
         versions_to_upload = available_versions
         print("Processing all available versions")
     
-    # Upload data for each version and language
+    # Sync data for each version and language
     total_success = 0
     total_files = 0
+    total_failed = 0
+    total_bytes = 0
+    total_seconds = 0.0
     
     for version in versions_to_upload:
         print(f"\n{'='*50}")
         print(f"Processing version {version}")
         print(f"{'='*50}")
         
-        version_success = 0
-        version_total = 0
+        files = []
         
-        # Process each language
+        # Collect each language's files
         for language in languages:
             # Check if language directory exists
             lang_dir = f"{version}/data/{language}"
             if not os.path.exists(lang_dir):
                 print(f"Warning: Language directory {lang_dir} not found, skipping...")
                 continue
-                
-            print(f"\n--- Processing language: {language} ---")
-            
-            # Upload champion data
-            success, count = upload_champion_data(s3_client, version, language)
-            version_success += success
-            version_total += count
             
-            # Upload other game data
-            success, count = upload_other_game_data(s3_client, version, language)
-            version_success += success
-            version_total += count
+            files.extend(get_champion_data_files(version, language))
+            files.extend(get_other_game_data_files(version, language))
         
-        # Upload champion images (only once per version, not per language)
-        success, count = upload_champion_images(s3_client, version)
-        version_success += success
-        version_total += count
+        # Images of every family (only once per version, not per language)
+        files.extend(get_image_files(version))
         
-        # Create version manifest
-        if create_version_manifest(s3_client, version):
-            version_success += 1
-        version_total += 1
+        # One listing of the destination, then upload only what differs
+        remote = list_remote_objects(s3_client, f"lol-data/{version}/")
+        print(f"\n{len(files)} local files, {len(remote)} objects in s3://{BUCKET_NAME}/lol-data/{version}/")
+        uploaded, failed, unchanged, uploaded_bytes, seconds = sync_files(
+            s3_client, files, remote, transfer_config, options['workers'], dry_run, force
+        )
+        
+        # Refresh the version manifest when anything changed (or it is missing). The manifest
+        # marks a version as published, so it is only written after a sync without failures
+        manifest_key = f"lol-data/{version}/manifest.json"
+        if not dry_run and (uploaded or manifest_key not in remote):
+            if failed:
+                state = "keeps its previous manifest" if manifest_key in remote else "stays unpublished"
+                print(f"⚠ {failed} file(s) failed: version {version} {state} until a rerun succeeds")
+            elif not create_version_manifest(s3_client, version):
+                failed += 1
         
-        total_success += version_success
-        total_files += version_total
+        total_success += uploaded
+        total_failed += failed
+        total_files += len(files)
+        total_bytes += uploaded_bytes
+        total_seconds += seconds
         
-        print(f"\nVersion {version}: {version_success}/{version_total} files uploaded successfully")
+        if not dry_run:
+            print(f"\nVersion {version}: {uploaded} uploaded, {failed} failed, {unchanged} unchanged "
+                  f"({uploaded_bytes / MB:.1f} MB in {seconds:.1f}s, {uploaded_bytes / MB / max(seconds, 1e-6):.1f} MB/s)")
     
     print(f"\n{'='*50}")
     print("Upload Summary")
     print(f"{'='*50}")
-    print(f"Total files uploaded: {total_success}/{total_files}")
+    if dry_run:
+        print(f"Dry run: nothing uploaded ({total_files} local files compared)")
+    else:
+        print(f"Files uploaded: {total_success} ({total_failed} failed) of {total_files} local files")
+        print(f"Throughput: {total_bytes / MB:.1f} MB in {total_seconds:.1f}s "
+              f"({total_bytes / MB / max(total_seconds, 1e-6):.1f} MB/s, {total_success / max(total_seconds, 1e-6):.0f} files/s)")
     print(f"Processed {len(versions_to_upload)} version(s)")
     print(f"Languages: {', '.join(languages)}")
     print(f"S3 Bucket: {BUCKET_NAME}")
@@ -287,8 +475,9 @@ def main():
                 print(f"│   │   ├── item.json")
                 print(f"│   │   ├── runesReforged.json")
                 print(f"│   │   └── summoner.json")
-        print(f"│   ├── img/champion/")
-        print(f"│   │   └── [champion images]")
+        for directory in IMAGE_FAMILIES.values():
+            print(f"│   ├── {directory}/")
+        print(f"│   ├── {ATLAS_DIR}/ (if built)")
         print(f"│   └── manifest.json")
     
     print(f"\nUsage examples:")
@@ -296,6 +485,9 @@ def main():
     print(f"  python upload_champion_data_to_s3.py 15.21.1           # Upload specific version, all languages")
     print(f"  python upload_champion_data_to_s3.py 15.21.1 en_US     # Upload specific version, English only")
     print(f"  python upload_champion_data_to_s3.py 15.21.1 ko_KR     # Upload specific version, Korean only")
+    print(f"  python upload_champion_data_to_s3.py 15.21.1 --dry-run # Show what would be uploaded")
+    print(f"  python upload_champion_data_to_s3.py 15.21.1 --force   # Re-upload everything (refreshes headers)")
+    print(f"  python upload_champion_data_to_s3.py --workers=32 --multipart-threshold=16 --multipart-chunksize=16")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file